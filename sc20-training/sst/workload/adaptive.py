@@ -0,0 +1,271 @@
+#!/usr/bin/env python
+############################################################################################################################
+# Adaptive search over the configuration space by successive halving
+#
+# Every in-budget configuration is first simulated at the cheapest fidelity; each rung keeps the best 1/eta of its
+# candidates by performance per cost (time * cost) and promotes them to the next, more expensive fidelity, up to full
+# runs of the survivors. A fidelity is a mesh scale (--scale, calibrate.py) optionally with sampled planes (--sample,
+# sampling.py), written SCALE[/SAMPLE]; the last rung is the full problem ("1"). Runs go through sweep.py, so they are
+# scheduled the same way, land in the result store and are reused by later searches.
+#
+# The final rung runs the --calibrate best-ranked finalists to completion first. They give the incumbent that bounds
+# the remaining finalists (sweep.py --stop-at) and pairs of (low-fidelity, full) times for every rung. A log-linear fit
+# of those pairs (calibrate.Calibration) predicts the full-size time of each eliminated configuration with an error,
+# hence the probability that it would have beaten the winner; the confidence that the winner is the optimum is the
+# product of one minus those probabilities. The fit only sees the finalists, so the confidence is optimistic for
+# configurations far from them, and it is unknown when a rung has fewer than three pairs.
+#
+# The report also gives the simulator core-hours used (each SST run on one core, more with --sst-arg -n), split into
+# runs made by this search and results reused from the store, against the estimated cost of the exhaustive full sweep.
+#
+#   python adaptive.py --rungs 0.25,0.5,1 --eta 3 --jobs 8
+#   python adaptive.py --rungs 0.5/16:1:1,0.5,1 --sst ./standin/sst --outdir /tmp/adaptive   # dry run
+############################################################################################################################
+from __future__ import print_function, division
+
+import argparse
+import math
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+import calibrate
+import resultstore
+import sampling
+import sweep
+
+CALIBRATE = 3
+
+
+def parse_rungs(text):
+    """[(scale, sample spec or None)] from "SCALE[/SAMPLE],..."; the last rung must be the full problem."""
+    rungs = []
+    for token in text.split(","):
+        scale, _, sample = token.partition("/")
+        scale = float(scale)
+        if not 0 < scale <= 1:
+            raise ValueError("bad scale in rung " + token)
+        if sample:
+            sampling.parse_spec(sample)
+        rungs.append((scale, sample or None))
+    if rungs[-1] != (1.0, None):
+        raise ValueError("the last rung must be the full problem (1)")
+    return rungs
+
+
+def rung_name(rung):
+    scale, sample = rung
+    return "full" if rung == (1.0, None) else "scale %g" % scale + (", sample " + sample if sample else "")
+
+
+def run_options(cfg, rung):
+    """The --model-options of a configuration at a rung's fidelity."""
+    scale, sample = rung
+    return " ".join([sweep.model_options(cfg)] + sweep.scale_options(scale) + sweep.sample_options(sample))
+
+
+def _norm_cdf(z):
+    return 0.5 * (1.0 + math.erf(z / math.sqrt(2.0)))
+
+
+class Search:
+    def __init__(self, args):
+        self.args = args
+        self.script = os.path.abspath(args.script)
+        self.db = os.path.abspath(args.db)
+        self.start = time.time()
+        self.store = resultstore.ResultStore(self.db, workdir=os.path.dirname(self.script))
+        # {rung index : {options : record}} of the candidates run at each rung
+        self.records = {}
+        # Rung each configuration was last ranked at
+        self.reached = {}
+
+    def run(self, configs, rung, no_bound=False):
+        """Simulate configs at a rung's fidelity through sweep.py. Returns its exit status."""
+        if not configs:
+            return 0
+        scale, sample = rung
+        fd, path = tempfile.mkstemp(prefix="adaptive-", suffix=".txt")
+        with os.fdopen(fd, "w") as f:
+            for cfg in configs:
+                f.write(sweep.model_options(cfg) + "\n")
+        argv = ["--configs", path, "--db", self.db, "--script", self.script, "--sst", self.args.sst,
+                "--outdir", self.args.outdir, "--jobs", str(self.args.jobs)]
+        argv += ["--mem-gb", str(self.args.mem_gb)] if self.args.mem_gb else []
+        argv += ["--sst-arg=" + a for a in self.args.sst_arg]
+        argv += ["--scale", "%g" % scale] if scale != 1 else []
+        argv += ["--sample", sample] if sample else []
+        argv += ["--no-bound"] if no_bound else []
+        try:
+            return sweep.main(argv)
+        finally:
+            os.remove(path)
+
+    def lookup(self, cfg, rung):
+        return self.store.lookup(run_options(cfg, rung))
+
+    def calibration(self, rung):
+        """calibrate.Calibration of a rung's times against full-size times, or None with fewer than three pairs."""
+        pairs = []
+        for cfg in sweep.enumerate_configs(self.args.budget):
+            low, full = self.lookup(cfg, rung), self.lookup(cfg, (1.0, None))
+            if low and full and low["status"] == "ok" and full["status"] == "ok":
+                pairs.append((sweep.model_options(cfg), low["simulated_time_ps"], full["simulated_time_ps"]))
+        return calibrate.Calibration(pairs) if len(pairs) >= 3 else None
+
+    def rank(self, configs, index, rung):
+        """configs that ran at a rung, best predicted full-size time * cost first."""
+        fit = self.calibration(rung) if rung != (1.0, None) else None
+        scored = []
+        for cfg in configs:
+            rec = self.lookup(cfg, rung)
+            if rec is None or rec["status"] != "ok":
+                continue
+            self.records.setdefault(index, {})[sweep.model_options(cfg)] = rec
+            predicted = fit.predict(rec["simulated_time_ps"])[0] if fit else rec["simulated_time_ps"]
+            scored.append((predicted * rec["cost"], sweep.model_options(cfg), cfg))
+            self.reached[sweep.model_options(cfg)] = index
+        return [cfg for _, _, cfg in sorted(scored, key=lambda s: s[:2])]
+
+    def search(self, rungs):
+        candidates = sweep.enumerate_configs(self.args.budget)
+        for index, rung in enumerate(rungs[:-1]):
+            status = self.run(candidates, rung)
+            if status:
+                return status
+            ranked = self.rank(candidates, index, rung)
+            keep = max(int(math.ceil(len(ranked) / self.args.eta)), self.args.min_keep)
+            print("Rung %d (%s): %d candidates ranked, %d promoted" % (index + 1, rung_name(rung), len(ranked),
+                                                                       min(keep, len(ranked))))
+            candidates = ranked[:keep]
+
+        # Full runs: the best-ranked finalists to completion, then the rest bounded by the incumbent they give
+        last = len(rungs) - 1
+        lead, rest = candidates[:self.args.calibrate], candidates[self.args.calibrate:]
+        status = self.run(lead, rungs[-1], no_bound=True) or self.run(rest, rungs[-1])
+        if status:
+            return status
+        self.rank(candidates, last, rungs[-1])
+        for cfg in candidates:
+            rec = self.lookup(cfg, rungs[-1])
+            if rec is not None:
+                self.records.setdefault(last, {})[sweep.model_options(cfg)] = rec
+        print("Rung %d (full): %d finalists" % (last + 1, len(candidates)))
+        return 0
+
+    def winner(self, rungs):
+        full = [rec for rec in self.records.get(len(rungs) - 1, {}).values() if rec["status"] == "ok"]
+        return min(full, key=lambda rec: rec["simulated_time_ps"] * rec["cost"]) if full else None
+
+    def confidence(self, rungs, best):
+        """(probability that no eliminated configuration beats best, [(probability, options)] most likely first),
+        or (None, []) when a rung cannot be calibrated."""
+        target = best["simulated_time_ps"] * best["cost"]
+        rivals = []
+        for index, rung in enumerate(rungs[:-1]):
+            # Configurations last ranked at this rung; a finalist that was stopped at full size is known to lose
+            eliminated = [(options, rec) for options, rec in self.records.get(index, {}).items()
+                          if self.reached.get(options) == index and options not in self.records.get(len(rungs) - 1, {})]
+            if not eliminated:
+                continue
+            fit = self.calibration(rung)
+            if fit is None:
+                return None, []
+            for options, rec in eliminated:
+                predicted, rel = fit.predict(rec["simulated_time_ps"])
+                sigma = math.log(1.0 + rel) if rel > 0 else 1e-9
+                # P(full time < the time at which this configuration would match the winner's time * cost)
+                p = _norm_cdf((math.log(target / rec["cost"]) - math.log(predicted)) / sigma)
+                rivals.append((p, options))
+        confidence = 1.0
+        for p, _ in rivals:
+            confidence *= 1.0 - p
+        return confidence, sorted(rivals, reverse=True)
+
+    def core_hours(self):
+        """(core-hours of runs made by this search, core-hours of results reused from the store)."""
+        threads = 1
+        for i, arg in enumerate(self.args.sst_arg):
+            if arg in ("-n", "--num_threads") and i + 1 < len(self.args.sst_arg):
+                threads = int(self.args.sst_arg[i + 1])
+        new = reused = 0.0
+        seen = set()
+        for recs in self.records.values():
+            for rec in recs.values():
+                if rec["options"] in seen:
+                    continue
+                seen.add(rec["options"])
+                hours = (rec["wall_time"] or 0.0) * threads / 3600.0
+                if rec["created"] >= self.start:
+                    new += hours
+                else:
+                    reused += hours
+        return new, reused
+
+    def exhaustive_hours(self):
+        """Estimated core-hours of running every in-budget configuration at full size (sweep.ResourceModel)."""
+        model = sweep.ResourceModel()
+        for rec in self.store.results():
+            cfg, extra = resultstore.split_options(self.store.cat, rec["options"])
+            if not extra:
+                model.observe(cfg, rec["peak_rss_kb"], rec["wall_time"])
+        return sum(model.wall_s(cfg) for cfg in sweep.enumerate_configs(self.args.budget)) / 3600.0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Successive-halving search for the best performance per cost")
+    parser.add_argument("--rungs", default="0.25,0.5,1",
+                        help="Fidelities SCALE[/SAMPLE], cheapest first, ending with 1, default: %(default)s")
+    parser.add_argument("--eta", type=float, default=3.0, help="Keep 1/eta of the candidates per rung, default: 3")
+    parser.add_argument("--min-keep", type=int, default=4, help="Promote at least this many, default: %(default)s")
+    parser.add_argument("--calibrate", type=int, default=CALIBRATE,
+                        help="Finalists run to completion for the calibration, default: %(default)s")
+    parser.add_argument("--budget", type=float, default=sweep.CATALOG["budget"], help="Cost limit, default: %(default)s")
+    parser.add_argument("--sst", default="sst", help="SST executable (or a stand-in), default: sst")
+    parser.add_argument("--script", default=os.path.join(sweep.SCRIPT_DIR, "scc-sst-node.py"), help="SST input script")
+    parser.add_argument("--outdir", default="sweep-out", help="Directory for run logs")
+    parser.add_argument("--db", default=resultstore.DEFAULT_DB, help="Result store, default: %(default)s")
+    parser.add_argument("--jobs", type=int, default=multiprocessing.cpu_count(), help="Concurrent SST runs")
+    parser.add_argument("--mem-gb", type=float, help="Memory to pack jobs into (default: 90%% of MemAvailable)")
+    parser.add_argument("--sst-arg", action="append", default=[], help="Extra argument passed to sst (repeatable)")
+    args = parser.parse_args(argv)
+    try:
+        rungs = parse_rungs(args.rungs)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.eta <= 1:
+        parser.error("--eta must be greater than 1")
+
+    search = Search(args)
+    status = search.search(rungs)
+    if status:
+        return status
+
+    best = search.winner(rungs)
+    new, reused = search.core_hours()
+    print("")
+    if best is None:
+        print("No finalist completed at full size")
+        return 1
+    print("Configuration: " + best["options"])
+    print("Cost: %g" % best["cost"])
+    print("Simulation time: " + best["simulated_time"])
+    print("Simulator core-hours: %.2f for this search, %.2f reused from the store; the exhaustive sweep is estimated "
+          "at %.2f" % (new, reused, search.exhaustive_hours()))
+    confidence, rivals = search.confidence(rungs, best)
+    if confidence is None:
+        print("Confidence unknown: a rung has fewer than three configurations also run at full size "
+              "(raise --calibrate)")
+    else:
+        print("Confidence that this is the optimum: %.1f%%" % (100.0 * confidence))
+        for p, options in rivals[:5]:
+            if p >= 0.001:
+                print("  %5.1f%%  %s" % (100.0 * p, options))
+    search.store.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
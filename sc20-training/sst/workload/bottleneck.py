@@ -0,0 +1,374 @@
+############################################################################################################################
+# Bottleneck attribution and upgrade ranking for one scc-sst-node.py run
+#
+# Reads the statistics of a run made with --stats=summary or detailed (statsload.py) and splits its simulated time into
+#
+#   issue width    cycles in which the cores issued max_reqs_cycle requests (Miranda cycles_max_issue)
+#   reorder        cycles stopped at the reorder window (cycles_max_rorder)
+#   L1, L2, L3     the memory stall cycles (cycles_no_issue), shared out by the measured misses of each level times
+#                  its access latency from the catalog
+#   NoC            the same for the mesh hops to remote L2/L3 slices and the memory controllers (placement.py hop
+#                  counts, one router cycle plus a 300ps link per hop); "congestion" is the queueing added by the
+#                  measured link utilization (kingsley send_bit_count over 36B per NoC cycle)
+#   DRAM           the unloaded access latency of the memory type, and the queueing added by each channel's measured
+#                  bandwidth against its nominal peak (bandwidth)
+#   other          the remaining cycles (issuing below the width, dependencies)
+#
+# Mean outstanding requests per thread (Little's law on Miranda req_latency) against maxmemreqpending tells whether
+# the stalls are the pending-request limit. Each single-option catalog upgrade is then scored by the time it is
+# predicted to save per unit of added cost, scaling only the components it affects: cache options through the hit
+# rates of cacheanalyzer.py, the core type through clock, issue width and pending limit, SMT through twice the
+# outstanding requests, the NoC clock, the memory type's latency and peak, and the channel count. The predictions are
+# first-order; they rank the next configuration to simulate rather than replace the run.
+#
+#   python bottleneck.py sweep-out/runs/<run>
+#   python bottleneck.py stats.csv.gz --options="-n=30 -c=medium ..." --time="412.5 us"
+############################################################################################################################
+from __future__ import print_function, division
+
+import argparse
+import os
+import re
+import sys
+
+import catalog
+import meshpart
+import placement
+import statsload
+import sweep
+
+HOP_LINK_PS = 300.0
+L3_CLOCK_GHZ = 1.8
+DIRECTORY_CYCLES = 4
+DRAM_CLOCK_GHZ = 1.2
+# Queueing delay is capped at this utilization (the statistics can round a saturated link up to 1)
+MAX_UTILIZATION = 0.95
+# Mean outstanding requests above this share of maxmemreqpending count as pending-limited
+PENDING_LIMITED = 0.8
+
+COMPONENTS = ["issue width", "reorder", "L1", "L2", "L3", "NoC", "NoC congestion", "DRAM latency", "DRAM bandwidth",
+              "other"]
+CONFIGURED_RE = re.compile(r"^\s+(\w+):\s+(\S+)\s*$")
+
+
+def _ghz(clock):
+    match = re.match(r"([0-9.]+)\s*([GM])Hz", clock)
+    return float(match.group(1)) / (1000.0 if match.group(2) == "M" else 1.0)
+
+
+def _queueing(u):
+    """Mean queueing delay over service time of a deterministic server at utilization u (M/D/1)."""
+    u = min(u, MAX_UTILIZATION)
+    return u / (2.0 * (1.0 - u))
+
+
+def parse_configured(cat, text):
+    """The catalog configuration from the "Configured with:" block the script prints, or None."""
+    names = catalog.option_names(cat)
+    cfg = {}
+    for line in text.splitlines():
+        match = CONFIGURED_RE.match(line)
+        if match and match.group(1) in names:
+            cfg[match.group(1)] = match.group(2)
+    return cfg if len(cfg) == len(names) else None
+
+
+def dram_peak(memattr):
+    """Nominal peak bytes per ns of one channel: 64B per request, max_requests_per_cycle per dataCycles."""
+    return 64.0 * DRAM_CLOCK_GHZ * memattr["max_requests_per_cycle"] / memattr["dataCycles"]
+
+
+def dram_latency_ns(memattr):
+    """Unloaded access latency of a row hit plus activation (open-page policy) and the data transfer."""
+    return (memattr["CL"] + memattr["RCD"] + memattr["dataCycles"]) / DRAM_CLOCK_GHZ
+
+
+class Geometry:
+    """Hop latencies of one configuration on its mesh, with the placement the script uses."""
+
+    def __init__(self, cat, cfg, method="anneal"):
+        corecount = int(cfg["corecount"])
+        mp = meshpart.MeshPartitioner(corecount, int(cfg["memchannels"]), cat["workload"]["globalmesh"])
+        mesh_x, mesh_y = meshpart.mesh_shape(corecount)
+        place = placement.place_cores(mp, mesh_x, mesh_y, method)
+        placer = placement.Placer(mp.boxes, mesh_x, mesh_y, mp.mc)
+        # Lines are interleaved over the slices, so a core reaches every slice (its own included) equally often
+        self.slice_hops = sum(placement.hops(a, b, mesh_x) for a in place for b in place) / float(len(place) ** 2)
+        self.memory_hops = sum(placer.mc_dist[s] for s in place) / float(len(place))
+
+
+def hop_ns(cat, noc):
+    """One router cycle plus one link."""
+    return (HOP_LINK_PS + 1e6 / catalog.attributes(cat, "noc", noc)["clock_mhz"]) / 1000.0
+
+
+class Latencies:
+    """Per-access latency (ns) of each part of the memory path, for a configuration."""
+
+    def __init__(self, cat, cfg, geometry):
+        core_ghz = _ghz(catalog.attributes(cat, "coretype", cfg["coretype"])["clock"])
+        hop = hop_ns(cat, cfg["noc"])
+        memattr = catalog.attributes(cat, "memtype", cfg["memtype"])
+        self.l1 = catalog.attributes(cat, "l1size", cfg["l1size"])["access_latency_cycles"] / core_ghz
+        self.l2 = catalog.attributes(cat, "l2size", cfg["l2size"])["access_latency_cycles"] / core_ghz
+        self.l3 = catalog.attributes(cat, "l3size", cfg["l3size"])["access_latency_cycles"] / L3_CLOCK_GHZ
+        # Round trips over the mesh: to the L2 slice (shared L2 only), the L3 slice, and directory plus memory
+        self.noc_l2 = 2 * geometry.slice_hops * hop if cfg["l2type"] == "shared" else 0.0
+        self.noc_l3 = 2 * geometry.slice_hops * hop
+        self.noc_mem = 2 * geometry.memory_hops * hop
+        self.dram = dram_latency_ns(memattr) + DIRECTORY_CYCLES / L3_CLOCK_GHZ
+
+
+def _sum(tot, kind, *stats):
+    return sum(tot.get((kind, stat), (0.0, 0.0))[0] for stat in stats)
+
+
+class Attribution:
+    """Simulated time of a run split into COMPONENTS (fractions adding up to 1)."""
+
+    def __init__(self, cat, cfg, simtime_ps, cols, geometry):
+        self.cat = cat
+        self.cfg = cfg
+        self.simtime_ps = simtime_ps
+        self.geometry = geometry
+        self.notes = []
+        tot = statsload.totals(cols)
+        self.hit_rates = statsload.hit_rates(tot)
+        coreattr = catalog.attributes(cat, "coretype", cfg["coretype"])
+        threads = int(cfg["corecount"]) * (2 if cfg["smt"] == "yes" else 1)
+        ns = simtime_ps / 1000.0
+
+        # Core cycles
+        cycles = _sum(tot, "core", "cycles")
+        if cycles > 0:
+            issue = _sum(tot, "core", "cycles_max_issue") / cycles
+            reorder = _sum(tot, "core", "cycles_max_rorder") / cycles
+            stall = _sum(tot, "core", "cycles_no_issue") / cycles
+        else:
+            self.notes.append("no Miranda cycle statistics: all time treated as memory stalls")
+            issue, reorder, stall = 0.0, 0.0, 1.0
+        requests = _sum(tot, "core", "read_reqs", "write_reqs")
+        latency_sum, latency_count = tot.get(("core", "req_latency"), (0.0, 0.0))
+        self.outstanding = None
+        if latency_count and ns:
+            self.outstanding = requests / threads / ns * (latency_sum / latency_count)
+        self.pending_limited = (self.outstanding is not None and
+                                self.outstanding >= PENDING_LIMITED * coreattr["maxmemreqpending"])
+
+        # Misses of each level (accesses when the statistics are missing, so that the level still counts)
+        accesses = _sum(tot, "l1cache", "CacheHits", "CacheMisses")
+        self.misses = [_sum(tot, kind, "CacheMisses") for kind in statsload.CACHE_KINDS]
+        if not accesses:
+            self.notes.append("no cache statistics: memory stalls split by latency alone")
+            accesses, self.misses = 1.0, [1.0, 1.0, 1.0]
+        self.accesses = accesses
+
+        # NoC link utilization, per router port
+        link_bytes_per_ns = 36.0 * catalog.attributes(cat, "noc", cfg["noc"])["clock_mhz"] / 1000.0
+        self.links = {}
+        for comp, stat, sub, value in zip(cols["ComponentName"], cols["StatisticName"], cols["StatisticSubId"],
+                                          cols["Sum"]):
+            if stat == "send_bit_count" and statsload.component_kind(comp) == "rtr" and ns:
+                key = (comp, sub)
+                self.links[key] = self.links.get(key, 0.0) + value / 8.0 / (link_bytes_per_ns * ns)
+        self.noc_utilization = sum(self.links.values()) / len(self.links) if self.links else 0.0
+
+        # DRAM channel utilization against the nominal peak
+        memattr = catalog.attributes(cat, "memtype", cfg["memtype"])
+        self.channels = {}
+        for comp, stat, value in zip(cols["ComponentName"], cols["StatisticName"], cols["Sum"]):
+            if statsload.component_kind(comp) == "memctrl" and stat.startswith("requests_received_") and ns:
+                self.channels[comp] = self.channels.get(comp, 0.0) + 64.0 * value / (dram_peak(memattr) * ns)
+        self.dram_utilization = max(self.channels.values()) if self.channels else 0.0
+
+        self.fractions = self._split(issue, reorder, stall, Latencies(cat, cfg, geometry), self.misses,
+                                     self.noc_utilization, self.dram_utilization)
+
+    def _weights(self, lat, misses, noc_u, dram_u):
+        l1_miss, l2_miss, l3_miss = misses
+        noc = l1_miss * lat.noc_l2 + l2_miss * lat.noc_l3 + l3_miss * lat.noc_mem
+        return {
+            "L1" : self.accesses * lat.l1,
+            "L2" : l1_miss * lat.l2,
+            "L3" : l2_miss * lat.l3,
+            "NoC" : noc,
+            "NoC congestion" : noc * _queueing(noc_u),
+            "DRAM latency" : l3_miss * lat.dram,
+            "DRAM bandwidth" : l3_miss * lat.dram * _queueing(dram_u),
+        }
+
+    def _split(self, issue, reorder, stall, lat, misses, noc_u, dram_u):
+        weights = self._weights(lat, misses, noc_u, dram_u)
+        total = sum(weights.values())
+        fractions = {"issue width" : issue, "reorder" : reorder}
+        for name, w in weights.items():
+            fractions[name] = stall * w / total if total else 0.0
+        fractions["other"] = max(0.0, 1.0 - issue - reorder - stall)
+        return fractions
+
+    def busiest_links(self, count=3):
+        return sorted(self.links.items(), key=lambda item: item[1], reverse=True)[:count]
+
+
+class Predictor:
+    """Predicted simulated time of single-option upgrades, from an Attribution."""
+
+    def __init__(self, attribution, cache_models=None):
+        self.a = attribution
+        self.cat = attribution.cat
+        self.cache_models = cache_models
+
+    def _cache_weights(self, cfg, lat):
+        # Miss counts of the cacheanalyzer model for a configuration, scaled to the measured L1 accesses
+        import cacheanalyzer
+        model = self.cache_models[tuple(cfg[name] for name in cacheanalyzer.CACHE_OPTIONS)]
+        scale = self.a.accesses / model.hist.accesses()
+        arriving, misses = model.hist.accesses(), []
+        for hits in model.hits.values():
+            arriving -= hits
+            misses.append(arriving * scale)
+        return self.a._weights(lat, misses, self.a.noc_utilization, self.a.dram_utilization)
+
+    def predict(self, new):
+        """Predicted simulated time (ps) of configuration new, which differs from the run in one option."""
+        a, old = self.a, self.a.cfg
+        f = dict(a.fractions)
+        changed = [name for name in catalog.option_names(self.cat) if new[name] != old[name]]
+        name = changed[0]
+        old_lat = Latencies(self.cat, old, a.geometry)
+        new_lat = Latencies(self.cat, new, a.geometry)
+        memory = ["L1", "L2", "L3", "NoC", "NoC congestion", "DRAM latency", "DRAM bandwidth"]
+        if name in ["l1size", "l2size", "l2type", "l3size"] and self.cache_models is not None:
+            before, after = self._cache_weights(old, old_lat), self._cache_weights(new, new_lat)
+            for part in memory:
+                f[part] *= after[part] / before[part] if before[part] else 1.0
+        elif name == "coretype":
+            oldc = catalog.attributes(self.cat, "coretype", old["coretype"])
+            newc = catalog.attributes(self.cat, "coretype", new["coretype"])
+            clock = _ghz(oldc["clock"]) / _ghz(newc["clock"])
+            f["issue width"] *= clock * oldc["max_reqs_cycle"] / newc["max_reqs_cycle"]
+            f["reorder"] *= clock * oldc["max_reorder_lookups"] / newc["max_reorder_lookups"]
+            f["other"] *= clock
+            f["L1"] *= clock
+            f["L2"] *= clock
+            if a.pending_limited:
+                # More requests in flight hide latency, until the channels saturate
+                pending = oldc["maxmemreqpending"] / float(newc["maxmemreqpending"])
+                for part in ["L3", "NoC", "DRAM latency"]:
+                    f[part] *= pending
+        elif name == "smt":
+            # Twice the threads keep twice the requests in flight against the same latencies
+            for part in ["L1", "L2", "L3", "NoC", "DRAM latency"]:
+                f[part] *= 0.5
+        elif name == "noc":
+            clock = (catalog.attributes(self.cat, "noc", old["noc"])["clock_mhz"] /
+                     float(catalog.attributes(self.cat, "noc", new["noc"])["clock_mhz"]))
+            u = a.noc_utilization * clock
+            f["NoC"] *= new_lat.noc_l3 / old_lat.noc_l3
+            f["NoC congestion"] *= (new_lat.noc_l3 * _queueing(u) / (old_lat.noc_l3 * _queueing(a.noc_utilization))
+                                    if a.noc_utilization else 1.0)
+        elif name in ["memtype", "memchannels"]:
+            oldm = catalog.attributes(self.cat, "memtype", old["memtype"])
+            newm = catalog.attributes(self.cat, "memtype", new["memtype"])
+            u = (a.dram_utilization * dram_peak(oldm) / dram_peak(newm) *
+                 int(old["memchannels"]) / float(int(new["memchannels"])))
+            f["DRAM latency"] *= new_lat.dram / old_lat.dram
+            f["DRAM bandwidth"] *= (new_lat.dram * _queueing(u) / (old_lat.dram * _queueing(a.dram_utilization))
+                                    if a.dram_utilization else 1.0)
+        elif name == "corecount":
+            # The work is spread over more cores; the memory system serves the same traffic
+            share = int(old["corecount"]) / float(int(new["corecount"]))
+            for part in ["issue width", "reorder", "other", "L1", "L2"]:
+                f[part] *= share
+        return a.simtime_ps * sum(f.values())
+
+    def upgrades(self):
+        """[(option, new value, config)] for the next value of every option."""
+        result = []
+        for opt in self.cat["options"]:
+            values = opt["values"]
+            i = values.index(self.a.cfg[opt["name"]])
+            nexts = values[i + 1:] if opt["name"] == "memtype" else values[i + 1:i + 2]
+            for value in nexts:
+                cfg = dict(self.a.cfg)
+                cfg[opt["name"]] = value
+                result.append((opt["name"], value, cfg))
+        return result
+
+    def rank(self):
+        """[(saving ps per unit cost, option, value, predicted ps, added cost, in budget)], best first."""
+        cost = catalog.config_cost(self.cat, self.a.cfg)
+        rows = []
+        for name, value, cfg in self.upgrades():
+            added = catalog.config_cost(self.cat, cfg) - cost
+            predicted = self.predict(cfg)
+            saving = self.a.simtime_ps - predicted
+            per_cost = saving / added if added > 0 else float("inf") if saving > 0 else 0.0
+            rows.append((per_cost, name, value, predicted, added, cost + added <= self.cat["budget"]))
+        # In-budget upgrades first
+        return sorted(rows, key=lambda r: (not r[5], -r[0]))
+
+
+def report(cat, cfg, simtime_ps, cols, method="anneal", use_cache_model=True):
+    geometry = Geometry(cat, cfg, method)
+    a = Attribution(cat, cfg, simtime_ps, cols, geometry)
+    coreattr = catalog.attributes(cat, "coretype", cfg["coretype"])
+    print("Configuration: " + catalog.model_options(cat, cfg))
+    print("Simulated time %.4f us, cost %g" % (simtime_ps / 1e6, catalog.config_cost(cat, cfg)))
+    for note in a.notes:
+        print("  note: " + note)
+    print("")
+    print("%-16s %8s %12s" % ("component", "share", "time us"))
+    for name in COMPONENTS:
+        print("%-16s %7.1f%% %12.4f" % (name, 100.0 * a.fractions[name], a.fractions[name] * simtime_ps / 1e6))
+    print("")
+    print("Hit rates: " + (", ".join("%s %.3f" % (k, v) for k, v in sorted(a.hit_rates.items())) or "-"))
+    if a.outstanding is not None:
+        print("Outstanding requests per thread %.1f of maxmemreqpending %d%s" %
+              (a.outstanding, coreattr["maxmemreqpending"], " (pending-limited)" if a.pending_limited else ""))
+    print("NoC mean link utilization %.3f, busiest: %s" %
+          (a.noc_utilization, ", ".join("%s %s %.3f" % (c, p, u) for (c, p), u in a.busiest_links()) or "-"))
+    print("DRAM channel utilization: " +
+          (", ".join("%s %.3f" % (c, u) for c, u in sorted(a.channels.items())) or "-"))
+    print("")
+
+    models = None
+    if use_cache_model:
+        import cacheanalyzer
+        models = cacheanalyzer.analyze(cat, int(cfg["corecount"]), cfg["smt"])
+    print("%-14s %-8s %12s %10s %14s" % ("upgrade", "", "predicted us", "added cost", "us saved/cost"))
+    for per_cost, name, value, predicted, added, within in Predictor(a, models).rank():
+        print("%-14s %-8s %12.4f %10g %14.5f%s" % (name, value, predicted / 1e6, added, per_cost / 1e6,
+                                                   "" if within else "  over budget"))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Attribute a run's simulated time and rank catalog upgrades")
+    parser.add_argument("path", help="Run directory (with sst.log and statistics) or stats file")
+    parser.add_argument("--options", help="Model options of the run (default: the Configured block in sst.log)")
+    parser.add_argument("--time", help="Simulated time, e.g. \"412.5 us\" (default: from sst.log)")
+    parser.add_argument("--placement", default="anneal", help="Core placement of the run, default: %(default)s")
+    parser.add_argument("--no-cache-model", action="store_true", help="Do not predict cache upgrades (no NumPy run)")
+    args = parser.parse_args(argv)
+
+    cat = catalog.load()
+    stats = statsload.find_stats(args.path)
+    if stats is None:
+        print("No statistics in %s (run with --stats=summary or detailed)" % args.path)
+        return 1
+    log = os.path.join(args.path if os.path.isdir(args.path) else os.path.dirname(args.path), "sst.log")
+    text = open(log).read() if os.path.exists(log) else ""
+    cfg = catalog.parse_model_options(cat, args.options) if args.options else parse_configured(cat, text)
+    if args.time:
+        simtime_ps = sweep.parse_simtime("Simulation is complete, simulated time: " + args.time)[1]
+    else:
+        simtime_ps = sweep.parse_simtime(text)[1]
+    if cfg is None or simtime_ps is None:
+        print("Cannot tell the configuration or simulated time of %s; give --options and --time" % args.path)
+        return 1
+    report(cat, cfg, simtime_ps, statsload.load_arrays(stats), args.placement, not args.no_cache_model)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,419 @@
+############################################################################################################################
+# Offline cache analysis of the sc19 stencil
+#
+# Estimates the L1/L2/L3 hit rates of every cache option in the catalog without running SST. Each core's request
+# stream is regenerated with NumPy following sc19gen.cc (per point: center, x+1, x-1, y+1, y-1, z+1, z-1, then a write
+# to a random histogram slot) or loaded from a recorded trace (tracefile.py), and turned into a reuse-distance
+# histogram at cache-line granularity: the number of distinct lines touched between two uses of the same line.
+#
+# Hit probabilities for a reuse distance d in a cache of S sets and A ways:
+#
+#   lru   P(hit) = P(X < A) with X ~ Binomial(d, 1/S), the other lines that land in the same set
+#   nmru  random eviction among the A-1 ways that are not the most recently used: the line survives each miss to its
+#         set with probability 1 - 1/(A-1); the rate of misses per distinct line is solved as a fixed point
+#
+# The levels are treated as inclusive: an access hits at the first level that holds it. A cache shared by k threads
+# (SMT L1, private L2 with SMT, shared L2 slices, L3 slices) sees the reuse distances of its sharers interleaved, so d is
+# scaled by k; the slices of a shared cache add up to k times the sets. Lines one core fetches for a neighbour's halo are
+# not credited to the neighbour, so a shared L2 only differs from a private one through its geometry. Only the first
+# sweep is modelled (the catalog workload runs one iteration).
+#
+# An option value is reported as prunable when, against the first (cheapest) value of that option, it never cuts the
+# memory traffic or the mean access latency (MEMORY_LATENCY_CYCLES for DRAM) by --threshold in any combination of the
+# other cache options.
+#
+# The stencil repeats from one z-plane to the next, so by default only the first SAMPLE_PLANES planes of each
+# subdomain are generated and the steady-state planes are extrapolated to the full depth (--exact generates them all).
+# Subdomains with the same shape and line alignment share one histogram.
+#
+#   python cacheanalyzer.py                        # hit rates and prune report for every catalog core count
+#   python cacheanalyzer.py -n 40 -t yes --table   # one core count, all cache options
+#   python cacheanalyzer.py --trace traces/sc19-0123456789abcdef.trc -n 22
+############################################################################################################################
+from __future__ import print_function, division
+
+import argparse
+import collections
+import itertools
+import json
+import sys
+import time
+
+import catalog
+import meshpart
+import smtsplit
+
+LINE_SHIFT = 6
+SAMPLE_PLANES = 5
+HISTOGRAM_SEED = 8471
+NMRU_ITERATIONS = 30
+PRUNE_THRESHOLD = 0.01
+# Rough DRAM latency seen by a core, only used to weigh hit rates against the access latency of bigger caches
+MEMORY_LATENCY_CYCLES = 150
+
+CACHE_OPTIONS = ["l1size", "l2size", "l2type", "l3size"]
+
+
+def _earlier_greater(values):
+    """For each element, the number of earlier elements with a larger value (bottom-up merge counting)."""
+    import numpy as np
+    n = len(values)
+    counts = np.zeros(n, dtype=np.int64)
+    if n < 2:
+        return counts
+    big = n + 2
+    vals = values.astype(np.int64) + 1
+    pos = np.arange(n, dtype=np.int64)
+    width = 1
+    # keys are sorted within blocks of `width` elements and carry the block index in the high part
+    keys = pos * big + vals
+    while width < n:
+        block = pos // width
+        right = block % 2 == 1
+        query = (block[right] - 1) * big + vals[right]
+        counts[right] += block[right] * width - np.searchsorted(keys, query, side="right")
+        width *= 2
+        keys = np.sort((pos // width) * big + vals)
+    return counts
+
+
+def reuse_distances(lines):
+    """Distinct other lines touched since the previous use of each line, -1 for the first use."""
+    import numpy as np
+    n = len(lines)
+    order = np.argsort(lines, kind="stable")
+    prev = np.full(n, -1, dtype=np.int64)
+    same = lines[order[1:]] == lines[order[:-1]]
+    prev[order[1:][same]] = order[:-1][same]
+    # Distinct lines in (prev, i) = positions in between minus those whose line is used again before i
+    dist = np.arange(n, dtype=np.int64) - prev - 1 - _earlier_greater(prev)
+    dist[prev < 0] = -1
+    return dist
+
+
+class ReuseHistogram:
+    """Access counts by reuse distance (counts[d]) plus first-use (cold) accesses."""
+
+    def __init__(self, counts, cold, points):
+        self.counts = counts
+        self.cold = cold
+        self.points = points
+
+    @staticmethod
+    def from_distances(dist, points, weights=None):
+        import numpy as np
+        warm = dist >= 0
+        w = None if weights is None else weights[warm]
+        counts = np.bincount(dist[warm], weights=w).astype(np.float64)
+        cold = float(np.count_nonzero(~warm) if weights is None else weights[~warm].sum())
+        return ReuseHistogram(counts, cold, points)
+
+    def accesses(self):
+        return self.counts.sum() + self.cold
+
+    def add(self, other, weight=1.0):
+        import numpy as np
+        size = max(len(self.counts), len(other.counts))
+        counts = np.zeros(size)
+        counts[:len(self.counts)] += self.counts
+        counts[:len(other.counts)] += weight * other.counts
+        return ReuseHistogram(counts, self.cold + weight * other.cold, self.points + weight * other.points)
+
+
+def stencil_lines(box, globalmesh, histoslots, zend=None, seed=HISTOGRAM_SEED):
+    """Line numbers of the requests of one subdomain sweep, and the z offset of the point each belongs to.
+
+    The histogram slots come from NumPy's generator rather than the XORShift stream of the SST run; only their spread
+    over the slots matters here.
+    """
+    import numpy as np
+    xb, xe, yb, ye, zb, ze = box
+    if zend is not None:
+        ze = min(ze, zend)
+    mx = my = globalmesh
+    zs, ys, xs = np.meshgrid(np.arange(zb, ze + 1), np.arange(yb, ye + 1), np.arange(xb, xe + 1), indexing="ij")
+    point = (zs * (mx * my) + ys * mx + xs).ravel().astype(np.int64)
+    offsets = np.array([0, 1, -1, mx, -mx, mx * my, -mx * my], dtype=np.int64)
+    mesh = (histoslots * 8 + 8 * (point[:, None] + offsets[None, :])) >> LINE_SHIFT
+    slots = np.random.RandomState(seed).randint(0, histoslots, size=len(point)).astype(np.int64)
+    histo = (slots * 8) >> LINE_SHIFT
+    lines = np.concatenate([mesh, histo[:, None]], axis=1).ravel()
+    plane = np.repeat((zs - zb).ravel(), len(offsets) + 1)
+    return lines, plane
+
+
+def box_histogram(box, globalmesh, histoslots, exact=False):
+    """Reuse histogram of one subdomain, extrapolated from its first planes unless exact."""
+    import numpy as np
+    xb, xe, yb, ye, zb, ze = box
+    depth = ze - zb + 1
+    plane_points = (xe - xb + 1) * (ye - yb + 1)
+    # Planes repeat with the period of their line alignment
+    period = 8 // _gcd(globalmesh * globalmesh, 8)
+    sample = max(SAMPLE_PLANES, period + 3)
+    if exact or depth <= sample:
+        lines, _ = stencil_lines(box, globalmesh, histoslots)
+        return ReuseHistogram.from_distances(reuse_distances(lines), depth * plane_points)
+    lines, plane = stencil_lines(box, globalmesh, histoslots, zend=zb + sample - 1)
+    dist = reuse_distances(lines)
+    # Every sampled plane counts once, and the steady-state planes before the last (which, like the real last plane,
+    # reads a z+1 plane nobody has touched) stand in for the unsampled depth
+    weights = np.ones(sample)
+    weights[sample - 1 - period:sample - 1] += (depth - sample) / float(period)
+    return ReuseHistogram.from_distances(dist, depth * plane_points, weights[plane])
+
+
+def _gcd(a, b):
+    while b:
+        a, b = b, a % b
+    return a
+
+
+def thread_boxes(box, smt):
+    """Subdomains of the generators of one core, split as scc-sst-node.py does by default for SMT."""
+    if not smt:
+        return [box]
+    return [tbox[:6] for tbox in smtsplit.thread_boxes(box, "balanced")]
+
+
+def _alignment_key(box, globalmesh):
+    # Same shape and same line offset of the first point: every row and plane then has the same alignment too
+    xb, xe, yb, ye, zb, ze = box
+    return (xe - xb, ye - yb, ze - zb, (zb * globalmesh * globalmesh + yb * globalmesh + xb) % 8)
+
+
+def workload_histogram(corecount, smt, globalmesh, histoslots, exact=False):
+    """Summed reuse histogram of all generators, computing each distinct subdomain shape once."""
+    boxes = [tb for box in meshpart.decompose(corecount, globalmesh) for tb in thread_boxes(box, smt)]
+    groups = collections.OrderedDict()
+    for box in boxes:
+        groups.setdefault(_alignment_key(box, globalmesh), []).append(box)
+    total = None
+    for members in groups.values():
+        hist = box_histogram(members[0], globalmesh, histoslots, exact)
+        total = hist if total is None else total.add(hist, 1.0)
+        if len(members) > 1:
+            total = total.add(hist, len(members) - 1.0)
+    return total, len(groups)
+
+
+def trace_histogram(path):
+    import numpy as np
+    import tracefile
+    recs = tracefile.records(path)
+    lines = np.asarray(recs["addr"] >> LINE_SHIFT).astype(np.int64)
+    header = tracefile.read_header(path)
+    points = ((header["endx"] - header["beginx"] + 1) * (header["endy"] - header["beginy"] + 1) *
+              (header["endz"] - header["beginz"] + 1))
+    return ReuseHistogram.from_distances(reuse_distances(lines), points)
+
+
+def geometry(attr, sharers=1):
+    """(sets, ways, policy) of a cache, counting all slices when it is shared."""
+    ways = int(attr["associativity"])
+    sets = max(1, catalog.parse_size(attr["cache_size"]) // (ways * catalog.LINE_SIZE)) * sharers
+    return sets, ways, attr["replacement_policy"]
+
+
+def lru_hit(dist, sets, ways):
+    """P(fewer than `ways` of dist other lines map to the line's set)."""
+    import numpy as np
+    d = np.asarray(dist, dtype=np.float64)
+    if sets == 1:
+        return (d < ways).astype(np.float64)
+    p = 1.0 / sets
+    pmf = np.exp(d * np.log1p(-p))
+    total = pmf.copy()
+    for k in range(ways - 1):
+        pmf = pmf * np.maximum(d - k, 0) / (k + 1) * p / (1 - p)
+        total += pmf
+    return np.minimum(total, 1.0)
+
+
+def nmru_hit(dist, sets, ways, miss_rate):
+    """Survival of a line under random non-MRU eviction when a fraction miss_rate of the other accesses miss."""
+    import numpy as np
+    d = np.asarray(dist, dtype=np.float64)
+    if ways < 2:
+        return (d == 0).astype(np.float64)
+    return np.power(1.0 - miss_rate / (sets * (ways - 1.0)), d)
+
+
+class CacheModel:
+    """Hit rates of one L1/L2/L3 choice for a summed reuse histogram."""
+
+    def __init__(self, hist, levels):
+        # levels: [(name, attr, sharers, slices)], fastest first
+        import numpy as np
+        self.hist = hist
+        self.latencies = [int(attr["access_latency_cycles"]) for _, attr, _, _ in levels]
+        dist = np.arange(len(hist.counts), dtype=np.float64)
+        covered = np.zeros(len(dist))
+        self.hits = collections.OrderedDict()
+        for name, attr, sharers, slices in levels:
+            sets, ways, policy = geometry(attr, slices)
+            d = dist * sharers
+            if policy == "lru":
+                prob = np.maximum(covered, lru_hit(d, sets, ways))
+            else:
+                # Fills into the level per distinct line touched: its misses over the accesses that move to another
+                # line, so that a bigger cache above does not raise the eviction rate here
+                moves = hist.cold + hist.counts[1:].sum()
+                miss = 1.0
+                for _ in range(NMRU_ITERATIONS):
+                    prob = np.maximum(covered, nmru_hit(d, sets, ways, miss))
+                    miss = min(1.0, (hist.cold + np.dot(hist.counts, 1.0 - prob)) / moves) if moves else 1.0
+            self.hits[name] = float(np.dot(hist.counts, prob - covered))
+            covered = prob
+        self.memory = hist.accesses() - sum(self.hits.values())
+
+    def hit_rates(self):
+        """Local hit rate of each level: hits over the accesses that reach it."""
+        rates = collections.OrderedDict()
+        arriving = self.hist.accesses()
+        for name, hits in self.hits.items():
+            rates[name] = hits / arriving if arriving else 0.0
+            arriving -= hits
+        return rates
+
+    def memory_per_point(self):
+        """Lines fetched from memory per stencil point."""
+        return self.memory / self.hist.points
+
+    def mean_latency(self):
+        """Mean access latency in cycles: every level an access passes through adds its access latency."""
+        total = self.hist.accesses()
+        cycles = 0.0
+        arriving = total
+        for hits, latency in zip(self.hits.values(), self.latencies):
+            cycles += arriving * latency
+            arriving -= hits
+        cycles += arriving * MEMORY_LATENCY_CYCLES
+        return cycles / total if total else 0.0
+
+
+def cache_levels(cat, cfg, scale=1.0):
+    corecount = int(cfg["corecount"])
+    threads = 2 if cfg["smt"] == "yes" else 1
+    attr = dict((name, catalog.scaled_cache(catalog.attributes(cat, name, cfg[name]), scale))
+                for name in ["l1size", "l2size", "l3size"])
+    shared_l2 = cfg["l2type"] == "shared"
+    return [("L1", attr["l1size"], threads, 1),
+            ("L2", attr["l2size"], threads * (corecount if shared_l2 else 1), corecount if shared_l2 else 1),
+            ("L3", attr["l3size"], threads * corecount, corecount)]
+
+
+def analyze(cat, corecount, smt, scale=1.0, exact=False, hist=None):
+    """{cache option values: CacheModel} for one core count and SMT choice."""
+    globalmesh = catalog.scaled_globalmesh(cat["workload"]["globalmesh"], scale)
+    if hist is None:
+        hist, _ = workload_histogram(corecount, smt == "yes", globalmesh, cat["workload"]["histoslots"], exact)
+    models = collections.OrderedDict()
+    for values in itertools.product(*[catalog.option(cat, name)["values"] for name in CACHE_OPTIONS]):
+        cfg = dict(zip(CACHE_OPTIONS, values), corecount=str(corecount), smt=smt)
+        models[values] = CacheModel(hist, cache_levels(cat, cfg, scale))
+    return models
+
+
+def _gain(base, model):
+    # Relative improvement in memory traffic or mean latency, whichever is larger
+    gains = [(base.memory - model.memory) / base.memory if base.memory > 0 else 0.0,
+             (base.mean_latency() - model.mean_latency()) / base.mean_latency()]
+    return max(gains)
+
+
+def prune(cat, models, threshold=PRUNE_THRESHOLD):
+    """Cache option values that never cut memory traffic or mean latency by threshold over the first value.
+
+    Returns [(option, value, best relative reduction)] for the values that can be dropped from a sweep.
+    """
+    hopeless = []
+    for i, name in enumerate(CACHE_OPTIONS):
+        values = catalog.option(cat, name)["values"]
+        for value in values[1:]:
+            best = -float("inf")
+            for key, model in models.items():
+                if key[i] != value:
+                    continue
+                best = max(best, _gain(models[key[:i] + (values[0],) + key[i + 1:]], model))
+            if best < threshold:
+                hopeless.append((name, value, best))
+    return hopeless
+
+
+def report(cat, corecount, smt, scale, exact, table, threshold, hist=None):
+    start = time.time()
+    if hist is None:
+        globalmesh = catalog.scaled_globalmesh(cat["workload"]["globalmesh"], scale)
+        hist, shapes = workload_histogram(corecount, smt == "yes", globalmesh, cat["workload"]["histoslots"], exact)
+        source = "%d subdomain shapes" % shapes
+    else:
+        source = "recorded trace"
+    models = analyze(cat, corecount, smt, scale, exact, hist)
+    elapsed = time.time() - start
+    print("%d cores, smt %s: %.3g accesses, %.2f per point cold, %s (%.2f s)" %
+          (corecount, smt, hist.accesses(), hist.cold / hist.points, source, elapsed))
+    if table:
+        print("  %-6s %-6s %-8s %-6s %7s %7s %7s %10s %8s" % ("l1", "l2", "l2type", "l3", "L1 hit", "L2 hit", "L3 hit",
+                                                              "mem/point", "latency"))
+        for key, model in models.items():
+            rates = model.hit_rates()
+            print("  %-6s %-6s %-8s %-6s %6.2f%% %6.2f%% %6.2f%% %10.4f %8.3f" %
+                  (key + tuple(100.0 * r for r in rates.values()) + (model.memory_per_point(), model.mean_latency())))
+    hopeless = prune(cat, models, threshold)
+    for name, value, best in hopeless:
+        print("  prune %s=%s: cuts memory traffic or latency by at most %.2f%%" % (name, value, 100.0 * best))
+    if not hopeless:
+        print("  every cache option cuts memory traffic or latency by %.1f%% or more somewhere" % (100.0 * threshold))
+    return models, hopeless
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Reuse-distance estimate of cache hit rates for each cache option")
+    parser.add_argument("-n", "--corecount", type=int, action="append", help="Core count (repeatable, default: catalog)")
+    parser.add_argument("-t", "--smt", choices=["no", "yes"], action="append", help="SMT (repeatable, default: both)")
+    parser.add_argument("--scale", type=float, default=1.0, help="Problem and cache scale, default: %(default)s")
+    parser.add_argument("--exact", action="store_true", help="Generate every plane instead of extrapolating")
+    parser.add_argument("--table", action="store_true", help="Print the hit rates of every cache option")
+    parser.add_argument("--threshold", type=float, default=PRUNE_THRESHOLD,
+                        help="Prune option values that cut memory traffic and latency by less than this, default: %(default)s")
+    parser.add_argument("--trace", nargs="+", help="Analyze recorded traces instead (one generator each)")
+    parser.add_argument("--json", help="Write the hit rates and prune list to this file")
+    args = parser.parse_args(argv)
+
+    cat = catalog.load()
+    corecounts = args.corecount or [int(v) for v in catalog.option(cat, "corecount")["values"]]
+    smts = args.smt or ["no", "yes"]
+    out = []
+    start = time.time()
+    if args.trace:
+        for path in args.trace:
+            hist = trace_histogram(path)
+            print(path)
+            models, hopeless = report(cat, corecounts[0], "no", args.scale, args.exact, args.table, args.threshold, hist)
+            out.append((path, corecounts[0], "no", models, hopeless))
+    else:
+        for corecount in corecounts:
+            for smt in smts:
+                models, hopeless = report(cat, corecount, smt, args.scale, args.exact, args.table, args.threshold)
+                out.append((None, corecount, smt, models, hopeless))
+    print("Analyzed %d workload(s) in %.2f s" % (len(out), time.time() - start))
+
+    if args.json:
+        doc = []
+        for path, corecount, smt, models, hopeless in out:
+            doc.append({
+                "trace" : path, "corecount" : corecount, "smt" : smt, "scale" : args.scale,
+                "caches" : [dict(zip(CACHE_OPTIONS, key), hit_rates=model.hit_rates(),
+                                 memory_per_point=model.memory_per_point(), mean_latency=model.mean_latency())
+                            for key, model in models.items()],
+                "prune" : [{"option" : name, "value" : value, "best_reduction" : best}
+                           for name, value, best in hopeless],
+            })
+        with open(args.json, "w") as f:
+            json.dump(doc, f, indent=1)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,175 @@
+############################################################################################################################
+# Calibration of scaled screening runs
+#
+# "--scale s" shrinks the global mesh by s along each dimension and the cache capacities by s**2 (catalog.py), so a
+# screening run does about s**3 of the work with similar per-core working-set to cache ratios. The simulated time of a
+# scaled run is mapped to the full-size time with a log-linear fit over configurations simulated at both sizes:
+#
+#   log(full time) = a + b * log(scaled time)
+#
+# The error bar is the 1-sigma prediction interval of the fit (residual scatter plus the uncertainty of a and b), shown
+# as a relative error. Three or more pairs are needed; "pairs" picks configurations to run at full size that span the
+# range of scaled times.
+#
+#   python sweep.py --scale 0.5                                  # screen everything at half size
+#   python calibrate.py pairs --scale 0.5 -k 5 > pairs.txt
+#   python sweep.py --configs pairs.txt                          # the same configurations at full size
+#   python calibrate.py fit --scale 0.5
+#   python calibrate.py report --scale 0.5 --top 20              # shortlist by predicted full-size time x cost
+############################################################################################################################
+from __future__ import print_function, division
+
+import argparse
+import math
+import sys
+
+import catalog
+import resultstore
+
+
+def run_scale(store, options):
+    """Scale of a stored run (1.0 for full size) and its options with the --scale token removed."""
+    cfg, extra = resultstore.split_options(store.cat, options)
+    scale = float(resultstore.extra_options(extra).get("--scale", 1.0))
+    rest = [t for t in extra if not t.startswith("--scale=")]
+    return scale, " ".join([catalog.model_options(store.cat, cfg)] + rest)
+
+
+def runs_by_scale(store):
+    """{scale: {options without --scale: result}} for every successful current run."""
+    runs = {}
+    for rec in store.results():
+        scale, key = run_scale(store, rec["options"])
+        runs.setdefault(scale, {})[key] = rec
+    return runs
+
+
+def default_scale(runs):
+    scaled = [s for s in runs if s != 1.0]
+    if not scaled:
+        return None
+    return max(scaled, key=lambda s: len(runs[s]))
+
+
+def pairs(runs, scale):
+    """(options, scaled time, full time) in picoseconds for configurations run at both sizes."""
+    full = runs.get(1.0, {})
+    return [(key, rec["simulated_time_ps"], full[key]["simulated_time_ps"])
+            for key, rec in sorted(runs.get(scale, {}).items()) if key in full]
+
+
+class Calibration:
+    """Least-squares fit of log(full time) against log(scaled time)."""
+
+    def __init__(self, pairs):
+        if len(pairs) < 3:
+            raise ValueError("need at least 3 configurations run at both sizes, have %d" % len(pairs))
+        self.n = len(pairs)
+        xs = [math.log(p[1]) for p in pairs]
+        ys = [math.log(p[2]) for p in pairs]
+        self.xbar = sum(xs) / self.n
+        ybar = sum(ys) / self.n
+        self.sxx = sum((x - self.xbar) ** 2 for x in xs)
+        if self.sxx > 0:
+            self.b = sum((x - self.xbar) * (y - ybar) for x, y in zip(xs, ys)) / self.sxx
+        else:
+            self.b = 1.0
+        self.a = ybar - self.b * self.xbar
+        residuals = [y - self.a - self.b * x for x, y in zip(xs, ys)]
+        self.sigma = math.sqrt(sum(r * r for r in residuals) / (self.n - 2)) if self.n > 2 else 0.0
+        self.pairs = pairs
+
+    def predict(self, scaled_ps):
+        """(full-size time in ps, 1-sigma relative error)."""
+        x = math.log(scaled_ps)
+        leverage = 1.0 / self.n + ((x - self.xbar) ** 2 / self.sxx if self.sxx > 0 else 0.0)
+        se = self.sigma * math.sqrt(1.0 + leverage)
+        return math.exp(self.a + self.b * x), math.exp(se) - 1.0
+
+    def leave_one_out(self):
+        """Relative error of predicting each pair from a fit to the others (needs 4 or more pairs)."""
+        errors = []
+        for i, (key, scaled_ps, full_ps) in enumerate(self.pairs):
+            fit = Calibration(self.pairs[:i] + self.pairs[i + 1:])
+            errors.append((key, fit.predict(scaled_ps)[0] / full_ps - 1.0))
+        return errors
+
+
+def suggest_pairs(runs, scale, k):
+    """Scaled configurations to run at full size: spread evenly over the range of scaled times."""
+    full = runs.get(1.0, {})
+    candidates = sorted((rec["simulated_time_ps"], key) for key, rec in runs.get(scale, {}).items() if key not in full)
+    if len(candidates) <= k:
+        return [key for _, key in candidates]
+    picks = []
+    for i in range(k):
+        picks.append(candidates[int(round(i * (len(candidates) - 1) / (k - 1.0))) if k > 1 else 0][1])
+    return picks
+
+
+def format_time(ps):
+    return "%.4f us" % (ps / 1e6)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Map scaled simulated times to full-size times")
+    parser.add_argument("--db", default=resultstore.DEFAULT_DB, help="Result store, default: %(default)s")
+    sub = parser.add_subparsers(dest="command")
+    for name, text in [("fit", "Fit and validate the calibration"),
+                       ("report", "Predicted full-size time of every scaled run, best performance per cost first"),
+                       ("pairs", "Configurations to run at full size for the calibration")]:
+        cmd = sub.add_parser(name, help=text)
+        cmd.add_argument("--scale", type=float, help="Scale to calibrate (default: the most common one)")
+        if name == "report":
+            cmd.add_argument("--top", type=int, help="Only show the best N")
+        if name == "pairs":
+            cmd.add_argument("-k", type=int, default=5, help="Number of configurations, default: %(default)s")
+    args = parser.parse_args(argv)
+    if args.command is None:
+        parser.print_help()
+        return 1
+
+    store = resultstore.ResultStore(args.db)
+    runs = runs_by_scale(store)
+    scale = args.scale if args.scale is not None else default_scale(runs)
+    if scale is None or not runs.get(scale):
+        print("No scaled results in the store; run 'sweep.py --scale 0.5' first")
+        return 1
+
+    if args.command == "pairs":
+        for key in suggest_pairs(runs, scale, args.k):
+            print(key)
+        return 0
+
+    try:
+        calib = Calibration(pairs(runs, scale))
+    except ValueError as e:
+        print("Cannot calibrate scale %g: %s; use 'pairs' to choose full-size runs" % (scale, e))
+        return 1
+
+    if args.command == "fit":
+        print("Scale %g: log(full) = %.4f + %.4f * log(scaled) from %d pairs, residual sigma %.2f%%" %
+              (scale, calib.a, calib.b, calib.n, 100.0 * (math.exp(calib.sigma) - 1)))
+        if calib.n >= 4:
+            errors = calib.leave_one_out()
+            for key, err in errors:
+                print("  %-90s leave-one-out error %+6.2f%%" % (key, 100.0 * err))
+            print("Leave-one-out RMS error %.2f%%" % (100.0 * math.sqrt(sum(e * e for _, e in errors) / len(errors))))
+    elif args.command == "report":
+        full = runs.get(1.0, {})
+        rows = []
+        for key, rec in runs[scale].items():
+            predicted, err = calib.predict(rec["simulated_time_ps"])
+            rows.append((predicted * rec["cost"], key, rec["cost"], predicted, err, full.get(key)))
+        rows.sort()
+        print("Scale %g, %d pairs; predicted full-size time with 1-sigma error" % (scale, calib.n))
+        for _, key, cost, predicted, err, measured in rows[:args.top]:
+            print("%-90s %6g  %s +/- %4.1f%%%s" % (key, cost, format_time(predicted), 100.0 * err,
+                                                   "  (measured %s)" % format_time(measured["simulated_time_ps"])
+                                                   if measured else ""))
+    store.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
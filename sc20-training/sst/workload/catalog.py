@@ -0,0 +1,245 @@
+############################################################################################################################
+# Component catalog
+#
+# Loads catalog.json, the option table shared by scc-sst-node.py and the exploration tools: the model options and their
+# allowed values, the cost of each component, the attributes of each component choice and the workload size. The cost
+# of a configuration is
+#
+#   cost = memory_per_channel[memtype] * memchannels
+#        + corecount * (core[coretype] * (smt_multiplier if smt) + l1[l1size] + l2[l2type][l2size] + l3[l3size] + noc[noc])
+#
+# and a configuration is within budget when cost <= budget. enumerate_costs() evaluates the whole cartesian product of
+# the options at once with NumPy; the rest of this module is plain Python so that it can be imported by SST.
+# scaled_globalmesh() and scaled_cache() describe the smaller problems used for fast screening (see calibrate.py).
+#
+#   python catalog.py --budget 3000
+############################################################################################################################
+from __future__ import print_function, division
+
+import argparse
+import collections
+import itertools
+import json
+import os
+import sys
+import time
+
+CATALOG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "catalog.json")
+
+
+def _native(obj):
+    # Python 2's json returns unicode strings, which SST will not accept as parameter values
+    if sys.version_info[0] < 3:
+        if isinstance(obj, unicode):
+            return obj.encode("ascii")
+        if isinstance(obj, list):
+            return [_native(v) for v in obj]
+    return obj
+
+
+def _pairs(pairs):
+    return collections.OrderedDict((_native(k), _native(v)) for k, v in pairs)
+
+
+def load(path=CATALOG_PATH):
+    with open(path) as f:
+        return json.load(f, object_pairs_hook=_pairs)
+
+
+def option_names(cat):
+    return [opt["name"] for opt in cat["options"]]
+
+
+def option(cat, name):
+    for opt in cat["options"]:
+        if opt["name"] == name:
+            return opt
+    raise KeyError(name)
+
+
+def attributes(cat, name, value):
+    """Component attributes (cache geometry, clocks, DRAM timings...) for one option value."""
+    return cat["components"][name][value]
+
+
+SIZE_UNITS = {"B" : 1, "KiB" : 1024, "MiB" : 1024 ** 2, "GiB" : 1024 ** 3}
+LINE_SIZE = 64
+
+
+def parse_size(text):
+    """Bytes in a size string such as "16KiB" or "1536KiB"."""
+    for unit in sorted(SIZE_UNITS, key=len, reverse=True):
+        if text.endswith(unit):
+            return int(float(text[:-len(unit)]) * SIZE_UNITS[unit])
+    raise ValueError("bad size " + text)
+
+
+def scaled_globalmesh(globalmesh, scale):
+    """Global mesh of a scaled problem: the interior shrinks by scale along each dimension."""
+    return int(round((globalmesh - 2) * scale)) + 2
+
+
+def scaled_cache(attr, scale):
+    """Cache attributes for a scaled problem.
+
+    The stencil sweeps z-planes and reuses three of them, so the per-core working set scales with the plane area,
+    scale**2. The capacity is scaled by the same factor and rounded to a whole number of sets.
+    """
+    if scale == 1:
+        return attr
+    ways = attr["associativity"]
+    sets = parse_size(attr["cache_size"]) * scale ** 2 / (ways * LINE_SIZE)
+    sets = max(1, int(round(sets)))
+    scaled = collections.OrderedDict(attr)
+    scaled["cache_size"] = "%dB" % (sets * ways * LINE_SIZE)
+    return scaled
+
+
+def check_config(cat, cfg):
+    """Return an error message for the first option with a value not in the catalog, or None."""
+    for opt in cat["options"]:
+        if str(cfg.get(opt["name"])) not in opt["values"]:
+            return "Error: bad " + opt["name"]
+    return None
+
+
+def config_cost(cat, cfg):
+    cost = cat["cost"]
+    per_core_cost = cost["core"][cfg["coretype"]]
+    if cfg["smt"] == "yes":
+        per_core_cost = per_core_cost * cost["smt_multiplier"]
+    per_core_cost = per_core_cost + cost["l1"][cfg["l1size"]]
+    per_core_cost = per_core_cost + cost["l2"][cfg["l2type"]][cfg["l2size"]]
+    per_core_cost = per_core_cost + cost["l3"][cfg["l3size"]]
+    per_core_cost = per_core_cost + cost["noc"][cfg["noc"]]
+    memory_cost = cost["memory_per_channel"][cfg["memtype"]] * int(cfg["memchannels"])
+    return memory_cost + per_core_cost * int(cfg["corecount"])
+
+
+class CostSpace:
+    """Cost of every point of the option space, laid out as a flat array in itertools.product order."""
+
+    def __init__(self, cat, names, values, cost):
+        self.cat = cat
+        self.names = names
+        self.values = values
+        self.shape = tuple(len(v) for v in values)
+        self.cost = cost
+
+    def __len__(self):
+        return len(self.cost)
+
+    def config(self, flat_index):
+        import numpy as np
+        idx = np.unravel_index(flat_index, self.shape)
+        return collections.OrderedDict((n, v[i]) for n, v, i in zip(self.names, self.values, idx))
+
+    def within(self, budget=None):
+        """Flat indices of the in-budget points."""
+        import numpy as np
+        if budget is None:
+            budget = self.cat["budget"]
+        return np.flatnonzero(self.cost <= budget)
+
+    def configs(self, budget=None):
+        import numpy as np
+        idx = np.unravel_index(self.within(budget), self.shape)
+        return [collections.OrderedDict((n, v[i]) for n, v, i in zip(self.names, self.values, point))
+                for point in zip(*idx)]
+
+
+def enumerate_costs(cat):
+    """Vectorized cost of the whole cartesian product of the catalog options."""
+    import numpy as np
+
+    names = option_names(cat)
+    values = [option(cat, name)["values"] for name in names]
+    ndim = len(names)
+
+    def axis(name, table):
+        # Per-value table broadcast along the option's own axis
+        shape = [1] * ndim
+        shape[names.index(name)] = -1
+        return np.array([table(v) for v in option(cat, name)["values"]], dtype=np.float64).reshape(shape)
+
+    cost = cat["cost"]
+    smt = axis("smt", lambda v: cost["smt_multiplier"] if v == "yes" else 1.0)
+    # Keep the operation order of config_cost() so both give bit-identical results
+    per_core = axis("coretype", lambda v: cost["core"][v]) * smt
+    per_core = per_core + axis("l1size", lambda v: cost["l1"][v])
+    l2 = np.array([[cost["l2"][t][s] for t in option(cat, "l2type")["values"]]
+                   for s in option(cat, "l2size")["values"]], dtype=np.float64)
+    shape = [1] * ndim
+    shape[names.index("l2size")] = l2.shape[0]
+    shape[names.index("l2type")] = l2.shape[1]
+    if names.index("l2size") > names.index("l2type"):
+        l2 = l2.T
+    per_core = per_core + l2.reshape(shape)
+    per_core = per_core + axis("l3size", lambda v: cost["l3"][v])
+    per_core = per_core + axis("noc", lambda v: cost["noc"][v])
+    memory = axis("memtype", lambda v: cost["memory_per_channel"][v]) * axis("memchannels", int)
+    total = memory + per_core * axis("corecount", int)
+    total = np.broadcast_to(total, tuple(len(v) for v in values))
+    return CostSpace(cat, names, values, np.ascontiguousarray(total).ravel())
+
+
+def enumerate_configs(cat, budget=None):
+    """All in-budget configurations, using NumPy when it is available."""
+    if budget is None:
+        budget = cat["budget"]
+    try:
+        import numpy
+    except ImportError:
+        names = option_names(cat)
+        configs = []
+        for values in itertools.product(*[option(cat, name)["values"] for name in names]):
+            cfg = collections.OrderedDict(zip(names, values))
+            if config_cost(cat, cfg) <= budget:
+                configs.append(cfg)
+        return configs
+    return enumerate_costs(cat).configs(budget)
+
+
+def model_options(cat, cfg):
+    """Canonical --model-options string for a configuration."""
+    return " ".join("%s=%s" % (opt["flag"], cfg[opt["name"]]) for opt in cat["options"])
+
+
+def parse_model_options(cat, options):
+    """Inverse of model_options(); accepts short or long flags, unspecified options take their defaults."""
+    cfg = collections.OrderedDict((opt["name"], opt["default"]) for opt in cat["options"])
+    flags = {}
+    for opt in cat["options"]:
+        flags[opt["flag"]] = opt["name"]
+        flags["--" + opt["name"]] = opt["name"]
+    for token in options.split():
+        flag, _, value = token.partition("=")
+        if flag not in flags:
+            raise ValueError("unknown option " + flag)
+        cfg[flags[flag]] = value
+    return cfg
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Screen the option space against a budget")
+    parser.add_argument("--budget", type=float, help="Cost limit (default: catalog budget)")
+    parser.add_argument("--list", action="store_true", help="Print every in-budget configuration and its cost")
+    args = parser.parse_args(argv)
+
+    import numpy
+
+    cat = load()
+    budget = args.budget if args.budget is not None else cat["budget"]
+    start = time.time()
+    space = enumerate_costs(cat)
+    within = space.within(budget)
+    elapsed = time.time() - start
+    print("%d of %d configurations within budget %g (%.2f ms)" % (len(within), len(space), budget, elapsed * 1e3))
+    if args.list:
+        for i in within:
+            print("%-90s %g" % (model_options(cat, space.config(i)), space.cost[i]))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
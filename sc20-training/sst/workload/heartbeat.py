@@ -0,0 +1,123 @@
+############################################################################################################################
+# Progress heartbeats and per-core completion of scc-sst-node.py runs
+#
+# With --heartbeat=SECONDS (or SC19_HEARTBEAT, which sweep.py sets) the generators of each SST process add up the mesh
+# points they have handed out, and every SECONDS of wall-clock time one of them prints the progress of all of them:
+#
+#   SC19 heartbeat: 41.20% points 68608 of 166530 simulated 20308500 ps wall 61.3 s eta 87.5 s
+#
+# The ETA extrapolates the rate so far (wall-clock time from the first point, not counting the graph build); a last
+# heartbeat at 100% follows the process's last point. Sampled runs count the planes they skip as done, converging runs
+# the iterations they no longer run. With several SST ranks each prints its own heartbeats. Every generator also prints
+# the simulated time it handed out its last point, so the core that finishes last and sets the simulated time shows
+# without statistics; with --stats the same time is the completion_time statistic of each generator, next to its
+# points, read and write requests, blocked_time (the time its core's queue was too full to take more points) and
+# queue_depth.
+#
+# sweep.py reads the last heartbeat of every running job: the projected wall time replaces the estimate the scheduler
+# packs jobs by, and --max-wall stops runs projected to take longer.
+#
+#   python heartbeat.py sweep-out/runs/*                   # progress and ETA of each run
+#   python heartbeat.py sweep-out/runs/<run> --cores 10    # the ten generators that finish last
+############################################################################################################################
+from __future__ import print_function, division
+
+import argparse
+import os
+import re
+import sys
+
+HEARTBEAT_RE = re.compile(r"^SC19 heartbeat: ([0-9.]+)% points (\d+) of (\d+) simulated (\d+) ps wall ([0-9.]+) s "
+                          r"eta ([0-9.]+) s\s*$", re.M)
+FINISHED_RE = re.compile(r"^SC19 finished: (\S+) (\d+) ps\s*$", re.M)
+# Bytes of the end of a log searched for the last heartbeat
+TAIL = 65536
+
+
+def parse_log(text):
+    """Heartbeats of a run's output in order, as dicts with fraction (0..1), points, total, simulated_ps, wall_s and
+    eta_s."""
+    return [{
+        "fraction" : float(m.group(1)) / 100.0,
+        "points" : int(m.group(2)),
+        "total" : int(m.group(3)),
+        "simulated_ps" : int(m.group(4)),
+        "wall_s" : float(m.group(5)),
+        "eta_s" : float(m.group(6)),
+    } for m in HEARTBEAT_RE.finditer(text)]
+
+
+def latest(path):
+    """The last heartbeat in the end of a log file, or None (no heartbeat yet or no file)."""
+    try:
+        with open(path, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            f.seek(max(0, f.tell() - TAIL))
+            text = f.read().decode("utf-8", "replace")
+    except IOError:
+        return None
+    beats = parse_log(text)
+    return beats[-1] if beats else None
+
+
+def projected_simulated_ps(beat):
+    """Simulated time at completion if the rest of the points go at the simulated rate so far (None before any)."""
+    return beat["simulated_ps"] / beat["fraction"] if beat["fraction"] > 0 else None
+
+
+def finish_times(text):
+    """{generator : simulated ps of its last point} from a run's output."""
+    return dict((m.group(1), int(m.group(2))) for m in FINISHED_RE.finditer(text))
+
+
+def stats_finish_times(path):
+    """{component : completion_time in ps} from a run's statistics (--stats), or {} without them."""
+    import statsload
+    if statsload.find_stats(path) is None:
+        return {}
+    cols = statsload.load_arrays(path)
+    return dict((name, value) for name, stat, value in zip(cols["ComponentName"], cols["StatisticName"], cols["Max"])
+                if stat == "completion_time")
+
+
+def report(path, cores):
+    log = os.path.join(path, "sst.log") if os.path.isdir(path) else path
+    beat = latest(log)
+    if beat is None:
+        print("%s: no heartbeat (run with --heartbeat=SECONDS)" % path)
+    else:
+        final = projected_simulated_ps(beat)
+        print("%s: %6.2f%% of %d points, %.4f us simulated, %.1f s wall, ETA %.1f s, projected %s us" % (
+            path, 100.0 * beat["fraction"], beat["total"], beat["simulated_ps"] / 1e6, beat["wall_s"], beat["eta_s"],
+            "-" if final is None else "%.4f" % (final / 1e6)))
+    if not cores:
+        return
+    try:
+        with open(log) as f:
+            times = finish_times(f.read())
+    except IOError:
+        times = {}
+    if not times and os.path.isdir(path):
+        times = stats_finish_times(path)
+    if not times:
+        print("  no generator has finished")
+        return
+    ordered = sorted(times.items(), key=lambda item: item[1], reverse=True)
+    median = sorted(times.values())[len(times) // 2]
+    for name, ps in ordered[:cores]:
+        print("  %-28s %14.4f us  %+7.2f%% over the median" % (name, ps / 1e6, 100.0 * (ps / median - 1)))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Progress, ETA and per-core completion of runs")
+    parser.add_argument("path", nargs="+", help="Run directory or SST output")
+    parser.add_argument("--cores", type=int, default=0, metavar="N",
+                        help="Also list the N generators that finish last")
+    args = parser.parse_args(argv)
+    for path in args.path:
+        report(path, args.cores)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
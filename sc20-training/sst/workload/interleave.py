@@ -0,0 +1,213 @@
+############################################################################################################################
+# Address interleaving over memory channels and L3 slices
+#
+# The directories and memory controllers each own an address region that interleaves INTERLEAVE bytes at a time over
+# the channels, and the L3 slices split the addresses the same way over the cores. The original model interleaves
+# both at line granularity (64B), so channel and slice follow from the line number modulo their count. --interleave
+# picks another scheme, written CHANNEL[/SLICE][:xor]:
+#
+#   CHANNEL  bytes per channel before the next one (64B, 256B, 1KiB, 4KiB, any power of two from a line up)
+#   SLICE    bytes per L3 slice, default: the channel granularity. memHierarchy splits slices by line with
+#            num_cache_slices/slice_id; other granularities give each slice an explicit region like the directories
+#   xor      hash the addresses: the generator (sc19gen.cc, hash_shift/hash_bits) XOR-folds the higher bits of every
+#            address into the bits that select channel and slice, a bijection within each block of hash_bits units,
+#            the way hashed physical address mappings break up power-of-two and plane-sized strides
+#
+# memHierarchy has no hashed address regions, so the hash is applied where the addresses are made; the caches then
+# index their sets with the hashed addresses too, as they would with a hashed physical mapping.
+#
+# The analyzer regenerates the first planes of every core's sweep (cacheanalyzer.stencil_lines), keeps the first touch
+# of each line (the compulsory misses, which is what reaches the L3 and memory once the planes stream through the
+# caches) and counts them per channel and slice, over the whole stream and in windows of equal progress of all the
+# cores. A hotspot shows as the windowed imbalance (busiest channel or slice over the mean) even when the totals are
+# balanced:
+#
+#   python interleave.py -n 22 -m 6                       # every default scheme
+#   python interleave.py -n 40 --scheme 64B --scheme 1KiB/64B:xor -v
+############################################################################################################################
+from __future__ import print_function, division
+
+import argparse
+import re
+import sys
+
+LINE = 64
+HASHES = ["none", "xor"]
+DEFAULT = "64B"
+DEFAULT_SCHEMES = ["64B", "64B:xor", "256B/64B", "256B/64B:xor", "1KiB/64B", "1KiB/64B:xor", "4KiB/64B",
+                   "4KiB/64B:xor", "256B", "256B:xor"]
+PLANES = 8
+WINDOWS = 64
+
+SIZE_RE = re.compile(r"^(\d+)(B|KiB|KB|K)$")
+UNITS = {"B" : 1, "KiB" : 1024, "KB" : 1024, "K" : 1024}
+
+
+def parse_size(text):
+    """Bytes of a granularity such as 256B or 1KiB; ValueError unless a power of two of at least a line."""
+    match = SIZE_RE.match(text)
+    if not match:
+        raise ValueError("bad interleave size " + text)
+    size = int(match.group(1)) * UNITS[match.group(2)]
+    if size < LINE or size & (size - 1):
+        raise ValueError("interleave size %s is not a power of two of at least %dB" % (text, LINE))
+    return size
+
+
+def parse(spec):
+    """(channel bytes, slice bytes, hash) of a scheme "CHANNEL[/SLICE][:xor]"; ValueError if malformed."""
+    sizes, _, hashing = str(spec).partition(":")
+    channel, _, slice_size = sizes.partition("/")
+    if hashing and hashing not in HASHES:
+        raise ValueError("bad interleave hash " + hashing)
+    channel = parse_size(channel)
+    return channel, parse_size(slice_size) if slice_size else channel, hashing or "none"
+
+
+def describe(spec):
+    channel, slice_size, hashing = parse(spec)
+    return "channels every %dB, L3 slices every %dB%s" % (channel, slice_size, ", xor hash" if hashing == "xor" else "")
+
+
+def region(index, count, size, mem_size):
+    """Directory or memory controller parameters of the index-th of count regions interleaved size bytes at a time."""
+    return {
+        "interleave_size" : str(size) + "B",
+        "interleave_step" : str(count * size) + "B",
+        "addr_range_start" : index * size,
+        "addr_range_end" : mem_size - (count - index) * size + size - 1,
+    }
+
+
+def slice_params(index, count, size, mem_size):
+    """L3 parameters of slice index of count: memHierarchy's line slices, or an explicit region for coarser ones."""
+    if size == LINE:
+        return {"num_cache_slices" : count, "slice_id" : index}
+    return region(index, count, size, mem_size)
+
+
+def hash_params(spec, memchan, slices):
+    """Generator parameters of a scheme's address hash ({} without one). The hash works on units of the finer
+    granularity and folds into enough low bits to cover a whole round of channels and of slices."""
+    channel, slice_size, hashing = parse(spec)
+    if hashing == "none":
+        return {}
+    unit = min(channel, slice_size)
+    span = max(memchan * channel, slices * slice_size) // unit
+    return {"hash_shift" : unit.bit_length() - 1, "hash_bits" : (span - 1).bit_length()}
+
+
+def xor_hash(addr, shift, bits):
+    """The generator's address hash: the unit index (addr >> shift) gets the XOR of all its higher bits-wide chunks
+    in its low bits. Works on ints and NumPy int64 arrays."""
+    if not bits:
+        return addr
+    mask = (1 << bits) - 1
+    unit = addr >> shift
+    fold = unit >> bits
+    high = fold
+    while True:
+        high = high >> bits
+        if not _any(high):
+            break
+        fold = fold ^ high
+    return addr ^ ((fold & mask) << shift)
+
+
+def _any(value):
+    return value.any() if hasattr(value, "any") else value != 0
+
+
+def first_touches(box, globalmesh, histoslots, planes):
+    """Byte addresses of the lines one core touches in its first planes, in first-touch order, and the progress
+    (0..1) of the sweep at each."""
+    import numpy as np
+    import cacheanalyzer
+    lines, _ = cacheanalyzer.stencil_lines(box, globalmesh, histoslots, zend=box[4] + planes - 1)
+    unique, first = np.unique(lines, return_index=True)
+    order = np.argsort(first)
+    return unique[order] << cacheanalyzer.LINE_SHIFT, first[order] / float(len(lines))
+
+
+class Analysis:
+    """Per-channel and per-slice counts of a workload's first touches under one scheme."""
+
+    def __init__(self, streams, spec, memchan, slices, windows=WINDOWS):
+        import numpy as np
+        channel, slice_size, _ = parse(spec)
+        params = hash_params(spec, memchan, slices)
+        self.spec = spec
+        self.channels = np.zeros((windows, memchan))
+        self.slices = np.zeros((windows, slices))
+        for addrs, progress in streams:
+            addrs = xor_hash(addrs, params.get("hash_shift", 0), params.get("hash_bits", 0))
+            window = np.minimum((progress * windows).astype(np.int64), windows - 1)
+            np.add.at(self.channels, (window, (addrs // channel) % memchan), 1)
+            np.add.at(self.slices, (window, (addrs // slice_size) % slices), 1)
+
+    @staticmethod
+    def _imbalance(counts):
+        """(total imbalance, mean and worst windowed imbalance): busiest over mean, 1.0 is perfectly balanced."""
+        totals = counts.sum(axis=0)
+        busy = counts.sum(axis=1) > 0
+        windowed = counts[busy].max(axis=1) / counts[busy].mean(axis=1)
+        return totals.max() / totals.mean(), windowed.mean(), windowed.max()
+
+    def channel_imbalance(self):
+        return self._imbalance(self.channels)
+
+    def slice_imbalance(self):
+        return self._imbalance(self.slices)
+
+
+def workload_streams(corecount, globalmesh, histoslots, planes=PLANES):
+    import meshpart
+    return [first_touches(box, globalmesh, histoslots, min(planes, box[5] - box[4] + 1))
+            for box in meshpart.decompose(corecount, globalmesh)]
+
+
+def report(streams, corecount, memchan, schemes, planes, windows, verbose=False):
+    print("%d cores, %d channels, first %d planes: %d lines" % (corecount, memchan, planes,
+                                                               sum(len(a) for a, _ in streams)))
+    print("  %-16s %28s %28s" % ("scheme", "channels total/mean/worst", "slices total/mean/worst"))
+    for spec in schemes:
+        result = Analysis(streams, spec, memchan, corecount, windows)
+        print("  %-16s %28s %28s" % (spec, "%.3f / %.3f / %.3f" % result.channel_imbalance(),
+                                     "%.3f / %.3f / %.3f" % result.slice_imbalance()))
+        if verbose:
+            print("    channels: " + " ".join("%d" % c for c in result.channels.sum(axis=0)))
+            print("    slices:   " + " ".join("%d" % c for c in result.slices.sum(axis=0)))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Channel and L3 slice balance of address interleaving schemes")
+    parser.add_argument("-n", "--corecount", type=int, action="append", help="Core count (repeatable, default: catalog)")
+    parser.add_argument("-m", "--memchannels", type=int, action="append",
+                        help="Memory channels (repeatable, default: catalog)")
+    parser.add_argument("--scheme", action="append", help="CHANNEL[/SLICE][:xor] (repeatable, default: a range)")
+    parser.add_argument("--globalmesh", type=int, help="Global mesh size (default: catalog workload)")
+    parser.add_argument("--planes", type=int, default=PLANES, help="Planes of each subdomain, default: %(default)s")
+    parser.add_argument("--windows", type=int, default=WINDOWS, help="Progress windows, default: %(default)s")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Print the per-channel and per-slice counts")
+    args = parser.parse_args(argv)
+    schemes = args.scheme or DEFAULT_SCHEMES
+    try:
+        for spec in schemes:
+            parse(spec)
+    except ValueError as e:
+        parser.error(str(e))
+
+    import catalog
+    cat = catalog.load()
+    counts = args.corecount or [int(v) for v in catalog.option(cat, "corecount")["values"]]
+    channels = args.memchannels or [int(v) for v in catalog.option(cat, "memchannels")["values"]]
+    globalmesh = args.globalmesh or cat["workload"]["globalmesh"]
+    for corecount in counts:
+        streams = workload_streams(corecount, globalmesh, cat["workload"]["histoslots"], args.planes)
+        for memchan in channels:
+            report(streams, corecount, memchan, schemes, args.planes, args.windows, args.verbose)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,127 @@
+############################################################################################################################
+# Cold and steady-state time per iteration
+#
+# The catalog workload runs one stencil sweep from cold caches, and the histogram phase of the generator (every third
+# iteration) never runs. With --iterations=N the script runs up to N iterations, and with --converge=TOL every
+# generator stops once the time of its last phase cycle (two stencil sweeps and a histogram update) is within TOL of
+# the cycle before; the generators of a run stop together, once all of them have converged. They agree through
+# counters shared by the threads of one SST process, so --converge is rejected for runs over several MPI ranks. Each
+# generator prints the simulated time of every iteration at the end of the run.
+#
+# The cold time is that of the first iteration, a stencil sweep from cold caches (what the catalog workload measures);
+# the steady-state time per iteration is the mean of the last cycle, and its stencil sweeps alone compare like for
+# like with the cold sweep. A run of the production application spends almost all its time in the steady state, so
+# cache options should be ranked by it: project() gives the time of n iterations as the first cycle plus n - 3
+# steady-state iterations. For the run, each figure is that of the slowest generator.
+#
+#   python sweep.py --iterations 30 --converge 0.01                 # records the steady-state time per iteration
+#   python iterations.py sweep-out/runs/<run> --project 5000
+############################################################################################################################
+from __future__ import print_function, division
+
+import argparse
+import os
+import re
+import sys
+
+# Iterations of a phase cycle: two stencil sweeps and a histogram update (sc19gen.cc)
+PHASE_CYCLE = 3
+
+ITERATIONS_RE = re.compile(r"^SC19 iterations: (\S+) converged (yes|no) times((?: \d+)*)\s*$", re.M)
+
+
+def parse_log(text):
+    """{generator : (converged, [ps of each iteration])} from a run's output."""
+    return dict((m.group(1), (m.group(2) == "yes", [int(t) for t in m.group(3).split()]))
+                for m in ITERATIONS_RE.finditer(text))
+
+
+def steady(times):
+    """Steady-state ps per iteration: the mean of the last full phase cycle (None before the first one ends)."""
+    if len(times) < PHASE_CYCLE:
+        return None
+    end = len(times) - len(times) % PHASE_CYCLE
+    return sum(times[end - PHASE_CYCLE:end]) / PHASE_CYCLE
+
+
+def steady_sweep(times):
+    """Steady-state ps of a stencil sweep: the mean of the sweeps of the last full phase cycle (None before)."""
+    if len(times) < PHASE_CYCLE:
+        return None
+    end = len(times) - len(times) % PHASE_CYCLE
+    sweeps = [times[i] for i in range(end - PHASE_CYCLE, end) if i % PHASE_CYCLE != PHASE_CYCLE - 1]
+    return sum(sweeps) / len(sweeps)
+
+
+def project(times, n):
+    """ps for n iterations: the iterations of the first cycle as simulated, then steady-state iterations."""
+    rate = steady(times)
+    if rate is None:
+        return None
+    return sum(times[:PHASE_CYCLE]) + max(0, n - PHASE_CYCLE) * rate
+
+
+def summarize(iters, n=None):
+    """Run figures: {"cold_ps", "steady_ps", "steady_sweep_ps", "projected_ps" (with n), "iterations" (fewest),
+    "converged" (all), "generator" (slowest in the steady state)}, or None without iteration times."""
+    iters = dict((name, v) for name, v in iters.items() if v[1])
+    if not iters:
+        return None
+    rates = dict((name, steady(times)) for name, (_, times) in iters.items())
+    slowest = max(iters, key=lambda name: (rates[name] or 0, iters[name][1][0]))
+    result = {
+        "cold_ps" : max(times[0] for _, times in iters.values()),
+        "steady_ps" : None if None in rates.values() else max(rates.values()),
+        "steady_sweep_ps" : None if None in rates.values() else max(steady_sweep(t) for _, t in iters.values()),
+        "projected_ps" : None,
+        "iterations" : min(len(times) for _, times in iters.values()),
+        "converged" : all(done for done, _ in iters.values()),
+        "generator" : slowest,
+    }
+    if n is not None and result["steady_ps"] is not None:
+        result["projected_ps"] = max(project(times, n) for _, times in iters.values())
+    return result
+
+
+def format_time(result):
+    """Simulated time string of a multi-iteration run, as sweep.py records it."""
+    if result["steady_ps"] is None:
+        return "%.4f us/iteration cold" % (result["cold_ps"] / 1e6)
+    return "%.4f us/iteration steady%s, %.4f us cold" % (result["steady_ps"] / 1e6,
+                                                        "" if result["converged"] else " (not converged)",
+                                                        result["cold_ps"] / 1e6)
+
+
+def _us(value):
+    return "-" if value is None else "%.4f" % (value / 1e6)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cold and steady-state time per iteration of a run")
+    parser.add_argument("path", help="Run directory or SST output")
+    parser.add_argument("--project", type=int, metavar="N", help="Also project the time of N iterations")
+    args = parser.parse_args(argv)
+
+    path = os.path.join(args.path, "sst.log") if os.path.isdir(args.path) else args.path
+    with open(path) as f:
+        iters = parse_log(f.read())
+    result = summarize(iters, args.project)
+    if result is None:
+        print("No iteration times in %s (run with --iterations=N)" % path)
+        return 1
+    print("%-28s %10s %10s %14s %14s" % ("generator", "iterations", "converged", "cold us", "steady us"))
+    for name in sorted(iters):
+        done, times = iters[name]
+        print("%-28s %10d %10s %14s %14s" % (name, len(times), "yes" if done else "no", _us(times[0]),
+                                             _us(steady(times))))
+    print("Run: %s (slowest %s)" % (format_time(result), result["generator"]))
+    if result["steady_ps"] is not None:
+        print("Steady-state stencil sweep: %.4f us, %.1f%% of the cold one" % (
+            result["steady_sweep_ps"] / 1e6, 100.0 * result["steady_sweep_ps"] / result["cold_ps"]))
+    if result["projected_ps"] is not None:
+        print("Projected time of %d iterations: %.4f us" % (args.project, result["projected_ps"] / 1e6))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,248 @@
+############################################################################################################################
+# Memory controller placement
+#
+# Each memory channel (directory + memctrl) attaches to a free port on the edge of the mesh: north on the top row, south
+# on the bottom row, west and east on the side columns. Lines are interleaved over all channels, so every L3 slice
+# talks to every controller equally. place_controllers() picks one edge port per channel, on distinct routers, to
+# minimize
+#
+#   mean hops + WORST_WEIGHT * worst hops
+#
+# where mean is the average hop count between an L3 slice and a controller (including the hop onto the port) and worst
+# is the largest per-slice average, i.e. the memory latency of the worst-placed slice. Among the placements within SLACK
+# of the best score, the one with the least loaded mesh link wins, counting uniform slice <-> controller traffic with
+# dimension-order (X then Y) routing; this spreads the controllers over several sides instead of packing them where
+# the latency is lowest. The search is an exact branch and bound over router combinations and takes a fraction of a
+# second.
+#
+# The slices are at the stops the cores occupy, which placement.py chooses with the controllers in place, so
+# placement.place_cores() alternates the two placements until they agree; the report uses the stops it settles on.
+# Link load only breaks ties within SLACK, so a placement can load its busiest link more than the hand placement did
+# in exchange for fewer hops (40 cores and 6 channels); the report says when it does.
+#
+#   python mcplace.py                  # placement and rationale for every catalog core count and channel count
+#   python mcplace.py -n 40 -w 8
+############################################################################################################################
+from __future__ import print_function, division
+
+import argparse
+import sys
+
+# Weight of the worst slice's mean hops against the overall mean
+WORST_WEIGHT = 0.5
+
+# Score (in hops) given up to relieve the busiest link: among the placements within SLACK of the best score, the one
+# with the least loaded link wins
+SLACK = 0.05
+
+# Link latency used for every mesh and port link in scc-sst-node.py
+LINK_LATENCY_PS = 300
+
+# The hand placement used before this module, by (corecount, memory channels), for comparison
+LEGACY_LOCATIONS = {
+    (22, 6) : [1, 3, 21, 23, 10, 14], (22, 8) : [1, 3, 21, 23, 5, 9, 15, 19],
+    (24, 6) : [1, 3, 21, 23, 10, 14], (24, 8) : [1, 3, 21, 23, 5, 9, 15, 19],
+    (30, 6) : [1, 3, 26, 28, 15, 14], (30, 8) : [1, 3, 26, 28, 10, 14, 15, 19],
+    (32, 6) : [2, 3, 32, 33, 18, 17], (32, 8) : [2, 3, 32, 33, 12, 17, 18, 23],
+    (36, 6) : [2, 3, 32, 33, 18, 17], (36, 8) : [2, 3, 32, 33, 12, 17, 18, 23],
+    (40, 6) : [2, 3, 38, 39, 18, 23], (40, 8) : [2, 3, 38, 39, 12, 17, 24, 29],
+}
+
+
+def legacy_ports(corecount, memchan):
+    """The hand placement as (router, port) pairs: two north, two south, then alternating west and east."""
+    routers = LEGACY_LOCATIONS[(corecount, memchan)]
+    ports = ["north", "north", "south", "south"] + ["west", "east"] * ((memchan - 4) // 2)
+    return list(zip(routers, ports))
+
+
+def edge_ports(mesh_x, mesh_y):
+    """Every free (router, port) on the edge of the mesh. Router i sits at column i % mesh_x, row i // mesh_x."""
+    ports = []
+    for x in range(mesh_x):
+        ports.append((x, "north"))
+        ports.append(((mesh_y - 1) * mesh_x + x, "south"))
+    for y in range(mesh_y):
+        ports.append((y * mesh_x, "west"))
+        ports.append((y * mesh_x + mesh_x - 1, "east"))
+    return sorted(ports)
+
+
+def _hops(a, b, mesh_x):
+    return abs(a % mesh_x - b % mesh_x) + abs(a // mesh_x - b // mesh_x)
+
+
+def _route(a, b, mesh_x):
+    """Directed mesh links on the dimension-order path from router a to router b."""
+    links = []
+    x, y = a % mesh_x, a // mesh_x
+    bx, by = b % mesh_x, b // mesh_x
+    while x != bx:
+        step = 1 if bx > x else -1
+        links.append((y * mesh_x + x, y * mesh_x + x + step))
+        x += step
+    while y != by:
+        step = 1 if by > y else -1
+        links.append((y * mesh_x + x, (y + step) * mesh_x + x))
+        y += step
+    return links
+
+
+class ControllerPlacer:
+    """Hop and link-load model of memory controllers on the edge of a mesh with L3 slices at the occupied stops."""
+
+    def __init__(self, mesh_x, mesh_y, occupied):
+        self.mesh_x = mesh_x
+        self.mesh_y = mesh_y
+        self.slices = list(occupied)
+        self.candidates = edge_ports(mesh_x, mesh_y)
+        # Hops from each router to every slice, plus the hop onto the controller port
+        self.dist = dict((r, [_hops(r, s, mesh_x) + 1 for s in self.slices]) for r, _ in self.candidates)
+
+    def hops(self, ports):
+        """(mean, worst) hops; worst is the largest mean over the controllers seen from one slice."""
+        per_slice = [0.0] * len(self.slices)
+        for router, _ in ports:
+            for i, d in enumerate(self.dist[router]):
+                per_slice[i] += d
+        n = len(ports)
+        return sum(per_slice) / (n * len(self.slices)), max(per_slice) / n
+
+    def score(self, ports):
+        mean, worst = self.hops(ports)
+        return mean + WORST_WEIGHT * worst
+
+    def link_loads(self, ports):
+        """Flows on each directed mesh link, one request and one response flow per slice and controller."""
+        loads = {}
+        for router, _ in ports:
+            for s in self.slices:
+                for link in _route(s, router, self.mesh_x) + _route(router, s, self.mesh_x):
+                    loads[link] = loads.get(link, 0) + 1
+        return loads
+
+    def max_link_load(self, ports):
+        loads = self.link_loads(ports)
+        return max(loads.values()) if loads else 0
+
+    def _search(self, count):
+        """Router sets of the given size within SLACK of the lowest score, by branch and bound over combinations."""
+        nslices = len(self.slices)
+        routers = sorted(self.dist, key=lambda r: (sum(self.dist[r]), r))
+        totals = [sum(self.dist[r]) for r in routers]
+        # Lowest per-slice hops among routers[i:], to bound the worst slice of a partial set
+        suffix_min = [[0] * nslices for _ in range(len(routers) + 1)]
+        suffix_min[-1] = [float("inf")] * nslices
+        for i in range(len(routers) - 1, -1, -1):
+            suffix_min[i] = [min(d, m) for d, m in zip(self.dist[routers[i]], suffix_min[i + 1])]
+        state = {"best": float("inf"), "sets": []}
+
+        def visit(start, chosen, per_slice, total):
+            left = count - len(chosen)
+            if left == 0:
+                score = total / (count * nslices) + WORST_WEIGHT * max(per_slice) / count
+                if score < state["best"]:
+                    state["best"] = score
+                state["sets"] = [(sc, c) for sc, c in state["sets"] if sc <= state["best"] + SLACK]
+                if score <= state["best"] + SLACK:
+                    state["sets"].append((score, list(chosen)))
+                return
+            for i in range(start, len(routers) - left + 1):
+                # Routers are sorted by total hops, so the cheapest completion takes the next ones; the bound only
+                # grows with i, so once it fails no later router can do better
+                bound_total = total + sum(totals[i:i + left])
+                bound_worst = max(p + left * m for p, m in zip(per_slice, suffix_min[i]))
+                if bound_total / (count * nslices) + WORST_WEIGHT * bound_worst / count > state["best"] + SLACK:
+                    break
+                d = self.dist[routers[i]]
+                visit(i + 1, chosen + [routers[i]], [p + x for p, x in zip(per_slice, d)], total + totals[i])
+
+        visit(0, [], [0] * nslices, 0)
+        return [c for sc, c in state["sets"] if sc <= state["best"] + SLACK]
+
+    def place(self, count):
+        """Best (router, port) for each of count controllers, sorted by router.
+
+        Corner routers have two free ports; the port does not change the hop counts or the mesh link loads, so the
+        first one in sorted order is used.
+        """
+        if count > len(self.dist):
+            raise ValueError("%d controllers do not fit on the edge of a %dx%d mesh" % (count, self.mesh_x, self.mesh_y))
+        ports = {}
+        for router, port in reversed(self.candidates):
+            ports[router] = port
+        best = None
+        for routers in self._search(count):
+            trial = sorted((r, ports[r]) for r in routers)
+            key = (self.max_link_load(trial), self.score(trial), trial)
+            if best is None or key < best:
+                best = key
+        return best[2]
+
+
+def place_controllers(mesh_x, mesh_y, occupied, memchan):
+    """(router, port) for each memory channel, in the order the build loop creates them."""
+    return ControllerPlacer(mesh_x, mesh_y, occupied).place(memchan)
+
+
+def _side(router, port, mesh_x):
+    edge = {"north": "top edge", "south": "bottom edge", "west": "left edge", "east": "right edge"}[port]
+    return "%s, column %d row %d" % (edge, router % mesh_x, router // mesh_x)
+
+
+def report(corecount, memchan, globalmesh, method="anneal", noc_mhz=None):
+    import meshpart
+    import placement
+    mp = meshpart.MeshPartitioner(corecount, memchan, globalmesh)
+    mesh_x, mesh_y = mp.mesh_x, mp.mesh_y
+    occupied = sorted(placement.place_cores(mp, mesh_x, mesh_y, method))
+    placer = ControllerPlacer(mesh_x, mesh_y, occupied)
+    ports = mp.ports
+    mean, worst = placer.hops(ports)
+    loads = placer.link_loads(ports)
+    hop_ns = (LINK_LATENCY_PS + (1e6 / noc_mhz if noc_mhz else 0)) / 1000.0
+    empty = sorted(set(range(mesh_x * mesh_y)) - set(occupied))
+    print("%d cores, %d channels, %dx%d mesh%s: mean %.3f hops, worst slice %.3f hops, busiest link %d flows" %
+          (corecount, memchan, mesh_x, mesh_y, " (empty stops %s)" % ", ".join(map(str, empty)) if empty else "",
+           mean, worst, max(loads.values())))
+    if (corecount, memchan) in LEGACY_LOCATIONS:
+        legacy = legacy_ports(corecount, memchan)
+        lmean, lworst = placer.hops(legacy)
+        lload = placer.max_link_load(legacy)
+        print("  hand placement:                  mean %.3f hops, worst slice %.3f hops, busiest link %d flows" %
+              (lmean, lworst, lload))
+        if max(loads.values()) > lload:
+            print("  note: busiest link %d flows against %d with the hand placement, traded for fewer hops (link load "
+                  "only breaks ties within %.2f hops of the best score)" % (max(loads.values()), lload, SLACK))
+    print("  latency: about %.2f ns per hop (%d ps link%s), %.2f ns mean to memory" %
+          (hop_ns, LINK_LATENCY_PS, " + one %d MHz router cycle" % noc_mhz if noc_mhz else "", mean * hop_ns))
+    for mc, (router, port) in enumerate(ports):
+        d = placer.dist[router]
+        # Busiest link touching this controller's router, i.e. the injection bandwidth it competes for
+        local = max(n for (a, b), n in loads.items() if router in (a, b))
+        print("  mc%d -> router %2d %-5s (%s): %.2f hops mean, %d max to a slice, busiest adjacent link %d flows" %
+              (mc, router, port, _side(router, port, mesh_x), sum(d) / len(d), max(d), local))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Place memory controllers on the mesh edge and explain the choice")
+    parser.add_argument("-n", "--corecount", type=int, action="append", help="Core count (repeatable, default: catalog)")
+    parser.add_argument("-w", "--memchannels", type=int, action="append",
+                        help="Memory channels (repeatable, default: catalog)")
+    parser.add_argument("-b", "--noc", default="slow", help="NoC option used for the latency estimate")
+    parser.add_argument("--placement", default="anneal", help="Core placement (placement.py), default: %(default)s")
+    args = parser.parse_args(argv)
+
+    import catalog
+    cat = catalog.load()
+    counts = args.corecount or [int(v) for v in catalog.option(cat, "corecount")["values"]]
+    channels = args.memchannels or [int(v) for v in catalog.option(cat, "memchannels")["values"]]
+    noc_mhz = catalog.attributes(cat, "noc", args.noc)["clock_mhz"]
+    for corecount in counts:
+        for memchan in channels:
+            report(corecount, memchan, cat["workload"]["globalmesh"], args.placement, noc_mhz)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
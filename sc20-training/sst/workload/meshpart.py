@@ -0,0 +1,289 @@
+############################################################################################################################
+# Workload partitioning for scc-sst-node.py
+#
+# MeshPartitioner splits the interior of the globalmesh^3 stencil over the cores and gives the mesh stop and port each
+# memory controller attaches to (placed by mcplace.py). It is imported by the SST script and by the exploration tools.
+#
+# The interior (points 1 .. globalmesh-2 in each dimension) is decomposed by recursive bisection for any core count up
+# to the number of interior points (more cores raise ValueError). Each step cuts the current box along one axis into
+# parts sized by their share of the cores, either into p equal groups for a prime factor p of the core count or into two
+# near-halves. Plans are scored by the largest subdomain (the critical path) plus HALO_WEIGHT times the cut surface per
+# core (halo exchange), which keeps the point counts balanced and the subdomains close to cubes.
+#
+#   python meshpart.py --verify                 # report and tiling check for every catalog core count
+#   python meshpart.py -n 64 --globalmesh 240
+############################################################################################################################
+from __future__ import print_function, division
+
+import argparse
+import sys
+
+import mcplace
+
+
+def _prime_factors(n):
+    factors = []
+    p = 2
+    while p * p <= n:
+        if n % p == 0:
+            factors.append(p)
+            while n % p == 0:
+                n //= p
+        p += 1
+    if n > 1:
+        factors.append(n)
+    return factors
+
+
+def _split_length(length, shares):
+    """Split length into integer parts proportional to shares (largest remainder)."""
+    total = sum(shares)
+    exact = [length * s / total for s in shares]
+    parts = [int(e) for e in exact]
+    order = sorted(range(len(shares)), key=lambda i: exact[i] - parts[i], reverse=True)
+    for i in order[:length - sum(parts)]:
+        parts[i] += 1
+    return parts
+
+
+# A halo point is read from another core's caches, costing roughly two local points
+HALO_WEIGHT = 2.0
+
+
+class Decomposer:
+    """Recursive-bisection decomposition of a box of points over a number of cores.
+
+    plan(dims, cores) returns (largest subdomain, cut surface, splits) and is memoized on the box shape, so the
+    exhaustive search over axes and split factors stays cheap.
+    """
+
+    def __init__(self):
+        self.memo = {}
+
+    def _candidates(self, dims, cores):
+        groups = [[cores // p] * p for p in _prime_factors(cores)]
+        if cores % 2 == 1:
+            groups.append([cores // 2, cores - cores // 2])
+        for axis in range(3):
+            for shares in groups:
+                if dims[axis] < len(shares):
+                    continue
+                lengths = _split_length(dims[axis], shares)
+                yield axis, shares, lengths
+                if len(shares) == 2 and shares[0] != shares[1]:
+                    # Uneven halves: also try moving one plane across the cut
+                    for delta in (-1, 1):
+                        alt = [lengths[0] + delta, lengths[1] - delta]
+                        if min(alt) > 0:
+                            yield axis, shares, alt
+
+    def _fallback(self, dims, cores):
+        """Halve each axis and give each half as many cores as it has points for, in proportion where it can. Near
+        one point per core the equal groups of _candidates() leave some part with fewer points than cores; these
+        splits never do."""
+        for axis in range(3):
+            if dims[axis] < 2:
+                continue
+            lengths = [dims[axis] // 2, dims[axis] - dims[axis] // 2]
+            area = dims[0] * dims[1] * dims[2] // dims[axis]
+            first = int(round(cores * lengths[0] / dims[axis]))
+            first = max(1, cores - lengths[1] * area, min(first, cores - 1, lengths[0] * area))
+            yield axis, [first, cores - first], lengths
+
+    def plan(self, dims, cores):
+        """(largest subdomain, cut surface, split) of the best plan, or None when no plan gives every core a point."""
+        key = (dims, cores)
+        if key in self.memo:
+            return self.memo[key]
+        if cores == 1:
+            result = (dims[0] * dims[1] * dims[2], 0, None)
+        elif dims[0] * dims[1] * dims[2] < cores:
+            result = None
+        else:
+            # A candidate whose parts cannot all be split further is skipped
+            result = self._best(dims, cores, self._candidates(dims, cores))
+            if result is None:
+                result = self._best(dims, cores, self._fallback(dims, cores))
+        self.memo[key] = result
+        return result
+
+    def _best(self, dims, cores, candidates):
+        result = None
+        for axis, shares, lengths in candidates:
+            largest, surface = 0, 0
+            for share, length in zip(shares, lengths):
+                sub = list(dims)
+                sub[axis] = length
+                sub_plan = self.plan(tuple(sub), share)
+                if sub_plan is None:
+                    break
+                largest = max(largest, sub_plan[0])
+                surface += sub_plan[1]
+            else:
+                cut = dims[0] * dims[1] * dims[2] // dims[axis]
+                surface += cut * (len(shares) - 1)
+                score = largest + HALO_WEIGHT * surface / cores
+                if result is None or score < result[0] + HALO_WEIGHT * result[1] / cores:
+                    result = (largest, surface, (axis, shares, lengths))
+        return result
+
+    def boxes(self, begin, dims, cores):
+        """Subdomains as (xb, xe, yb, ye, zb, ze) with inclusive bounds, in depth-first order."""
+        plan = self.plan(tuple(dims), cores)
+        if plan is None:
+            raise ValueError("cannot split %s points over %d cores" % ("x".join(map(str, dims)), cores))
+        _, _, split = plan
+        if split is None:
+            return [(begin[0], begin[0] + dims[0] - 1, begin[1], begin[1] + dims[1] - 1,
+                     begin[2], begin[2] + dims[2] - 1)]
+        axis, shares, lengths = split
+        result = []
+        start = list(begin)
+        for share, length in zip(shares, lengths):
+            sub = list(dims)
+            sub[axis] = length
+            result.extend(self.boxes(tuple(start), tuple(sub), share))
+            start[axis] += length
+        return result
+
+
+def decompose(corecount, globalmesh):
+    """Subdomains of the stencil interior for each core."""
+    meshpt = globalmesh - 2
+    if corecount > meshpt ** 3:
+        raise ValueError("%d cores need at least as many interior points, globalmesh %d has %d" % (
+            corecount, globalmesh, meshpt ** 3))
+    return Decomposer().boxes((1, 1, 1), (meshpt, meshpt, meshpt), corecount)
+
+
+def box_points(box):
+    xb, xe, yb, ye, zb, ze = box
+    return (xe - xb + 1) * (ye - yb + 1) * (ze - zb + 1)
+
+
+def shared_faces(boxes):
+    """(i, j, area) for every pair of subdomains that share a face."""
+    for i, a in enumerate(boxes):
+        for j in range(i + 1, len(boxes)):
+            b = boxes[j]
+            for axis in range(3):
+                lo, hi = 2 * axis, 2 * axis + 1
+                if a[hi] + 1 != b[lo] and b[hi] + 1 != a[lo]:
+                    continue
+                area = 1
+                for other in range(3):
+                    if other == axis:
+                        continue
+                    olo, ohi = 2 * other, 2 * other + 1
+                    area *= max(0, min(a[ohi], b[ohi]) - max(a[olo], b[olo]) + 1)
+                if area:
+                    yield i, j, area
+
+
+def halo_points(boxes):
+    """Points each subdomain reads from its neighbours per sweep (faces shared with other subdomains)."""
+    return sum(2 * area for _, _, area in shared_faces(boxes))
+
+
+def load_imbalance(boxes):
+    """Largest subdomain over the mean subdomain."""
+    points = [box_points(b) for b in boxes]
+    return max(points) * len(points) / float(sum(points))
+
+
+def verify_tiling(boxes, globalmesh):
+    """Raise ValueError unless the subdomains exactly tile the interior with no overlap."""
+    meshpt = globalmesh - 2
+    for box in boxes:
+        for axis in range(3):
+            lo, hi = box[2 * axis], box[2 * axis + 1]
+            if lo < 1 or hi > meshpt or lo > hi:
+                raise ValueError("subdomain %s is empty or outside the interior" % (box,))
+    for i, a in enumerate(boxes):
+        for j in range(i + 1, len(boxes)):
+            b = boxes[j]
+            if all(max(a[2 * k], b[2 * k]) <= min(a[2 * k + 1], b[2 * k + 1]) for k in range(3)):
+                raise ValueError("subdomains %d and %d overlap" % (i, j))
+    covered = sum(box_points(b) for b in boxes)
+    if covered != meshpt ** 3:
+        raise ValueError("subdomains cover %d of %d interior points" % (covered, meshpt ** 3))
+
+
+def mesh_shape(corecount):
+    """Mesh stops (x, y) for a core count. Router i sits at column i % x, row i // x."""
+    mesh_stops_x = 5
+    mesh_stops_y = 5
+    if corecount > 30:
+        mesh_stops_x = 6
+    if corecount == 40:
+        mesh_stops_y = 7
+    elif corecount > 24:
+        mesh_stops_y = 6
+    return mesh_stops_x, mesh_stops_y
+
+
+# This class partitions the workload over the cores and also returns the location of the memories on the mesh
+class MeshPartitioner:
+    def __init__(self, corecount, memchan, globalmesh):
+        self.globalmesh = globalmesh
+        self.boxes = decompose(corecount, globalmesh)
+        self.xb, self.xe, self.yb, self.ye, self.zb, self.ze = [list(v) for v in zip(*self.boxes)]
+        self.memchan = memchan
+        self.mesh_x, self.mesh_y = mesh_shape(corecount)
+        self.ports = None
+        self.place_controllers(range(corecount))
+
+    def place_controllers(self, occupied):
+        """Attach the memory controllers for cores at the occupied stops (mcplace.py). True if they moved."""
+        ports = mcplace.place_controllers(self.mesh_x, self.mesh_y, sorted(occupied), self.memchan)
+        moved = ports != self.ports
+        self.ports = ports
+        self.mc = [router for router, _ in ports]
+        return moved
+
+    def getPartitionForCore(self, core_id):
+        return self.xb[core_id], self.xe[core_id], self.yb[core_id], self.ye[core_id], self.zb[core_id], self.ze[core_id]
+
+    def getLocForMC(self, mc_id):
+        return self.mc[mc_id]
+
+    def getPortForMC(self, mc_id):
+        return self.ports[mc_id]
+
+
+def report(corecount, globalmesh, verify=False, verbose=False):
+    boxes = decompose(corecount, globalmesh)
+    if verify:
+        verify_tiling(boxes, globalmesh)
+    points = [box_points(b) for b in boxes]
+    print("%3d cores, globalmesh %d: points/core %d - %d, load imbalance %.4f, halo %d points (%.1f%% of interior)%s" %
+          (corecount, globalmesh, min(points), max(points), load_imbalance(boxes), halo_points(boxes),
+           100.0 * halo_points(boxes) / sum(points), ", tiling verified" if verify else ""))
+    if verbose:
+        for i, box in enumerate(boxes):
+            print("  core %3d: x %3d-%3d  y %3d-%3d  z %3d-%3d  %8d points" % ((i,) + box + (points[i],)))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Report the stencil domain decomposition")
+    parser.add_argument("-n", "--corecount", type=int, action="append", help="Core count (repeatable, default: catalog)")
+    parser.add_argument("--globalmesh", type=int, help="Global mesh size (default: catalog workload)")
+    parser.add_argument("--verify", action="store_true", help="Check that the subdomains exactly tile the interior")
+    parser.add_argument("-v", "--verbose", action="store_true", help="List every subdomain")
+    args = parser.parse_args(argv)
+
+    import catalog
+    cat = catalog.load()
+    counts = args.corecount or [int(v) for v in catalog.option(cat, "corecount")["values"]]
+    globalmesh = args.globalmesh or cat["workload"]["globalmesh"]
+    for corecount in counts:
+        try:
+            report(corecount, globalmesh, args.verify, args.verbose)
+        except ValueError as e:
+            print("%3d cores: FAILED: %s" % (corecount, e))
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,227 @@
+############################################################################################################################
+# Placement of subdomains onto mesh stops
+#
+# By default core x (with its L1, L2 slice and L3 slice) sits at mesh stop x, wherever its subdomain lies in the
+# stencil, so neighbouring subdomains can end up many NoC hops apart. Placer assigns cores to mesh stops by simulated
+# annealing to minimize the traffic-weighted hop count:
+#
+#   halo   - each pair of subdomains sharing a face exchanges 2 * face area points per sweep
+#   memory - each core streams its points to and from memory, interleaved evenly over all memory controllers
+#
+# A move relocates one core to another stop, swapping with the core already there, so partially populated meshes
+# (22 cores on 25 stops) also choose which stops stay empty. Each of a few seeded annealing runs keeps the best placement
+# it saw and finishes with a greedy descent, so the result is never worse than the identity. Only random.random() is
+# used, so the placement is the same under Python 2 and 3.
+#
+# The memory controllers go next to the stops the cores occupy (mcplace.py), which the annealer chooses, so
+# place_cores() alternates the two until the occupied stops no longer change, and leaves the MeshPartitioner's
+# controllers placed for the final stops.
+#
+#   python placement.py                          # hop report for every catalog core count and channel count
+#   python placement.py -n 40 -w 8 -v            # one configuration, with the placement drawn on the mesh
+############################################################################################################################
+from __future__ import print_function, division
+
+import argparse
+import math
+import random
+import sys
+
+import meshpart
+
+METHODS = ["anneal", "identity"]
+
+# Points moved per point owned per sweep (read the old value and write the new one)
+MEMORY_WEIGHT = 2.0
+ANNEAL_STEPS = 20000
+ANNEAL_SEED = 8471
+ANNEAL_RESTARTS = 4
+# Rounds of placing the cores against the controllers and the controllers next to the cores
+CONTROLLER_ROUNDS = 4
+
+
+def hops(a, b, mesh_x):
+    return abs(a % mesh_x - b % mesh_x) + abs(a // mesh_x - b // mesh_x)
+
+
+class Placer:
+    """Traffic model of one partition on one mesh, and the annealer that places it."""
+
+    def __init__(self, boxes, mesh_x, mesh_y, mc_stops):
+        self.ncores = len(boxes)
+        self.nstops = mesh_x * mesh_y
+        if self.ncores > self.nstops:
+            raise ValueError("%d cores do not fit on a %dx%d mesh" % (self.ncores, mesh_x, mesh_y))
+        self.mesh_x = mesh_x
+        self.mesh_y = mesh_y
+        self.dist = [[hops(a, b, mesh_x) for b in range(self.nstops)] for a in range(self.nstops)]
+        # Mean hops from each stop to the memory controllers, which serve interleaved lines in equal shares
+        self.mc_dist = [sum(self.dist[s][m] for m in mc_stops) / len(mc_stops) for s in range(self.nstops)]
+        self.memory = [MEMORY_WEIGHT * meshpart.box_points(b) for b in boxes]
+        self.neighbours = [[] for _ in boxes]
+        for i, j, area in meshpart.shared_faces(boxes):
+            self.neighbours[i].append((j, 2.0 * area))
+            self.neighbours[j].append((i, 2.0 * area))
+        self.halo_total = sum(w for nbrs in self.neighbours for _, w in nbrs) / 2
+        self.memory_total = sum(self.memory)
+
+    def costs(self, place):
+        """(halo, memory) traffic times hops for a placement (list of stops indexed by core)."""
+        halo = 0.0
+        for i, nbrs in enumerate(self.neighbours):
+            for j, w in nbrs:
+                if i < j:
+                    halo += w * self.dist[place[i]][place[j]]
+        memory = sum(m * self.mc_dist[place[i]] for i, m in enumerate(self.memory))
+        return halo, memory
+
+    def cost(self, place):
+        return sum(self.costs(place))
+
+    def mean_hops(self, place):
+        """Traffic-weighted mean hop count of the halo and of the memory traffic."""
+        halo, memory = self.costs(place)
+        return halo / self.halo_total if self.halo_total else 0.0, memory / self.memory_total
+
+    def _move_delta(self, place, core, stop, skip):
+        src = place[core]
+        delta = self.memory[core] * (self.mc_dist[stop] - self.mc_dist[src])
+        for j, w in self.neighbours[core]:
+            if j != skip:
+                delta += w * (self.dist[stop][place[j]] - self.dist[src][place[j]])
+        return delta
+
+    def _delta(self, place, occupant, core, stop):
+        other = occupant[stop]
+        delta = self._move_delta(place, core, stop, other)
+        if other is not None:
+            delta += self._move_delta(place, other, place[core], core)
+        return delta
+
+    def _apply(self, place, occupant, core, stop):
+        other = occupant[stop]
+        src = place[core]
+        place[core], occupant[stop] = stop, core
+        occupant[src] = other
+        if other is not None:
+            place[other] = src
+
+    def anneal(self, steps=ANNEAL_STEPS, seed=ANNEAL_SEED):
+        """Best placement found by simulated annealing, starting from the identity."""
+        rng = random.Random(seed)
+        place = list(range(self.ncores))
+        occupant = place + [None] * (self.nstops - self.ncores)
+        if self.nstops < 2:
+            return place
+
+        def random_move():
+            core = int(rng.random() * self.ncores)
+            stop = int(rng.random() * (self.nstops - 1))
+            if stop >= place[core]:
+                stop += 1
+            return core, stop
+
+        # Start hot enough to accept a typical uphill move most of the time, cool geometrically to 1/1000 of that
+        sample = [abs(self._delta(place, occupant, *random_move())) for _ in range(200)]
+        t0 = sum(sample) / len(sample) or 1.0
+        alpha = math.pow(1e-3, 1.0 / steps)
+        temperature = t0
+        current = self.cost(place)
+        best, best_place = current, list(place)
+        for _ in range(steps):
+            core, stop = random_move()
+            delta = self._delta(place, occupant, core, stop)
+            if delta <= 0 or rng.random() < math.exp(-delta / temperature):
+                self._apply(place, occupant, core, stop)
+                current += delta
+                if current < best - 1e-9:
+                    best, best_place = current, list(place)
+            temperature *= alpha
+        return self.descend(best_place)
+
+    def descend(self, place):
+        """Apply improving moves until the placement is a local minimum."""
+        place = list(place)
+        occupant = [None] * self.nstops
+        for core, stop in enumerate(place):
+            occupant[stop] = core
+        improved = True
+        while improved:
+            improved = False
+            for core in range(self.ncores):
+                for stop in range(self.nstops):
+                    if stop != place[core] and self._delta(place, occupant, core, stop) < -1e-9:
+                        self._apply(place, occupant, core, stop)
+                        improved = True
+        return place
+
+    def optimize(self, restarts=ANNEAL_RESTARTS):
+        """Best of several annealing runs with consecutive seeds."""
+        places = [self.anneal(seed=ANNEAL_SEED + r) for r in range(restarts)]
+        return min(places, key=self.cost)
+
+    def draw(self, place, mc_stops):
+        """The mesh as text: core ids at their stops, M for stops with a memory controller, . for empty stops."""
+        occupant = dict((s, i) for i, s in enumerate(place))
+        lines = []
+        for y in range(self.mesh_y):
+            cells = []
+            for x in range(self.mesh_x):
+                stop = y * self.mesh_x + x
+                label = str(occupant[stop]) if stop in occupant else "."
+                cells.append(label + ("M" if stop in mc_stops else " "))
+            lines.append("  " + " ".join("%4s" % c for c in cells))
+        return "\n".join(lines)
+
+
+def place_cores(mp, mesh_x, mesh_y, method="anneal"):
+    """Mesh stop for each core of a MeshPartitioner, whose memory controllers are moved next to those stops."""
+    if method not in METHODS:
+        raise ValueError("unknown placement " + method)
+    if method == "identity":
+        place = list(range(len(mp.boxes)))
+        mp.place_controllers(place)
+        return place
+    for _ in range(CONTROLLER_ROUNDS):
+        place = Placer(mp.boxes, mesh_x, mesh_y, mp.mc).optimize()
+        if not mp.place_controllers(place):
+            break
+    return place
+
+
+def report(corecount, memchan, globalmesh, verbose=False):
+    mp = meshpart.MeshPartitioner(corecount, memchan, globalmesh)
+    mesh_x, mesh_y = meshpart.mesh_shape(corecount)
+    place = place_cores(mp, mesh_x, mesh_y)
+    placer = Placer(mp.boxes, mesh_x, mesh_y, mp.mc)
+    identity = list(range(corecount))
+    before, after = placer.mean_hops(identity), placer.mean_hops(place)
+    print("%3d cores, %d channels: halo hops %.3f -> %.3f, memory hops %.3f -> %.3f, total cost %.4g -> %.4g (%+.1f%%)" %
+          (corecount, memchan, before[0], after[0], before[1], after[1], placer.cost(identity), placer.cost(place),
+           100.0 * (placer.cost(place) / placer.cost(identity) - 1)))
+    if verbose:
+        print(placer.draw(place, mp.mc))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Report NoC hop counts before and after placement optimization")
+    parser.add_argument("-n", "--corecount", type=int, action="append", help="Core count (repeatable, default: catalog)")
+    parser.add_argument("-w", "--memchannels", type=int, action="append",
+                        help="Memory channels (repeatable, default: catalog)")
+    parser.add_argument("--globalmesh", type=int, help="Global mesh size (default: catalog workload)")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Draw the optimized placement")
+    args = parser.parse_args(argv)
+
+    import catalog
+    cat = catalog.load()
+    counts = args.corecount or [int(v) for v in catalog.option(cat, "corecount")["values"]]
+    channels = args.memchannels or [int(v) for v in catalog.option(cat, "memchannels")["values"]]
+    globalmesh = args.globalmesh or cat["workload"]["globalmesh"]
+    for corecount in counts:
+        for memchan in channels:
+            report(corecount, memchan, globalmesh, args.verbose)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,135 @@
+############################################################################################################################
+# Rank and thread assignment for parallel SST runs of scc-sst-node.py
+#
+# A mesh stop and everything attached to it (core or SMT cores, L1, L2, L3 and their NICs, and a directory/memory pair
+# when a memory controller hangs off it) form a tile. Tiles are never split, so the only links between partitions are
+# the 300ps router-to-router links and the latency of those links is what lets the partitions run ahead of each other.
+# The mesh is cut by recursive bisection into one rectangle of tiles per partition (rank x thread), each cut placed to
+# balance the tile weights, where a tile weighs the sum of COMPONENT_WEIGHTS of its components: roughly the relative
+# event rates, with cores and L1s busiest and routers lightest.
+#
+#   python rankmap.py -n 36 -p 4                 # partition map, cut links and imbalance
+#   python rankmap.py -n 40 -w 8 -t yes -p 8
+############################################################################################################################
+from __future__ import print_function, division
+
+import argparse
+import sys
+
+import meshpart
+
+COMPONENT_WEIGHTS = {
+    "core" : 8.0,
+    "smt" : 2.0,
+    "l1" : 6.0,
+    "l2" : 3.0,
+    "l3" : 2.0,
+    "dirctrl" : 2.0,
+    "memctrl" : 3.0,
+    "router" : 1.0,
+}
+
+
+def tile_weights(mesh_x, mesh_y, place, mc_stops, smt=False):
+    """Weight of each mesh stop: its router plus the components attached to it."""
+    weights = [COMPONENT_WEIGHTS["router"]] * (mesh_x * mesh_y)
+    core = COMPONENT_WEIGHTS["core"] * 2 + COMPONENT_WEIGHTS["smt"] if smt else COMPONENT_WEIGHTS["core"]
+    for stop in place:
+        weights[stop] += core + COMPONENT_WEIGHTS["l1"] + COMPONENT_WEIGHTS["l2"] + COMPONENT_WEIGHTS["l3"]
+    for stop in mc_stops:
+        weights[stop] += COMPONENT_WEIGHTS["dirctrl"] + COMPONENT_WEIGHTS["memctrl"]
+    return weights
+
+
+def _bisect(rect, parts, first, weights, mesh_x, owner):
+    x0, x1, y0, y1 = rect
+    if parts == 1 or (x1 - x0 == 1 and y1 - y0 == 1):
+        # A single tile cannot be split; any further partitions stay empty
+        for y in range(y0, y1):
+            for x in range(x0, x1):
+                owner[y * mesh_x + x] = first
+        return
+    left = parts // 2
+    # Cut across the longer side, at the line that gives the first half its share of the weight
+    if x1 - x0 >= y1 - y0:
+        lines = [sum(weights[y * mesh_x + x] for y in range(y0, y1)) for x in range(x0, x1)]
+    else:
+        lines = [sum(weights[y * mesh_x + x] for x in range(x0, x1)) for y in range(y0, y1)]
+    target = sum(lines) * left / float(parts)
+    best, acc = None, 0.0
+    for cut in range(1, len(lines)):
+        acc += lines[cut - 1]
+        if best is None or abs(acc - target) < best[0]:
+            best = (abs(acc - target), cut)
+    cut = best[1]
+    if x1 - x0 >= y1 - y0:
+        halves = [(x0, x0 + cut, y0, y1), (x0 + cut, x1, y0, y1)]
+    else:
+        halves = [(x0, x1, y0, y0 + cut), (x0, x1, y0 + cut, y1)]
+    _bisect(halves[0], left, first, weights, mesh_x, owner)
+    _bisect(halves[1], parts - left, first + left, weights, mesh_x, owner)
+
+
+def partition_tiles(mesh_x, mesh_y, weights, parts):
+    """Partition index (0 .. parts-1) of each mesh stop."""
+    owner = [0] * (mesh_x * mesh_y)
+    _bisect((0, mesh_x, 0, mesh_y), max(1, parts), 0, weights, mesh_x, owner)
+    return owner
+
+
+def rank_thread(partition, threads):
+    """(MPI rank, thread) of a partition index; the threads of one rank take neighbouring rectangles."""
+    return partition // threads, partition % threads
+
+
+def cut_links(mesh_x, mesh_y, owner):
+    """(router links between partitions, all router links)."""
+    cut = total = 0
+    for stop in range(mesh_x * mesh_y):
+        x, y = stop % mesh_x, stop // mesh_x
+        for nbr in ([stop + 1] if x + 1 < mesh_x else []) + ([stop + mesh_x] if y + 1 < mesh_y else []):
+            total += 1
+            if owner[stop] != owner[nbr]:
+                cut += 1
+    return cut, total
+
+
+def imbalance(weights, owner, parts):
+    """Heaviest partition over the mean partition weight."""
+    loads = [0.0] * parts
+    for stop, w in enumerate(weights):
+        loads[owner[stop]] += w
+    return max(loads) * parts / sum(loads)
+
+
+def draw(mesh_x, mesh_y, owner):
+    return "\n".join("  " + " ".join("%3d" % owner[y * mesh_x + x] for x in range(mesh_x)) for y in range(mesh_y))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Show the tile partition used for parallel SST runs")
+    parser.add_argument("-n", "--corecount", type=int, default=22, help="Core count, default: %(default)s")
+    parser.add_argument("-w", "--memchannels", type=int, default=6, help="Memory channels, default: %(default)s")
+    parser.add_argument("-t", "--smt", choices=["no", "yes"], default="no", help="SMT, default: %(default)s")
+    parser.add_argument("-p", "--parts", type=int, action="append", help="Partitions, ranks x threads (repeatable)")
+    parser.add_argument("--placement", default="anneal", help="Core placement, default: %(default)s")
+    args = parser.parse_args(argv)
+
+    import catalog
+    import placement
+    cat = catalog.load()
+    mp = meshpart.MeshPartitioner(args.corecount, args.memchannels, cat["workload"]["globalmesh"])
+    mesh_x, mesh_y = meshpart.mesh_shape(args.corecount)
+    place = placement.place_cores(mp, mesh_x, mesh_y, args.placement)
+    weights = tile_weights(mesh_x, mesh_y, place, mp.mc, args.smt == "yes")
+    for parts in args.parts or [2, 4, 8]:
+        owner = partition_tiles(mesh_x, mesh_y, weights, parts)
+        cut, total = cut_links(mesh_x, mesh_y, owner)
+        print("%d cores, %d channels, smt %s, %d partitions: %d of %d router links cut, imbalance %.3f" %
+              (args.corecount, args.memchannels, args.smt, parts, cut, total, imbalance(weights, owner, parts)))
+        print(draw(mesh_x, mesh_y, owner))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
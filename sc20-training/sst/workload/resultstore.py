@@ -0,0 +1,313 @@
+############################################################################################################################
+# Result store
+#
+# SQLite database of simulation results. Each run is keyed on its canonical --model-options string and a fingerprint of
+# everything that determines the simulated result: the SST input script, the catalog, the sc19 generator sources and the
+# workload parameters (globalmesh, histoslots, iterations). Lookups only see runs made with the current fingerprint, so
+# editing the model or the workload invalidates earlier results automatically; "prune" deletes them.
+#
+# A run sweep.py stopped because it could no longer beat the best result has the status "dominated", no simulated time
+# and the time it reached as lower_bound_ps; one stopped because its heartbeats projected more than --max-wall of wall
+# time has the status "timeout" and no simulated time.
+#
+# The benchmarks table keeps what runs cost to simulate (simbench.py suite): every measurement is kept with the model
+# fingerprint and the SST version it was made with, so a slowdown can be traced to the model files or the SST install
+# that changed since the previous one.
+#
+#   python resultstore.py lookup -- "-n=40 -c=fast -l1=big"
+#   python resultstore.py best
+#   python resultstore.py import sweep-out/results.jsonl       # migrate a sweep made before the store
+#   python resultstore.py benchmarks
+############################################################################################################################
+from __future__ import print_function, division
+
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import time
+
+import catalog
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_DB = os.path.join(SCRIPT_DIR, "results.db")
+
+# Files whose contents determine the simulated result. statsload.py only chooses which statistics are recorded and
+# rankmap.py only which SST rank and thread simulates each component; neither changes the simulated time (sweep.py
+# keeps statistics out of the result key too).
+MODEL_FILES = ["scc-sst-node.py", "sccmodel.py", "catalog.json", "catalog.py", "meshpart.py", "mcplace.py",
+               "placement.py", "tracefile.py", "sampling.py", "smtsplit.py", "interleave.py", "sc19common.cc",
+               "sc19common.h", "sc19gen.cc", "sc19gen.h", "sc19trace.cc", "sc19trace.h"]
+
+RESULT_FIELDS = ["cost", "status", "simulated_time", "simulated_time_ps", "wall_time", "peak_rss_kb", "stats_path",
+                 "log_path", "lower_bound_ps"]
+
+BENCHMARK_FIELDS = ["sst_version", "wall_time", "run_time", "sst_build_time", "python_build_time", "peak_rss_kb",
+                    "requests_per_s", "simulated_time_ps"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS fingerprints (
+    fingerprint TEXT PRIMARY KEY,
+    files TEXT,
+    genparams TEXT,
+    created REAL
+);
+CREATE TABLE IF NOT EXISTS runs (
+    options TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    cost REAL,
+    status TEXT,
+    simulated_time TEXT,
+    simulated_time_ps REAL,
+    wall_time REAL,
+    peak_rss_kb INTEGER,
+    stats_path TEXT,
+    log_path TEXT,
+    created REAL,
+    lower_bound_ps REAL,
+    PRIMARY KEY (options, fingerprint)
+);
+CREATE TABLE IF NOT EXISTS benchmarks (
+    options TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    sst_version TEXT,
+    wall_time REAL,
+    run_time REAL,
+    sst_build_time REAL,
+    python_build_time REAL,
+    peak_rss_kb INTEGER,
+    requests_per_s REAL,
+    simulated_time_ps REAL,
+    created REAL
+);
+CREATE INDEX IF NOT EXISTS benchmarks_options ON benchmarks (options, created);
+"""
+
+# Columns added to runs since the first version of the schema, added to older databases when they are opened
+ADDED_COLUMNS = [("lower_bound_ps", "REAL")]
+
+
+def file_hash(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 16), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def split_options(cat, options):
+    """(catalog configuration, sorted list of the other option tokens) for a --model-options string."""
+    cfg = catalog.parse_model_options(cat, " ".join(t for t in options.split() if _is_catalog_flag(cat, t)))
+    extra = sorted(t for t in options.split() if not _is_catalog_flag(cat, t))
+    return cfg, extra
+
+
+def extra_options(extra):
+    """The non-catalog option tokens as a dict of flag to value, e.g. {"--scale": "0.5"}."""
+    return dict(t.partition("=")[::2] for t in extra)
+
+
+def canonical_options(cat, options):
+    """Catalog options in catalog order with defaults filled in, followed by any other options sorted by flag."""
+    cfg, extra = split_options(cat, options)
+    return " ".join([catalog.model_options(cat, cfg)] + extra)
+
+
+def _is_catalog_flag(cat, token):
+    flag = token.partition("=")[0]
+    return any(flag in (opt["flag"], "--" + opt["name"]) for opt in cat["options"])
+
+
+class ResultStore:
+    def __init__(self, path=DEFAULT_DB, workdir=SCRIPT_DIR, genparams=None):
+        self.path = path
+        self.workdir = workdir
+        self.cat = catalog.load(os.path.join(workdir, "catalog.json"))
+        self.genparams = genparams if genparams is not None else dict(self.cat["workload"])
+        self.db = sqlite3.connect(path, timeout=60)
+        self.db.row_factory = sqlite3.Row
+        self.db.executescript(SCHEMA)
+        self._migrate()
+        self.fingerprint, files = self._fingerprint()
+        with self.db:
+            self.db.execute("INSERT OR IGNORE INTO fingerprints VALUES (?, ?, ?, ?)",
+                            (self.fingerprint, json.dumps(files, sort_keys=True),
+                             json.dumps(self.genparams, sort_keys=True), time.time()))
+
+    def _migrate(self):
+        columns = set(row[1] for row in self.db.execute("PRAGMA table_info(runs)"))
+        with self.db:
+            for name, kind in ADDED_COLUMNS:
+                if name not in columns:
+                    self.db.execute("ALTER TABLE runs ADD COLUMN %s %s" % (name, kind))
+
+    def _fingerprint(self):
+        files = {}
+        for name in MODEL_FILES:
+            path = os.path.join(self.workdir, name)
+            files[name] = file_hash(path) if os.path.exists(path) else None
+        h = hashlib.sha256()
+        h.update(json.dumps(files, sort_keys=True).encode("ascii"))
+        h.update(json.dumps(self.genparams, sort_keys=True).encode("ascii"))
+        return h.hexdigest(), files
+
+    def close(self):
+        self.db.close()
+
+    def canonical(self, options):
+        return canonical_options(self.cat, options)
+
+    def lookup(self, options):
+        """Result recorded for these options under the current fingerprint, or None."""
+        row = self.db.execute("SELECT * FROM runs WHERE options = ? AND fingerprint = ?",
+                              (self.canonical(options), self.fingerprint)).fetchone()
+        return dict(row) if row is not None else None
+
+    def record(self, options, **fields):
+        unknown = set(fields) - set(RESULT_FIELDS)
+        if unknown:
+            raise ValueError("unknown result fields: " + ", ".join(sorted(unknown)))
+        names = ["options", "fingerprint", "created"] + RESULT_FIELDS
+        values = [self.canonical(options), self.fingerprint, time.time()] + [fields.get(f) for f in RESULT_FIELDS]
+        with self.db:
+            self.db.execute("INSERT OR REPLACE INTO runs (%s) VALUES (%s)" %
+                            (", ".join(names), ", ".join("?" * len(names))), values)
+
+    def results(self, status="ok"):
+        """All current results, optionally filtered by status."""
+        query = "SELECT * FROM runs WHERE fingerprint = ?"
+        params = [self.fingerprint]
+        if status is not None:
+            query += " AND status = ?"
+            params.append(status)
+        return [dict(row) for row in self.db.execute(query + " ORDER BY options", params)]
+
+    def best(self):
+        """Current result of the catalog workload with the highest performance per cost (lowest simulated time * cost).
+
+        Only runs with catalog options alone count: any other option (--scale, --sample, --iterations, --interleave,
+        --placement, --batch, ...) changes the workload or the model, so its time is not that of the catalog system.
+        """
+        full = [rec for rec in self.results() if not split_options(self.cat, rec["options"])[1]]
+        return min(full, key=lambda rec: rec["simulated_time_ps"] * rec["cost"]) if full else None
+
+    def record_benchmark(self, options, **fields):
+        unknown = set(fields) - set(BENCHMARK_FIELDS)
+        if unknown:
+            raise ValueError("unknown benchmark fields: " + ", ".join(sorted(unknown)))
+        names = ["options", "fingerprint", "created"] + BENCHMARK_FIELDS
+        values = [self.canonical(options), self.fingerprint, time.time()] + [fields.get(f) for f in BENCHMARK_FIELDS]
+        with self.db:
+            self.db.execute("INSERT INTO benchmarks (%s) VALUES (%s)" %
+                            (", ".join(names), ", ".join("?" * len(names))), values)
+
+    def benchmarks(self, options=None):
+        """Every benchmark measurement, of any model, oldest first; only those of options if given."""
+        if options is None:
+            rows = self.db.execute("SELECT * FROM benchmarks ORDER BY options, created")
+        else:
+            rows = self.db.execute("SELECT * FROM benchmarks WHERE options = ? ORDER BY created",
+                                   (self.canonical(options),))
+        return [dict(row) for row in rows]
+
+    def last_benchmark(self, options):
+        """The latest benchmark measurement of options, of any model, or None."""
+        history = self.benchmarks(options)
+        return history[-1] if history else None
+
+    def changed_files(self, fingerprint):
+        """Model files (and "workload" for the workload parameters) that differ between a fingerprint and the current
+        one; None if that fingerprint is unknown (pruned)."""
+        rows = dict((row["fingerprint"], row) for row in
+                    self.db.execute("SELECT * FROM fingerprints WHERE fingerprint IN (?, ?)",
+                                    (fingerprint, self.fingerprint)))
+        if fingerprint not in rows:
+            return None
+        old, new = [json.loads(rows[f]["files"]) for f in (fingerprint, self.fingerprint)]
+        changed = sorted(name for name in set(old) | set(new) if old.get(name) != new.get(name))
+        if rows[fingerprint]["genparams"] != rows[self.fingerprint]["genparams"]:
+            changed.append("workload")
+        return changed
+
+    def stale_count(self):
+        return self.db.execute("SELECT COUNT(*) FROM runs WHERE fingerprint != ?", (self.fingerprint,)).fetchone()[0]
+
+    def prune(self):
+        with self.db:
+            n = self.db.execute("DELETE FROM runs WHERE fingerprint != ?", (self.fingerprint,)).rowcount
+            self.db.execute("DELETE FROM fingerprints WHERE fingerprint != ?", (self.fingerprint,))
+        return n
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Query and maintain the simulation result store")
+    parser.add_argument("--db", default=DEFAULT_DB, help="Database file, default: %(default)s")
+    sub = parser.add_subparsers(dest="command")
+    lookup = sub.add_parser("lookup", help="Show the current result for a --model-options string")
+    lookup.add_argument("options")
+    sub.add_parser("list", help="List current results")
+    sub.add_parser("best", help="Show the best performance per cost, in cost.txt format")
+    sub.add_parser("prune", help="Delete results made with an older model or workload")
+    bench = sub.add_parser("benchmarks", help="Show the simulator benchmark history (simbench.py suite)")
+    bench.add_argument("options", nargs="?", help="Only this --model-options string")
+    imp = sub.add_parser("import", help="Migrate the results.jsonl of an older sweep (assumes the current model)")
+    imp.add_argument("jsonl")
+    args = parser.parse_args(argv)
+
+    store = ResultStore(args.db)
+    if args.command == "lookup":
+        rec = store.lookup(args.options)
+        if rec is None:
+            print("No current result for: " + store.canonical(args.options))
+            return 1
+        for name in ["options"] + RESULT_FIELDS:
+            print("%-18s %s" % (name + ":", rec[name]))
+    elif args.command == "list":
+        for rec in store.results(status=None):
+            print("%-90s %-8s %8s  %s" % (rec["options"], rec["status"], rec["cost"], rec["simulated_time"]))
+        stale = store.stale_count()
+        if stale:
+            print("(%d results from an older model or workload are hidden)" % stale)
+    elif args.command == "best":
+        rec = store.best()
+        if rec is None:
+            print("No results")
+            return 1
+        print("Configuration: " + rec["options"])
+        print("Cost: %g" % rec["cost"])
+        print("Simulation time: " + rec["simulated_time"])
+    elif args.command == "benchmarks":
+        history = store.benchmarks(args.options)
+        if not history:
+            print("No benchmarks")
+            return 1
+        for rec in history:
+            print("%-84s %s %9.2f s %9.1f MiB %8.3f Mreq/s  %s%s" % (
+                rec["options"], time.strftime("%Y-%m-%d %H:%M", time.localtime(rec["created"])), rec["wall_time"],
+                (rec["peak_rss_kb"] or 0) / 1024.0, (rec["requests_per_s"] or 0) / 1e6, rec["sst_version"],
+                "" if rec["fingerprint"] == store.fingerprint else " (older model)"))
+    elif args.command == "prune":
+        print("Deleted %d stale results" % store.prune())
+    elif args.command == "import":
+        n = 0
+        with open(args.jsonl) as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                rec = json.loads(line)
+                fields = dict((k, rec.get(k)) for k in RESULT_FIELDS if k in rec)
+                if "log" in rec:
+                    fields["log_path"] = rec["log"]
+                store.record(rec["options"], **fields)
+                n += 1
+        print("Imported %d results" % n)
+    else:
+        parser.print_help()
+    store.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,206 @@
+############################################################################################################################
+# Sampled simulation of the stencil planes
+#
+# Every core sweeps its z-slab plane by plane and the work per point is the same everywhere but at the slab boundaries,
+# so the time of a slab follows from the time of a few of its planes. With --sample=PERIOD[:WINDOW[:WARMUP]] the
+# generator (sc19gen.cc) splits each slab into periods of PERIOD z-planes: the first WARMUP planes of a period are
+# simulated untimed to bring the caches and the directory to the state of that part of the slab, the next WINDOW planes
+# are simulated and timed, and the rest of the period is skipped without issuing a request. At the end of the run every
+# generator prints the planes and simulated picoseconds of its windows.
+#
+# estimate() extrapolates each core to its whole slab with a ratio estimator (time per timed plane times the planes of
+# the slab) and a 95% Student t interval over its windows, and the run to the slowest core. The interval only covers
+# the variation between windows; it cannot see what skipping changes (cores that skip planes at different times
+# contend less than in a full run), which is why screening results should be confirmed by full runs. A run whose
+# relative error exceeds the tolerance (default 5%), or whose cores have fewer than two windows, should be re-run in
+# full; "fallback" lists those without a full result yet from the result store, in the form sweep.py --configs reads.
+#
+#   python sweep.py --sample 16:1:1                          # time 1 plane in 16 after 1 warm-up plane
+#   python sampling.py report sweep-out/runs/<run>          # per-core windows and the extrapolated time
+#   python sampling.py fallback > rerun.txt && python sweep.py --configs rerun.txt
+############################################################################################################################
+from __future__ import print_function, division
+
+import argparse
+import math
+import os
+import re
+import sys
+
+DEFAULT_WINDOW = 2
+DEFAULT_WARMUP = 2
+TOLERANCE = 0.05
+
+SAMPLE_RE = re.compile(r"^SC19 sample: (\S+) planes (\d+) iterations (\d+) windows((?: \d+:\d+)*)\s*$", re.M)
+
+# Two-sided 95% quantiles of Student's t for 1..30 degrees of freedom; the normal quantile beyond
+T95 = [12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262, 2.228, 2.201, 2.179, 2.160, 2.145, 2.131,
+       2.120, 2.110, 2.101, 2.093, 2.086, 2.080, 2.074, 2.069, 2.064, 2.060, 2.056, 2.052, 2.048, 2.045, 2.042]
+
+
+def parse_spec(spec):
+    """(period, window, warmup) in z-planes from "PERIOD[:WINDOW[:WARMUP]]"; ValueError if malformed."""
+    parts = [int(p) for p in str(spec).split(":")]
+    if len(parts) > 3:
+        raise ValueError("bad sample " + spec)
+    period, window, warmup = parts + [DEFAULT_WINDOW, DEFAULT_WARMUP][len(parts) - 1:]
+    if period < 1 or window < 1 or warmup < 0 or window + warmup > period:
+        raise ValueError("bad sample " + spec)
+    return period, window, warmup
+
+
+def gen_params(spec):
+    """WorkloadGenerator parameters of a sample spec."""
+    period, window, warmup = parse_spec(spec)
+    return {"sample_period" : period, "sample_window" : window, "sample_warmup" : warmup}
+
+
+def fraction(spec):
+    """Fraction of the planes a sampled run simulates (1.0 without sampling)."""
+    if not spec:
+        return 1.0
+    period, window, warmup = parse_spec(spec)
+    return (window + warmup) / period
+
+
+def describe(spec):
+    period, window, warmup = parse_spec(spec)
+    return "every %d z-planes, %d timed after %d warm-up (%.1f%% of the planes simulated)" % (
+        period, window, warmup, 100.0 * fraction(spec))
+
+
+def parse_log(text):
+    """{generator : (planes of the slab over all iterations, [(planes, ps) of each window])} from a run's output."""
+    samples = {}
+    for match in SAMPLE_RE.finditer(text):
+        windows = [tuple(int(v) for v in w.split(":")) for w in match.group(4).split()]
+        samples[match.group(1)] = (int(match.group(2)) * int(match.group(3)), windows)
+    return samples
+
+
+def t95(df):
+    return T95[df - 1] if df <= len(T95) else 1.96
+
+
+def core_estimate(total, windows):
+    """(estimated ps for the slab, half width of the 95% interval or None with fewer than two windows)."""
+    planes = sum(p for p, _ in windows)
+    if planes == 0:
+        return None, None
+    rate = sum(t for _, t in windows) / planes
+    n = len(windows)
+    if n < 2:
+        return rate * total, None
+    # Ratio estimator: residuals of each window against the pooled rate, finite population correction for the share
+    # of the slab that was timed
+    s2 = sum((t - rate * p) ** 2 for p, t in windows) / (n - 1)
+    mean_planes = planes / n
+    se = math.sqrt(max(0.0, 1.0 - planes / total) * s2 / n) / mean_planes
+    return rate * total, t95(n - 1) * se * total
+
+
+def estimate(samples):
+    """Extrapolated run: {"time_ps", "low_ps", "high_ps", "rel_error" (None if unknown), "core" (the slowest),
+    "windows" (fewest of any core)}, or None without samples. The run ends with its slowest core, so the interval is
+    that of the maximum: from the largest lower to the largest upper bound."""
+    cores = {}
+    for name, (total, windows) in samples.items():
+        est, half = core_estimate(total, windows)
+        if est is not None:
+            cores[name] = (est, half)
+    if not cores:
+        return None
+    core = max(cores, key=lambda name: cores[name][0])
+    est = cores[core][0]
+    result = {"time_ps" : est, "low_ps" : None, "high_ps" : None, "rel_error" : None, "core" : core,
+              "windows" : min(len(windows) for _, windows in samples.values())}
+    if all(half is not None for _, half in cores.values()):
+        result["low_ps"] = max(e - h for e, h in cores.values())
+        result["high_ps"] = max(e + h for e, h in cores.values())
+        result["rel_error"] = (result["high_ps"] - result["low_ps"]) / 2 / est
+    return result
+
+
+def needs_full_run(result, tolerance=TOLERANCE):
+    return result is None or result["rel_error"] is None or result["rel_error"] > tolerance
+
+
+def format_time(result):
+    """Simulated time string of a sampled run, as sweep.py records it."""
+    error = "?" if result["rel_error"] is None else "%.1f%%" % (100.0 * result["rel_error"])
+    return "%.4f us +-%s" % (result["time_ps"] / 1e6, error)
+
+
+def read_log(path):
+    if os.path.isdir(path):
+        path = os.path.join(path, "sst.log")
+    with open(path) as f:
+        return f.read()
+
+
+def report(path, tolerance):
+    samples = parse_log(read_log(path))
+    result = estimate(samples)
+    if result is None:
+        print("No samples in %s (run with --sample=PERIOD[:WINDOW[:WARMUP]])" % path)
+        return 1
+    print("%-28s %8s %8s %8s %14s %12s" % ("generator", "planes", "windows", "timed", "estimate us", "+- us"))
+    for name in sorted(samples):
+        total, windows = samples[name]
+        est, half = core_estimate(total, windows)
+        print("%-28s %8d %8d %8d %14s %12s" % (name, total, len(windows), sum(p for p, _ in windows),
+                                                "-" if est is None else "%.4f" % (est / 1e6),
+                                                "-" if half is None else "%.4f" % (half / 1e6)))
+    print("Extrapolated simulated time: %s (slowest %s)" % (format_time(result), result["core"]))
+    if result["low_ps"] is not None:
+        print("95%% interval: %.4f - %.4f us" % (result["low_ps"] / 1e6, result["high_ps"] / 1e6))
+    if needs_full_run(result, tolerance):
+        print("Error above %.1f%% or unknown: confirm with a full run" % (100.0 * tolerance))
+    return 0
+
+
+def fallback(db, tolerance):
+    import catalog
+    import resultstore
+    store = resultstore.ResultStore(db)
+    count = 0
+    for rec in store.results():
+        cfg, extra = resultstore.split_options(store.cat, rec["options"])
+        if "--sample" not in resultstore.extra_options(extra):
+            continue
+        try:
+            result = estimate(parse_log(read_log(rec["log_path"])))
+        except IOError:
+            result = None
+        options = catalog.model_options(store.cat, cfg)
+        full = store.lookup(options)
+        if needs_full_run(result, tolerance) and (full is None or full["status"] not in ("ok", "dominated")):
+            print(options)
+            count += 1
+    store.close()
+    print("%d sampled runs above %.1f%% error" % (count, 100.0 * tolerance), file=sys.stderr)
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Extrapolate sampled runs and find the ones to re-run in full")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE,
+                        help="Relative error above which a full run is needed, default: %(default)s")
+    sub = parser.add_subparsers(dest="command")
+    rep = sub.add_parser("report", help="Windows of each generator and the extrapolated time of one run")
+    rep.add_argument("path", help="Run directory or SST output")
+    fb = sub.add_parser("fallback", help="Options of the sampled runs in the result store that need a full run")
+    fb.add_argument("--db", default=None, help="Result store, default: results.db next to this script")
+    args = parser.parse_args(argv)
+
+    if args.command == "report":
+        return report(args.path, args.tolerance)
+    if args.command == "fallback":
+        import resultstore
+        return fallback(args.db or resultstore.DEFAULT_DB, args.tolerance)
+    parser.print_help()
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,53 @@
+
+#include <sst_config.h>
+
+#include <new>
+
+#include "sc19common.h"
+
+using namespace SST::Miranda;
+
+namespace {
+
+// Requests per slab
+const size_t SLAB_REQUESTS = 4096;
+
+struct FreeRequest {
+  FreeRequest *next;
+};
+
+thread_local FreeRequest *freeRequests = nullptr;
+
+void refill() {
+  const size_t size = sizeof(PooledMemoryOpRequest);
+  char *slab = static_cast<char *>(::operator new(SLAB_REQUESTS * size));
+  for (size_t i = SLAB_REQUESTS; i > 0; i--) {
+    FreeRequest *req = reinterpret_cast<FreeRequest *>(slab + (i - 1) * size);
+    req->next = freeRequests;
+    freeRequests = req;
+  }
+}
+
+} // namespace
+
+void *PooledMemoryOpRequest::operator new(size_t size) {
+  if (size != sizeof(PooledMemoryOpRequest))
+    return ::operator new(size);
+  if (freeRequests == nullptr)
+    refill();
+  FreeRequest *req = freeRequests;
+  freeRequests = req->next;
+  return req;
+}
+
+void PooledMemoryOpRequest::operator delete(void *ptr, size_t size) {
+  if (ptr == nullptr)
+    return;
+  if (size != sizeof(PooledMemoryOpRequest)) {
+    ::operator delete(ptr);
+    return;
+  }
+  FreeRequest *req = static_cast<FreeRequest *>(ptr);
+  req->next = freeRequests;
+  freeRequests = req;
+}
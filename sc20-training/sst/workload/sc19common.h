@@ -0,0 +1,61 @@
+// Copyright 2009-2019 NTESS. Under the terms
+// of Contract DE-NA0003525 with NTESS, the U.S.
+// Government retains certain rights in this software.
+//
+// Copyright (c) 2009-2019, NTESS
+// All rights reserved.
+//
+// Portions are copyright of other developers:
+// See the file CONTRIBUTORS.TXT in the top level directory
+// the distribution for more information.
+//
+// This file is part of the SST software package. For license
+// information, see the LICENSE file in the top level directory of the
+// distribution.
+
+#ifndef _H_SST_MIRANDA_SC19_COMMON
+#define _H_SST_MIRANDA_SC19_COMMON
+
+#include <sst/core/output.h>
+#include <sst/elements/miranda/mirandaGenerator.h>
+
+#include <cstddef>
+
+// Verbose messages above this level are compiled out, arguments included
+// (make VERBOSE_MAX=16 for the per-request messages).
+#ifndef SC19_VERBOSE_MAX
+#define SC19_VERBOSE_MAX 4
+#endif
+
+#define SC19_VERBOSE(out, level, ...)                                          \
+  do {                                                                         \
+    if ((level) <= SC19_VERBOSE_MAX)                                           \
+      (out)->verbose(CALL_INFO, (level), 0, __VA_ARGS__);                      \
+  } while (0)
+
+namespace SST {
+namespace Miranda {
+
+// A MemoryOpRequest allocated from a per-thread free list instead of the
+// heap. Miranda deletes completed requests through GeneratorRequest, whose
+// virtual destructor selects the operator delete below. Freed requests go to
+// the free list of the deleting thread; slabs are never returned, so the
+// pool holds the peak number of requests in flight.
+class PooledMemoryOpRequest : public MemoryOpRequest {
+
+public:
+  PooledMemoryOpRequest(const uint64_t addr, const uint64_t length,
+                        const ReqOperation op)
+      : MemoryOpRequest(addr, length, op) {}
+
+  // The generator's address hash (interleave.py) moves a request once made
+  void setAddress(const uint64_t newAddr) { addr = newAddr; }
+
+  static void *operator new(size_t size);
+  static void operator delete(void *ptr, size_t size);
+};
+
+} // namespace Miranda
+} // namespace SST
+
+#endif
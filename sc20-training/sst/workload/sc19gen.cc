@@ -1,13 +1,47 @@
 
 #include <sst/core/params.h>
 #include <sst/core/rng/xorshift.h>
+#include <sst/core/unitAlgebra.h>
 #include <sst_config.h>
 
+#include <chrono>
+#include <cstring>
+#include <limits>
+
 #include "sc19gen.h"
 
+#include <atomic>
+
 using namespace SST::RNG;
 using namespace SST::Miranda;
 
+// Iterations of a phase cycle: two stencil sweeps and a histogram update
+static const uint32_t PHASE_CYCLE = 3;
+
+// Generators of this process that stop on convergence, and how many of them
+// have converged; they stop together so that the last cycles keep the
+// contention of every core running
+static std::atomic<uint32_t> convergingGenerators(0);
+static std::atomic<uint32_t> convergedGenerators(0);
+
+// Heartbeat: points of a full run of every generator of the process, points
+// done, and the wall-clock times (steady clock ns) of the first point and of
+// the next heartbeat. Generators add their points every HEARTBEAT_POINTS.
+static std::atomic<uint64_t> processPoints(0);
+static std::atomic<uint64_t> processDone(0);
+static std::atomic<int64_t> heartbeatStart(0);
+static std::atomic<int64_t> nextHeartbeat(0);
+static const uint64_t HEARTBEAT_POINTS = 1024;
+
+static const SST::SimTime_t NEVER =
+    std::numeric_limits<SST::SimTime_t>::max();
+
+static int64_t wallNs() {
+  return std::chrono::duration_cast<std::chrono::nanoseconds>(
+             std::chrono::steady_clock::now().time_since_epoch())
+      .count();
+}
+
 WorkloadGenerator::WorkloadGenerator(Component *owner, Params &params)
     : RequestGenerator(owner, params) {
   build(params);
@@ -35,6 +69,16 @@ void WorkloadGenerator::build(Params &params) {
   endY = params.find<uint32_t>("endy", 30);
   endZ = params.find<uint32_t>("endz", 30);
 
+  // With ystep > 1 the sweep visits rows beginY, beginY + ystep, ...; endY
+  // becomes the last of them, where an iteration ends
+  ystep = params.find<uint32_t>("ystep", 1);
+  if (ystep == 0)
+    ystep = 1;
+  endY = beginY + ((endY - beginY) / ystep) * ystep;
+
+  hashShift = params.find<uint32_t>("hash_shift", 6);
+  hashBits = params.find<uint32_t>("hash_bits", 0);
+
   histoslots = params.find<uint32_t>("histoslots", 32);
   histoindex = 0;
 
@@ -43,11 +87,103 @@ void WorkloadGenerator::build(Params &params) {
   currentY = beginY;
   currentZ = beginZ;
 
+  strideY = 8 * static_cast<uint64_t>(meshX);
+  strideZ = strideY * meshY;
+  pointAddr = rowAddr = planeAddr = getMemoryLocation(beginX, beginY, beginZ);
+
+  batch = params.find<uint32_t>("batch", 1);
+  if (batch == 0)
+    batch = 1;
+
   uint32_t seed = params.find<uint32_t>("seed", 101011);
   rng = new XORShiftRNG(seed);
 
   phase = false;
 
+  trace = nullptr;
+  const std::string tracePath = params.find<std::string>("trace_record", "");
+  if (!tracePath.empty()) {
+    SC19TraceHeader header;
+    memset(&header, 0, sizeof(header));
+    memcpy(header.magic, SC19_TRACE_MAGIC, sizeof(SC19_TRACE_MAGIC));
+    header.version = SC19_TRACE_VERSION;
+    header.recordSize = sizeof(SC19TraceRecord);
+    header.meshX = meshX;
+    header.meshY = meshY;
+    header.meshZ = meshZ;
+    header.beginX = beginX;
+    header.beginY = beginY;
+    header.beginZ = beginZ;
+    header.endX = endX;
+    header.endY = endY;
+    header.endZ = endZ;
+    header.ystep = ystep;
+    header.hashShift = hashShift;
+    header.hashBits = hashBits;
+    header.iterations = maxItr;
+    header.histoslots = histoslots;
+    header.seed = seed;
+    trace = new TraceWriter(tracePath, header, out);
+  }
+
+  samplePeriod = params.find<uint32_t>("sample_period", 0);
+  sampleWindow = params.find<uint32_t>("sample_window", 2);
+  sampleWarmup = params.find<uint32_t>("sample_warmup", 2);
+  if (samplePeriod != 0) {
+    if (sampleWindow == 0 || sampleWarmup + sampleWindow > samplePeriod)
+      out->fatal(CALL_INFO, -1,
+                 "sample_window must be at least 1 and sample_warmup + "
+                 "sample_window at most sample_period\n");
+    // A trace must hold the full request stream
+    if (trace != nullptr)
+      out->fatal(CALL_INFO, -1,
+                 "A sampled run cannot record a trace (trace_record)\n");
+  }
+  windowOpen = false;
+  windowPlanes = 0;
+  windowStart = 0;
+  sampleReported = false;
+
+  convergeTolerance = params.find<double>("converge_tolerance", 0);
+  if (convergeTolerance > 0) {
+    // A trace must hold every iteration
+    if (trace != nullptr)
+      out->fatal(CALL_INFO, -1,
+                 "A converging run cannot record a trace (trace_record)\n");
+    convergingGenerators++;
+  }
+  iterationStart = 0;
+  converged = false;
+  iterationsReported = false;
+
+  statPoints = registerStatistic<uint64_t>("points");
+  statReads = registerStatistic<uint64_t>("read_requests");
+  statWrites = registerStatistic<uint64_t>("write_requests");
+  statBlocked = registerStatistic<uint64_t>("blocked_time");
+  statCompletion = registerStatistic<uint64_t>("completion_time");
+  statQueueDepth = registerStatistic<uint64_t>("queue_depth");
+  picoseconds = getTimeConverter("1ps");
+  // Statistics that are not enabled are NullStatistics, which still report
+  // isEnabled(); queue_depth has its own, higher load level
+  statsOn = !statPoints->isNullStatistic();
+  queueDepthOn = !statQueueDepth->isNullStatistic();
+  const UnitAlgebra clock(params.find<std::string>("clock", "2GHz"));
+  clockPeriod = static_cast<SimTime_t>(1e12 / clock.getDoubleValue() + 0.5);
+  lastGenerate = NEVER;
+  completionRecorded = false;
+
+  // An iteration ends on its last point without generating it
+  heartbeat = params.find<double>("heartbeat", 0);
+  pointsPerIteration =
+      endX < beginX || endZ < beginZ
+          ? 0
+          : static_cast<uint64_t>(endX - beginX + 1) *
+                    ((endY - beginY) / ystep + 1) * (endZ - beginZ + 1) -
+                1;
+  unreported = 0;
+  if (heartbeat > 0)
+    processPoints += pointsPerIteration * maxItr;
+
   out->verbose(CALL_INFO, 4, 0, "Parameters for SC19 Workload:\n");
   out->verbose(CALL_INFO, 4, 0, "-> Mesh-X:              %10" PRIu32 "\n",
                meshX);
@@ -61,6 +197,8 @@ void WorkloadGenerator::build(Params &params) {
   out->verbose(CALL_INFO, 4, 0,
                "-> Local Y:             %10" PRIu32 " - %10" PRIu32 "\n",
                beginY, endY);
+  out->verbose(CALL_INFO, 4, 0, "-> Y step:              %10" PRIu32 "\n",
+               ystep);
   out->verbose(CALL_INFO, 4, 0,
                "-> Local Z:             %10" PRIu32 " - %10" PRIu32 "\n",
                beginZ, endZ);
@@ -68,13 +206,47 @@ void WorkloadGenerator::build(Params &params) {
                maxItr);
   out->verbose(CALL_INFO, 4, 0, "-> Histo-Slots:         %10" PRIu32 "\n",
                histoslots);
+  out->verbose(CALL_INFO, 4, 0, "-> Batch:               %10" PRIu32 "\n",
+               batch);
+  out->verbose(CALL_INFO, 4, 0,
+               "-> Sample:              %10" PRIu32 " / %" PRIu32
+               " / %" PRIu32 "\n",
+               samplePeriod, sampleWindow, sampleWarmup);
+  out->verbose(CALL_INFO, 4, 0, "-> Converge tolerance:  %10f\n",
+               convergeTolerance);
+  out->verbose(CALL_INFO, 4, 0, "-> Heartbeat:           %10f\n", heartbeat);
 }
 
 WorkloadGenerator::~WorkloadGenerator() {
+  delete trace;
   delete rng;
   delete out;
 }
 
+void WorkloadGenerator::push(MirandaRequestQueue<GeneratorRequest *> *q,
+                             MemoryOpRequest *req, uint8_t depmask,
+                             bool groupEnd) {
+  if (hashBits != 0)
+    static_cast<PooledMemoryOpRequest *>(req)->setAddress(
+        hashAddress(req->getAddress()));
+  if (trace != nullptr)
+    trace->append(req, depmask, groupEnd);
+  if (statsOn)
+    (req->getOperation() == READ ? statReads : statWrites)->addData(1);
+  q->push_back(req);
+}
+
+// XOR-fold every hashBits-wide chunk of the unit index (addr >> hashShift)
+// above its low hashBits bits into them. A bijection that keeps each address
+// within its block of 2^hashBits units; interleave.py mirrors it.
+uint64_t WorkloadGenerator::hashAddress(uint64_t addr) const {
+  uint64_t fold = 0;
+  for (uint64_t high = (addr >> hashShift) >> hashBits; high != 0;
+       high >>= hashBits)
+    fold ^= high;
+  return addr ^ ((fold & ((UINT64_C(1) << hashBits) - 1)) << hashShift);
+}
+
 uint64_t WorkloadGenerator::getMemoryLocation(const uint32_t x,
                                               const uint32_t y,
                                               const uint32_t z) {
@@ -83,7 +255,32 @@ uint64_t WorkloadGenerator::getMemoryLocation(const uint32_t x,
 }
 
 void WorkloadGenerator::generate(MirandaRequestQueue<GeneratorRequest *> *q) {
-  out->verbose(CALL_INFO, 16, 0,
+  // The core asks every cycle while its queue has room, so a longer gap is
+  // time it was blocked
+  if (statsOn) {
+    const SimTime_t now = getCurrentSimTime(picoseconds);
+    if (lastGenerate != NEVER && now - lastGenerate > clockPeriod)
+      statBlocked->addData(now - lastGenerate - clockPeriod);
+    lastGenerate = now;
+  }
+  if (queueDepthOn)
+    statQueueDepth->addData(q->size());
+  if (heartbeat > 0 && heartbeatStart == 0) {
+    int64_t unset = 0;
+    const int64_t start = wallNs();
+    if (heartbeatStart.compare_exchange_strong(unset, start))
+      nextHeartbeat = start + static_cast<int64_t>(heartbeat * 1e9);
+  }
+
+  // Each point still ends its own group in a trace, so traces do not depend
+  // on the batch size
+  for (uint32_t i = 0; i < batch && currentItr < maxItr; i++)
+    generatePoint(q);
+}
+
+void WorkloadGenerator::generatePoint(
+    MirandaRequestQueue<GeneratorRequest *> *q) {
+  SC19_VERBOSE(out, 16,
                "%s, Itr=%5" PRIu32 ", Phase=%d, X=%" PRIu32 ", Y=%8" PRIu32
                ", Z=%8" PRIu32 "\n",
                getName().c_str(), currentItr, phase, currentX, currentY,
@@ -91,13 +288,25 @@ void WorkloadGenerator::generate(MirandaRequestQueue<GeneratorRequest *> *q) {
 
   if (currentZ == endZ && currentY == endY && currentX == endX) {
 
-    out->verbose(CALL_INFO, 4, 0, "Iteration %" PRIu32 " is complete.\n",
-                 currentItr);
+    SC19_VERBOSE(out, 4, "Iteration %" PRIu32 " is complete.\n", currentItr);
+    if (windowOpen)
+      closeWindow();
+
+    const SimTime_t now = getCurrentSimTime(picoseconds);
+    iterationTimes.push_back(now - iterationStart);
+    iterationStart = now;
 
     currentItr++;
+    if (convergeTolerance > 0 && currentItr < maxItr && steady()) {
+      SC19_VERBOSE(out, 4, "%s converged after %" PRIu32 " iterations.\n",
+                   getName().c_str(), currentItr);
+      progress((maxItr - currentItr) * pointsPerIteration);
+      currentItr = maxItr;
+    }
     currentX = beginX;
     currentY = beginY;
     currentZ = beginZ;
+    pointAddr = rowAddr = planeAddr = getMemoryLocation(beginX, beginY, beginZ);
 
     histoindex = 0;
     if ((currentItr % 3) == 2) {
@@ -105,37 +314,46 @@ void WorkloadGenerator::generate(MirandaRequestQueue<GeneratorRequest *> *q) {
     } else {
       phase = false;
     }
+    return;
+  }
 
-  } else if (phase) {
-    if (currentX > endX) {
-      if (currentY < endY) {
-        currentX = beginX;
-        currentY++;
-      } else {
-        currentX = beginX;
-        currentY = beginY;
-        currentZ++;
-      }
+  if (currentX > endX) {
+    if (currentY < endY) {
+      currentX = beginX;
+      currentY += ystep;
+      rowAddr += strideY * ystep;
+    } else {
+      currentX = beginX;
+      currentY = beginY;
+      currentZ++;
+      planeAddr += strideZ;
+      rowAddr = planeAddr;
     }
+    pointAddr = rowAddr;
+  }
+
+  if (samplePeriod != 0 && currentX == beginX && currentY == beginY)
+    startPlane();
 
+  if (phase) {
     MemoryOpRequest *read_histo =
-        new MemoryOpRequest((histoindex * 8), 8, READ);
+        new PooledMemoryOpRequest((histoindex * 8), 8, READ);
     uint64_t do_write = (rng->generateNextUInt64() % 2);
     if (do_write == 1) {
-      MemoryOpRequest *update_mesh = new MemoryOpRequest(
-          getMemoryLocation(currentX, currentY, currentZ), 8, WRITE);
+      MemoryOpRequest *update_mesh =
+          new PooledMemoryOpRequest(pointAddr, 8, WRITE);
       update_mesh->addDependency(read_histo->getRequestID());
-      q->push_back(read_histo);
-      q->push_back(update_mesh);
-      out->verbose(
-          CALL_INFO, 8, 0,
+      push(q, read_histo, 0, false);
+      push(q, update_mesh, 0x1, true);
+      SC19_VERBOSE(
+          out, 8,
           "%s, Itr=%5" PRIu32 ", Phase=%d, X=%" PRIu32 ", Y=%8" PRIu32
           ", Z=%8" PRIu32 ", RAddr=0x%" PRIx64 ", WAddr=0x%" PRIx64 "\n",
           getName().c_str(), currentItr, phase, currentX, currentY, currentZ,
           read_histo->getAddress(), update_mesh->getAddress());
     } else {
-      q->push_back(read_histo);
-      out->verbose(CALL_INFO, 8, 0,
+      push(q, read_histo, 0, true);
+      SC19_VERBOSE(out, 8,
                    "%s, Itr=%5" PRIu32 ", Phase=%d, X=%" PRIu32 ", Y=%8" PRIu32
                    ", Z=%8" PRIu32 ", RAddr=0x%" PRIx64 "\n",
                    getName().c_str(), currentItr, phase, currentX, currentY,
@@ -145,39 +363,30 @@ void WorkloadGenerator::generate(MirandaRequestQueue<GeneratorRequest *> *q) {
     histoindex++;
     if (histoindex == histoslots)
       histoindex = 0;
-    currentX++;
   } else {
-    if (currentX > endX) {
-      if (currentY < endY) {
-        currentX = beginX;
-        currentY++;
-      } else {
-        currentX = beginX;
-        currentY = beginY;
-        currentZ++;
-      }
-    }
-
-    MemoryOpRequest *read_xone_req = new MemoryOpRequest(
-        getMemoryLocation(currentX + 1, currentY, currentZ), 8, READ);
-    MemoryOpRequest *read_xnegone_req = new MemoryOpRequest(
-        getMemoryLocation(currentX - 1, currentY, currentZ), 8, READ);
-    MemoryOpRequest *read_center_req = new MemoryOpRequest(
-        getMemoryLocation(currentX, currentY, currentZ), 8, READ);
-    MemoryOpRequest *read_yone_req = new MemoryOpRequest(
-        getMemoryLocation(currentX, currentY + 1, currentZ), 8, READ);
-    MemoryOpRequest *read_ynegone_req = new MemoryOpRequest(
-        getMemoryLocation(currentX, currentY - 1, currentZ), 8, READ);
-    MemoryOpRequest *read_zone_req = new MemoryOpRequest(
-        getMemoryLocation(currentX, currentY, currentZ + 1), 8, READ);
-    MemoryOpRequest *read_znegone_req = new MemoryOpRequest(
-        getMemoryLocation(currentX, currentY, currentZ - 1), 8, READ);
+    // Created in this order to keep the request IDs of the original
+    // generator
+    MemoryOpRequest *read_xone_req =
+        new PooledMemoryOpRequest(pointAddr + 8, 8, READ);
+    MemoryOpRequest *read_xnegone_req =
+        new PooledMemoryOpRequest(pointAddr - 8, 8, READ);
+    MemoryOpRequest *read_center_req =
+        new PooledMemoryOpRequest(pointAddr, 8, READ);
+    MemoryOpRequest *read_yone_req =
+        new PooledMemoryOpRequest(pointAddr + strideY, 8, READ);
+    MemoryOpRequest *read_ynegone_req =
+        new PooledMemoryOpRequest(pointAddr - strideY, 8, READ);
+    MemoryOpRequest *read_zone_req =
+        new PooledMemoryOpRequest(pointAddr + strideZ, 8, READ);
+    MemoryOpRequest *read_znegone_req =
+        new PooledMemoryOpRequest(pointAddr - strideZ, 8, READ);
 
     const uint64_t write_loc = (rng->generateNextUInt64() % histoslots) * 8;
-    out->verbose(CALL_INFO, 4, 0, "Histo-slot: %" PRIu64 "\n", write_loc);
-    MemoryOpRequest *write_histo = new MemoryOpRequest(write_loc, 8, WRITE);
+    SC19_VERBOSE(out, 8, "Histo-slot: %" PRIu64 "\n", write_loc);
+    MemoryOpRequest *write_histo =
+        new PooledMemoryOpRequest(write_loc, 8, WRITE);
 
-    out->verbose(CALL_INFO, 8, 0,
+    SC19_VERBOSE(out, 8,
                  "%s, Itr=%5" PRIu32 ", Phase=%d, X=%" PRIu32 ", Y=%8" PRIu32
                  ", Z=%8" PRIu32 ", R0=0x%" PRIx64 ", R1=%" PRIx64
                  ", R2=0x%" PRIx64 ", R3=%" PRIx64 ", R4=0x%" PRIx64
@@ -197,20 +406,165 @@ void WorkloadGenerator::generate(MirandaRequestQueue<GeneratorRequest *> *q) {
     write_histo->addDependency(read_xone_req->getRequestID());
     write_histo->addDependency(read_xnegone_req->getRequestID());
 
-    q->push_back(read_center_req);
-    q->push_back(read_xone_req);
-    q->push_back(read_xnegone_req);
-    q->push_back(read_yone_req);
-    q->push_back(read_ynegone_req);
-    q->push_back(read_zone_req);
-    q->push_back(read_znegone_req);
+    push(q, read_center_req, 0, false);
+    push(q, read_xone_req, 0, false);
+    push(q, read_xnegone_req, 0, false);
+    push(q, read_yone_req, 0, false);
+    push(q, read_ynegone_req, 0, false);
+    push(q, read_zone_req, 0, false);
+    push(q, read_znegone_req, 0, false);
 
-    q->push_back(write_histo);
+    // Depends on the seven reads just before it
+    push(q, write_histo, 0x7f, true);
+  }
+
+  if (statsOn)
+    statPoints->addData(1);
+  progress(1);
+  currentX++;
+  pointAddr += 8;
+}
+
+// Called at the first point of every plane of a sampled run. Each period of
+// samplePeriod planes (counted from beginZ in every iteration) starts with
+// sampleWarmup planes simulated untimed, then sampleWindow timed planes; the
+// rest of the period is skipped. The last plane of the slab is never skipped,
+// so the end of an iteration is still reached the usual way.
+void WorkloadGenerator::startPlane() {
+  for (;;) {
+    const uint32_t pos = (currentZ - beginZ) % samplePeriod;
+    const bool timed = pos >= sampleWarmup && pos < sampleWarmup + sampleWindow;
+    if (windowOpen && !timed)
+      closeWindow();
+    if (timed) {
+      if (!windowOpen) {
+        windowOpen = true;
+        windowPlanes = 0;
+        windowStart = getCurrentSimTime(picoseconds);
+      }
+      windowPlanes++;
+      return;
+    }
+    if (pos < sampleWarmup || currentZ == endZ)
+      return;
+
+    // Fast-forward: draw the random numbers the points of the plane would
+    // have used, so the planes simulated see the stream of a full run
+    const uint64_t points =
+        static_cast<uint64_t>(endX - beginX + 1) * ((endY - beginY) / ystep + 1);
+    for (uint64_t i = 0; i < points; i++)
+      rng->generateNextUInt64();
+    if (phase)
+      histoindex = (histoindex + points) % histoslots;
+    progress(points);
+
+    SC19_VERBOSE(out, 4, "%s, Itr=%5" PRIu32 ", skipping plane Z=%" PRIu32 "\n",
+                 getName().c_str(), currentItr, currentZ);
+    currentZ++;
+    planeAddr += strideZ;
+    pointAddr = rowAddr = planeAddr;
+  }
+}
 
-    currentX++;
+// At the end of every phase cycle, compare its time with the previous cycle.
+// True once this and every other converging generator of the process has
+// converged; a generator keeps running until then.
+bool WorkloadGenerator::steady() {
+  const size_t n = iterationTimes.size();
+  if (n % PHASE_CYCLE != 0 || n < 2 * PHASE_CYCLE)
+    return false;
+  if (!converged) {
+    SimTime_t last = 0;
+    SimTime_t previous = 0;
+    for (size_t i = n - PHASE_CYCLE; i < n; i++) {
+      last += iterationTimes[i];
+      previous += iterationTimes[i - PHASE_CYCLE];
+    }
+    const double change = last > previous ? last - previous : previous - last;
+    if (change <= convergeTolerance * previous) {
+      converged = true;
+      convergedGenerators++;
+    }
   }
+  return converged && convergedGenerators == convergingGenerators;
 }
 
-bool WorkloadGenerator::isFinished() { return currentItr == maxItr; }
+// Adds points done to the process totals every HEARTBEAT_POINTS and once the
+// generator is finished, and prints a heartbeat when one is due (read by
+// heartbeat.py): progress of all the generators of the process, the
+// simulated time and the wall-clock time to go at the rate so far. The
+// generator that finishes the process's last point prints a final one.
+void WorkloadGenerator::progress(uint64_t points) {
+  if (heartbeat <= 0)
+    return;
+  unreported += points;
+  if (unreported < HEARTBEAT_POINTS && currentItr < maxItr)
+    return;
+  const uint64_t added = unreported;
+  const uint64_t total = processPoints;
+  const uint64_t done = processDone += added;
+  const bool last = done == total && added > 0;
+  unreported = 0;
+
+  const int64_t now = wallNs();
+  int64_t due = nextHeartbeat;
+  if (!last && now < due)
+    return;
+  if (!last && !nextHeartbeat.compare_exchange_strong(
+                   due, now + static_cast<int64_t>(heartbeat * 1e9)))
+    return;
+  const double wall = (now - heartbeatStart) * 1e-9;
+  out->output("SC19 heartbeat: %.2f%% points %" PRIu64 " of %" PRIu64
+              " simulated %" PRIu64 " ps wall %.1f s eta %.1f s\n",
+              total ? 100.0 * done / total : 100.0, done, total,
+              static_cast<uint64_t>(getCurrentSimTime(picoseconds)), wall,
+              done ? wall * (total - done) / done : 0.0);
+}
+
+// Window times are taken when the generator hands out the first point of a
+// plane, so both ends lead the memory system by the request queue
+void WorkloadGenerator::closeWindow() {
+  windows.push_back(
+      std::make_pair(windowPlanes, getCurrentSimTime(picoseconds) - windowStart));
+  windowOpen = false;
+}
+
+bool WorkloadGenerator::isFinished() {
+  if (currentItr == maxItr && !completionRecorded) {
+    const SimTime_t now = getCurrentSimTime(picoseconds);
+    statCompletion->addData(now);
+    if (heartbeat > 0)
+      out->output("SC19 finished: %s %" PRIu64 " ps\n", getName().c_str(),
+                  static_cast<uint64_t>(now));
+    completionRecorded = true;
+    progress(0);
+  }
+  if (currentItr == maxItr && trace != nullptr) {
+    trace->finish();
+    delete trace;
+    trace = nullptr;
+  }
+  if (currentItr == maxItr && samplePeriod != 0 && !sampleReported) {
+    // Read by sampling.py, which extrapolates the time of the full slab
+    std::string list;
+    for (const auto &w : windows)
+      list += " " + std::to_string(w.first) + ":" + std::to_string(w.second);
+    out->output("SC19 sample: %s planes %" PRIu32 " iterations %" PRIu32
+                " windows%s\n",
+                getName().c_str(), endZ - beginZ + 1, maxItr, list.c_str());
+    sampleReported = true;
+  }
+  if (currentItr == maxItr && (maxItr > 1 || convergeTolerance > 0) &&
+      !iterationsReported) {
+    // Read by iterations.py
+    std::string list;
+    for (const auto t : iterationTimes)
+      list += " " + std::to_string(t);
+    out->output("SC19 iterations: %s converged %s times%s\n",
+                getName().c_str(), converged ? "yes" : "no", list.c_str());
+    iterationsReported = true;
+  }
+  return currentItr == maxItr;
+}
 
 void WorkloadGenerator::completed() {}
@@ -18,9 +18,17 @@
 
 #include <sst/core/output.h>
 #include <sst/core/rng/sstrng.h>
+#include <sst/core/statapi/statbase.h>
+#include <sst/core/timeConverter.h>
 #include <sst/elements/miranda/mirandaGenerator.h>
 
 #include <queue>
+#include <string>
+#include <utility>
+#include <vector>
+
+#include "sc19common.h"
+#include "sc19trace.h"
 
 using namespace SST::RNG;
 
@@ -58,9 +66,53 @@ public:
       {"meshx", "Local ending point in X", "32"},
       {"meshy", "Local ending point in Y", "32"},
       {"meshz", "Local ending point in Z", "32"},
+      {"ystep", "Sweep every ystep-th row from beginy (SMT threads "
+                "interleaving rows)", "1"},
+      {"hash_bits", "XOR-fold the higher bits of every address into this "
+                    "many low bits of its unit index (0 leaves addresses as "
+                    "they are)", "0"},
+      {"hash_shift", "log2 of the bytes of a hash unit", "6"},
       {"iterations", "Number of iterations to perform", "1"},
-      {"seed", "Random number seed", "10101"}, )
+      {"seed", "Random number seed", "10101"},
+      {"trace_record", "Also write the request stream to this trace file "
+                       "(replay it with sc19.TraceGenerator)", ""},
+      {"batch", "Mesh points to generate per call", "1"},
+      {"sample_period", "Sampled run: of every period of this many z-planes, "
+                        "simulate the warm-up and window planes and skip the "
+                        "rest (0 simulates every plane)", "0"},
+      {"sample_window", "Sampled run: z-planes timed per period", "2"},
+      {"sample_warmup", "Sampled run: z-planes simulated before each window "
+                        "to warm the caches", "2"},
+      {"converge_tolerance", "Stop before 'iterations' once the time of a "
+                             "phase cycle (three iterations) is within this "
+                             "fraction of the previous cycle on every "
+                             "generator (0 runs every iteration)", "0"},
+      {"clock", "Clock of the core, for the time it is blocked", "2GHz"},
+      {"heartbeat", "Print the progress of the generators of the process "
+                    "with an ETA every this many wall-clock seconds (0 "
+                    "never)", "0"}, )
+
+  SST_ELI_DOCUMENT_STATISTICS(
+      {"points", "Mesh points generated", "points", 1},
+      {"read_requests", "Read requests issued", "requests", 1},
+      {"write_requests", "Write requests issued", "requests", 1},
+      {"blocked_time", "Time the core did not ask for points because its "
+                       "queue was full of requests waiting on their "
+                       "dependencies or on free MSHRs", "ps", 1},
+      {"completion_time", "Time the generator handed out its last point",
+       "ps", 1},
+      {"queue_depth", "Requests waiting in the core's queue when it asks for "
+                      "points", "requests", 2}, )
 private:
+  void generatePoint(MirandaRequestQueue<GeneratorRequest *> *q);
+  void push(MirandaRequestQueue<GeneratorRequest *> *q, MemoryOpRequest *req,
+            uint8_t depmask, bool groupEnd);
+  uint64_t hashAddress(uint64_t addr) const;
+  void startPlane();
+  void closeWindow();
+  bool steady();
+  void progress(uint64_t points);
+
   uint32_t meshX;
   uint32_t meshY;
   uint32_t meshZ;
@@ -71,21 +123,73 @@ private:
 
   uint32_t endX;
   uint32_t endY;
+  uint32_t ystep;
+  uint32_t hashShift;
+  uint32_t hashBits;
   uint32_t endZ;
 
   uint32_t currentX;
   uint32_t currentY;
   uint32_t currentZ;
 
+  // Addresses of (currentX, currentY, currentZ), (beginX, currentY, currentZ)
+  // and (beginX, beginY, currentZ), advanced by the strides of the sweep
+  uint64_t pointAddr;
+  uint64_t rowAddr;
+  uint64_t planeAddr;
+  uint64_t strideY;
+  uint64_t strideZ;
+
   uint32_t maxItr;
   uint32_t currentItr;
   uint32_t histoslots;
   uint32_t histoindex;
 
   bool phase;
+  uint32_t batch;
+
+  // Sampling: planes and simulated picoseconds of each timed window
+  uint32_t samplePeriod;
+  uint32_t sampleWindow;
+  uint32_t sampleWarmup;
+  bool windowOpen;
+  uint32_t windowPlanes;
+  SimTime_t windowStart;
+  std::vector<std::pair<uint32_t, SimTime_t>> windows;
+  bool sampleReported;
+
+  // Simulated picoseconds of each iteration, for cold and steady-state times
+  std::vector<SimTime_t> iterationTimes;
+  SimTime_t iterationStart;
+  double convergeTolerance;
+  bool converged;
+  bool iterationsReported;
+
+  // Simulated time is read in picoseconds throughout
+  TimeConverter *picoseconds;
+
+  // Statistics; the core's clock period and the time it last asked for points
+  Statistic<uint64_t> *statPoints;
+  Statistic<uint64_t> *statReads;
+  Statistic<uint64_t> *statWrites;
+  Statistic<uint64_t> *statBlocked;
+  Statistic<uint64_t> *statCompletion;
+  Statistic<uint64_t> *statQueueDepth;
+  bool statsOn;
+  bool queueDepthOn;
+  SimTime_t clockPeriod;
+  SimTime_t lastGenerate;
+  bool completionRecorded;
+
+  // Heartbeat: points of a full run and points done but not yet added to the
+  // process totals
+  double heartbeat;
+  uint64_t pointsPerIteration;
+  uint64_t unreported;
 
   SSTRandom *rng;
   Output *out;
+  TraceWriter *trace;
 };
 
 } // namespace Miranda
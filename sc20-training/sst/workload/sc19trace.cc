@@ -0,0 +1,146 @@
+
+#include <sst/core/params.h>
+#include <sst_config.h>
+
+#include <cstring>
+#include <fcntl.h>
+#include <sys/mman.h>
+#include <sys/stat.h>
+#include <unistd.h>
+
+#include "sc19trace.h"
+
+using namespace SST::Miranda;
+
+TraceWriter::TraceWriter(const std::string &path,
+                         const SC19TraceHeader &header, Output *out)
+    : path(path), header(header), out(out) {
+  tmpPath = path + ".tmp." + std::to_string(getpid());
+  file = fopen(tmpPath.c_str(), "wb");
+  if (file == nullptr) {
+    out->fatal(CALL_INFO, -1, "Cannot write trace %s\n", tmpPath.c_str());
+  }
+  // Placeholder header, rewritten with the record count by finish()
+  fwrite(&this->header, sizeof(SC19TraceHeader), 1, file);
+  buffer.reserve(1 << 16);
+}
+
+TraceWriter::~TraceWriter() {
+  if (file != nullptr) {
+    // The stream did not run to the end: drop the partial trace
+    fclose(file);
+    unlink(tmpPath.c_str());
+  }
+}
+
+void TraceWriter::append(const MemoryOpRequest *req, uint8_t depmask,
+                         bool groupEnd) {
+  SC19TraceRecord rec;
+  rec.addr = req->getAddress();
+  rec.size = static_cast<uint32_t>(req->getLength());
+  rec.op = (req->getOperation() == WRITE) ? SC19_TRACE_OP_WRITE
+                                          : SC19_TRACE_OP_READ;
+  rec.depmask = depmask;
+  rec.flags = groupEnd ? SC19_TRACE_GROUP_END : 0;
+  buffer.push_back(rec);
+  header.count++;
+  if (buffer.size() == buffer.capacity())
+    flush();
+}
+
+void TraceWriter::flush() {
+  if (!buffer.empty() &&
+      fwrite(buffer.data(), sizeof(SC19TraceRecord), buffer.size(), file) !=
+          buffer.size()) {
+    out->fatal(CALL_INFO, -1, "Error writing trace %s\n", tmpPath.c_str());
+  }
+  buffer.clear();
+}
+
+void TraceWriter::finish() {
+  flush();
+  fseek(file, 0, SEEK_SET);
+  fwrite(&header, sizeof(SC19TraceHeader), 1, file);
+  if (fclose(file) != 0 || rename(tmpPath.c_str(), path.c_str()) != 0) {
+    out->fatal(CALL_INFO, -1, "Error finishing trace %s\n", path.c_str());
+  }
+  file = nullptr;
+  out->verbose(CALL_INFO, 4, 0, "Recorded %" PRIu64 " requests to %s\n",
+               header.count, path.c_str());
+}
+
+TraceGenerator::TraceGenerator(Component *owner, Params &params)
+    : RequestGenerator(owner, params) {
+  build(params);
+}
+
+TraceGenerator::TraceGenerator(ComponentId_t id, Params &params)
+    : RequestGenerator(id, params) {
+  build(params);
+}
+
+void TraceGenerator::build(Params &params) {
+  const uint32_t verbose = params.find<uint32_t>("verbose", 0);
+  out = new Output("SC19Trace[@p:@l]: ", verbose, 0, Output::STDOUT);
+
+  const std::string path = params.find<std::string>("trace", "");
+  const int fd = open(path.c_str(), O_RDONLY);
+  struct stat st;
+  if (fd < 0 || fstat(fd, &st) != 0) {
+    out->fatal(CALL_INFO, -1, "Cannot open trace \"%s\"\n", path.c_str());
+  }
+  mapLength = st.st_size;
+  map = mmap(nullptr, mapLength, PROT_READ, MAP_PRIVATE, fd, 0);
+  close(fd);
+  if (map == MAP_FAILED || mapLength < sizeof(SC19TraceHeader)) {
+    out->fatal(CALL_INFO, -1, "Cannot map trace %s\n", path.c_str());
+  }
+  madvise(map, mapLength, MADV_SEQUENTIAL);
+
+  const SC19TraceHeader *header = static_cast<const SC19TraceHeader *>(map);
+  if (memcmp(header->magic, SC19_TRACE_MAGIC, sizeof(SC19_TRACE_MAGIC)) != 0 ||
+      header->version != SC19_TRACE_VERSION ||
+      header->recordSize != sizeof(SC19TraceRecord) ||
+      mapLength != sizeof(SC19TraceHeader) +
+                       header->count * sizeof(SC19TraceRecord)) {
+    out->fatal(CALL_INFO, -1, "%s is not a complete sc19 trace\n",
+               path.c_str());
+  }
+  records = reinterpret_cast<const SC19TraceRecord *>(header + 1);
+  count = header->count;
+  next = 0;
+
+  batch = params.find<uint32_t>("batch", 1);
+  if (batch == 0)
+    batch = 1;
+
+  out->verbose(CALL_INFO, 4, 0, "Replaying %" PRIu64 " requests from %s\n",
+               count, path.c_str());
+}
+
+TraceGenerator::~TraceGenerator() {
+  munmap(map, mapLength);
+  delete out;
+}
+
+void TraceGenerator::generate(MirandaRequestQueue<GeneratorRequest *> *q) {
+  uint32_t groups = 0;
+  while (next < count) {
+    const SC19TraceRecord &rec = records[next];
+    MemoryOpRequest *req = new PooledMemoryOpRequest(
+        rec.addr, rec.size, rec.op == SC19_TRACE_OP_WRITE ? WRITE : READ);
+    for (uint8_t mask = rec.depmask, i = 0; mask != 0; mask >>= 1, i++) {
+      if (mask & 1)
+        req->addDependency(recent[(next - 1 - i) & 7]);
+    }
+    recent[next & 7] = req->getRequestID();
+    q->push_back(req);
+    next++;
+    if ((rec.flags & SC19_TRACE_GROUP_END) && ++groups == batch)
+      break;
+  }
+}
+
+bool TraceGenerator::isFinished() { return next == count; }
+
+void TraceGenerator::completed() {}
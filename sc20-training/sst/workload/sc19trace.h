@@ -0,0 +1,141 @@
+// Copyright 2009-2019 NTESS. Under the terms
+// of Contract DE-NA0003525 with NTESS, the U.S.
+// Government retains certain rights in this software.
+//
+// Copyright (c) 2009-2019, NTESS
+// All rights reserved.
+//
+// Portions are copyright of other developers:
+// See the file CONTRIBUTORS.TXT in the top level directory
+// the distribution for more information.
+//
+// This file is part of the SST software package. For license
+// information, see the LICENSE file in the top level directory of the
+// distribution.
+
+#ifndef _H_SST_MIRANDA_SC19_TRACE
+#define _H_SST_MIRANDA_SC19_TRACE
+
+#include <sst/core/output.h>
+#include <sst/elements/miranda/mirandaGenerator.h>
+
+#include <cstdio>
+#include <stdint.h>
+#include <string>
+#include <vector>
+
+#include "sc19common.h"
+
+// Binary request trace of one sc19 WorkloadGenerator (read by tracefile.py):
+// a 128-byte header followed by 16-byte records, little endian.
+//
+// depmask bit i set means the request depends on the request i + 1 records
+// earlier. SC19_TRACE_GROUP_END marks the last request of one generate()
+// call, so a replay hands Miranda the same request groups.
+
+#define SC19_TRACE_MAGIC "SC19TRC"
+#define SC19_TRACE_VERSION 1
+#define SC19_TRACE_OP_READ 0
+#define SC19_TRACE_OP_WRITE 1
+#define SC19_TRACE_GROUP_END 0x1
+
+namespace SST {
+namespace Miranda {
+
+struct SC19TraceHeader {
+  char magic[8];
+  uint32_t version;
+  uint32_t recordSize;
+  uint64_t count;
+  uint32_t meshX;
+  uint32_t meshY;
+  uint32_t meshZ;
+  uint32_t beginX;
+  uint32_t beginY;
+  uint32_t beginZ;
+  uint32_t endX;
+  uint32_t endY;
+  uint32_t endZ;
+  uint32_t iterations;
+  uint32_t histoslots;
+  uint32_t seed;
+  uint32_t ystep;
+  uint32_t hashShift;
+  uint32_t hashBits;
+  uint8_t reserved[44];
+};
+
+struct SC19TraceRecord {
+  uint64_t addr;
+  uint32_t size;
+  uint8_t op;
+  uint8_t depmask;
+  uint16_t flags;
+};
+
+static_assert(sizeof(SC19TraceHeader) == 128, "trace header must be 128 bytes");
+static_assert(sizeof(SC19TraceRecord) == 16, "trace records must be 16 bytes");
+
+// Writes a trace to "<path>.tmp.<pid>" and renames it into place when the
+// stream is complete, so concurrent runs never see a partial trace.
+class TraceWriter {
+
+public:
+  TraceWriter(const std::string &path, const SC19TraceHeader &header,
+              Output *out);
+  ~TraceWriter();
+  void append(const MemoryOpRequest *req, uint8_t depmask, bool groupEnd);
+  void finish();
+
+private:
+  void flush();
+
+  std::string path;
+  std::string tmpPath;
+  SC19TraceHeader header;
+  std::vector<SC19TraceRecord> buffer;
+  FILE *file;
+  Output *out;
+};
+
+class TraceGenerator : public RequestGenerator {
+
+public:
+  TraceGenerator(Component *owner, Params &params);
+  TraceGenerator(ComponentId_t id, Params &params);
+  void build(Params &params);
+  ~TraceGenerator();
+  void generate(MirandaRequestQueue<GeneratorRequest *> *q);
+  bool isFinished();
+  void completed();
+
+  SST_ELI_REGISTER_SUBCOMPONENT_DERIVED(
+      TraceGenerator, "sc19", "TraceGenerator",
+      SST_ELI_ELEMENT_VERSION(1, 0, 0),
+      "Replays a request trace recorded by sc19.WorkloadGenerator.",
+      SST::Miranda::RequestGenerator)
+
+  SST_ELI_DOCUMENT_PARAMS(
+      {"verbose", "Sets the verbosity output of the generator", "0"},
+      {"trace", "Trace file written with the WorkloadGenerator trace_record "
+                "parameter", ""},
+      {"batch", "Request groups (mesh points) to replay per call", "1"}, )
+private:
+  const SC19TraceRecord *records;
+  uint64_t count;
+  uint64_t next;
+  uint32_t batch;
+
+  void *map;
+  size_t mapLength;
+
+  // Request IDs of the last 8 requests, indexed by record number % 8
+  uint64_t recent[8];
+
+  Output *out;
+};
+
+} // namespace Miranda
+} // namespace SST
+
+#endif
@@ -0,0 +1,710 @@
+############################################################################################################################
+# Model builder for scc-sst-node.py
+#
+# build(cfg, sst) creates the components, subcomponents and links of one configuration through an sst module: the real
+# one inside SST (scc-sst-node.py is a thin wrapper that parses the command line into a Config and calls build), or a
+# standin.sst.Graph, the bundled pure-Python stand-in that records the graph and exports it as JSON or DOT. Nothing
+# happens at import time, so tools can check and build thousands of configurations in one process:
+#
+#   cfg = sccmodel.Config("-n=30 -c=medium -w=8")
+#   cfg.error()                        # None, or "Error: bad ..." / "ABORT: Cost exceeds ..." (microseconds)
+#   sccmodel.estimate(cfg)             # component, subcomponent and link counts without building
+#   g = sccmodel.graph(cfg)            # build into a stand-in graph: g.counts(), g.to_json(), g.to_dot()
+#
+# The core placement and mesh partition of each core count are computed once per process.
+#
+#   python sccmodel.py -n=40 -t=yes --dot graph.dot    # build one configuration with the stand-in
+#   python sccmodel.py --all                           # estimated size of every in-budget configuration
+############################################################################################################################
+from __future__ import print_function, division
+
+import argparse
+import collections
+import os
+import sys
+
+import catalog
+import interleave
+import meshpart
+import placement
+import rankmap
+import sampling
+import smtsplit
+import statsload
+import tracefile
+
+CATALOG = catalog.load()
+
+# Settings of the script that are not catalog options, with their defaults
+SETTINGS = collections.OrderedDict([
+    ("scale", 1.0),
+    ("placement", "anneal"),
+    ("smt_split", "balanced"),
+    ("interleave", interleave.DEFAULT),
+    ("batch", 1),
+    ("partition", "tiles"),
+    ("stats", "off"),
+    ("stats_format", "csvgz"),
+    ("stats_window", None),
+    ("shared_params", True),
+    ("footprint_sizing", True),
+    ("trace_dir", None),
+    ("sample", None),
+    ("iterations", None),
+    ("converge", None),
+    ("heartbeat", None),
+])
+PARTITIONS = ["tiles", "sst"]
+PAGE_SIZE = 4096
+
+_layouts = {}
+
+
+class Config:
+    """One model configuration: the catalog options (a dict or a --model-options string) and the SETTINGS."""
+
+    def __init__(self, options=None, cat=None, **settings):
+        self.cat = cat or CATALOG
+        if options is None or not hasattr(options, "get"):
+            self.options = catalog.parse_model_options(self.cat, options or "")
+        else:
+            self.options = collections.OrderedDict((opt["name"], str(options.get(opt["name"], opt["default"])))
+                                                   for opt in self.cat["options"])
+        for name, default in SETTINGS.items():
+            setattr(self, name, settings.pop(name, default))
+        if settings:
+            raise TypeError("unknown settings " + ", ".join(sorted(settings)))
+
+    def __getitem__(self, name):
+        return self.options[name]
+
+    def invalid(self):
+        """"Error: bad ..." for the first bad option or setting, or None."""
+        error = catalog.check_config(self.cat, self.options)
+        if error:
+            return error
+        if self.placement not in placement.METHODS:
+            return "Error: bad placement"
+        if self.smt_split not in smtsplit.SPLITS:
+            return "Error: bad smt split"
+        try:
+            interleave.parse(self.interleave)
+        except ValueError:
+            return "Error: bad interleave"
+        if not 0 < self.scale <= 1:
+            return "Error: bad scale"
+        if self.batch < 1:
+            return "Error: bad batch"
+        if self.partition not in PARTITIONS:
+            return "Error: bad partition"
+        if self.stats not in statsload.LEVELS or self.stats_format not in statsload.FORMATS:
+            return "Error: bad stats"
+        if self.sample is not None:
+            try:
+                sampling.parse_spec(self.sample)
+            except ValueError:
+                return "Error: bad sample"
+        if (self.iterations is not None and self.iterations < 1) or (self.converge is not None and self.converge <= 0):
+            return "Error: bad iterations"
+        if self.heartbeat is not None and self.heartbeat < 0:
+            return "Error: bad heartbeat"
+        return None
+
+    def cost(self):
+        return catalog.config_cost(self.cat, self.options)
+
+    def over_budget(self):
+        """The script's abort message when the cost exceeds the budget, or None."""
+        if self.cost() > self.cat["budget"]:
+            return "ABORT: Cost exceeds limit of " + str(self.cat["budget"]) + ". Cost is " + str(self.cost())
+        return None
+
+    def error(self):
+        """Why the configuration cannot be built (invalid or over budget), or None."""
+        return self.invalid() or self.over_budget()
+
+    def model_options(self):
+        return catalog.model_options(self.cat, self.options)
+
+
+def parser(cat=CATALOG, environ=None):
+    """The command line of scc-sst-node.py. Statistics default to SC19_STATS / SC19_STATS_FORMAT, heartbeats to
+    SC19_HEARTBEAT and traces to SC19_TRACE_DIR from environ."""
+    environ = os.environ if environ is None else environ
+    p = argparse.ArgumentParser()
+    for opt in cat["options"]:
+        p.add_argument(opt["flag"], "--" + opt["name"], help=opt["help"] + ": " + ", ".join(opt["values"]), default=opt["default"])
+    p.add_argument("--scale", type=float, default=1.0, help="Shrink the global mesh by this factor for fast screening (caches shrink by its square)")
+    p.add_argument("--placement", help="Placement of cores on mesh stops: " + ", ".join(placement.METHODS), default="anneal")
+    p.add_argument("--smt-split", help="Work split between the SMT threads of a core: " + ", ".join(smtsplit.SPLITS) + " (see smtsplit.py)", default="balanced")
+    p.add_argument("--interleave", help="Address interleaving over memory channels and L3 slices: CHANNEL[/SLICE][:xor], e.g. 1KiB/64B:xor (see interleave.py)", default=interleave.DEFAULT)
+    p.add_argument("--batch", type=int, default=1, help="Mesh points each generator emits per call (same request stream, fewer calls)")
+    p.add_argument("--partition", help="Parallel runs: tiles (each mesh stop and its caches on one rank/thread) or sst (SST's partitioner)", default="tiles")
+    p.add_argument("--stats", help="Statistics: " + ", ".join(sorted(statsload.LEVELS)) + " (see statsload.py)", default=environ.get("SC19_STATS", "off"))
+    p.add_argument("--stats-format", help="Statistics output: " + ", ".join(sorted(statsload.FORMATS)), default=environ.get("SC19_STATS_FORMAT", "csvgz"))
+    p.add_argument("--stats-window", help="Statistics dump interval, e.g. 10us (default: end of run for summary, " + statsload.WINDOWS["detailed"] + " for detailed)")
+    p.add_argument("--sample", help="Sampled run: PERIOD[:WINDOW[:WARMUP]] z-planes, e.g. 16:1:1 (see sampling.py)")
+    p.add_argument("--iterations", type=int, help="Stencil iterations (default: catalog workload, %d)" % cat["workload"]["iterations"])
+    p.add_argument("--converge", type=float, help="Stop iterating once a phase cycle is within this fraction of the previous one (see iterations.py)")
+    p.add_argument("--heartbeat", type=float, help="Print the progress of the generators with an ETA every this many wall-clock seconds (see heartbeat.py)", default=environ.get("SC19_HEARTBEAT"))
+    p.add_argument("--no-footprint-sizing", action="store_true", help="Size the core page maps and directory entry caches for the whole memory, not the workload footprint (the original sizing)")
+    p.add_argument("--no-shared-params", action="store_true", help="Give every component its own copy of the parameters (for comparison)")
+    return p
+
+
+def parse_args(argv=None, cat=CATALOG, environ=None):
+    """Config from a scc-sst-node.py command line."""
+    environ = os.environ if environ is None else environ
+    args = parser(cat, environ).parse_args(argv)
+    values = vars(args)
+    options = dict((name, values[name]) for name in catalog.option_names(cat))
+    return Config(options, cat, scale=args.scale, placement=args.placement, smt_split=args.smt_split,
+                  interleave=args.interleave, batch=args.batch,
+                  partition=args.partition, stats=args.stats, stats_format=args.stats_format,
+                  stats_window=args.stats_window, shared_params=not args.no_shared_params,
+                  footprint_sizing=not args.no_footprint_sizing,
+                  trace_dir=environ.get("SC19_TRACE_DIR"), sample=args.sample,
+                  iterations=args.iterations, converge=args.converge, heartbeat=args.heartbeat)
+
+
+def layout(cfg, globalmesh):
+    """(MeshPartitioner, mesh stop of each core) of a configuration, computed once per process."""
+    key = (int(cfg["corecount"]), int(cfg["memchannels"]), globalmesh, cfg.placement)
+    if key not in _layouts:
+        mp = meshpart.MeshPartitioner(key[0], key[1], globalmesh)
+        mesh_x, mesh_y = meshpart.mesh_shape(key[0])
+        _layouts[key] = (mp, placement.place_cores(mp, mesh_x, mesh_y, cfg.placement))
+    return _layouts[key]
+
+
+def footprint(genparams):
+    """Bytes of the address range the generators can touch: the histogram, then the whole mesh (the interior points and
+    their neighbours), rounded up to a block of the address hash when there is one (interleave.py)."""
+    size = 8 * genparams["histoslots"] + 8 * genparams["meshx"] * genparams["meshy"] * genparams["meshz"]
+    if genparams.get("hash_bits"):
+        block = 1 << (genparams["hash_shift"] + genparams["hash_bits"])
+        size = -(-size // block) * block
+    return size
+
+
+def estimate(cfg):
+    """{"components", "subcomponents", "links"} that build() creates, counted without building."""
+    corecount, memchan = int(cfg["corecount"]), int(cfg["memchannels"])
+    mesh_x, mesh_y = meshpart.mesh_shape(corecount)
+    smt = cfg["smt"] == "yes"
+    # Per memory channel: directory and memory controller; NIC, link control, memory link and DRAM backend
+    # Per core: L1, core (or two cores and the SMT shim), L2, L3; their links, NICs and generators
+    return {
+        "components" : mesh_x * mesh_y + 2 * memchan + corecount * (6 if smt else 4),
+        "subcomponents" : 4 * memchan + corecount * ((2 if smt else 1) + 7),
+        "links" : (mesh_x - 1) * mesh_y + mesh_x * (mesh_y - 1) + 2 * memchan + corecount * ((3 if smt else 1) + 3),
+    }
+
+
+def build(cfg, sst, log=None):
+    """Create the model of cfg through the sst module (or a standin.sst.Graph).
+
+    log receives the progress lines the script prints. Raises ValueError for a configuration that cannot be built.
+    Returns {"place" : mesh stop of each core, "shared_sets" : parameter sets registered, "tile_owner" : partition of
+    each mesh stop or None}.
+    """
+    error = cfg.error()
+    if error:
+        raise ValueError(error)
+    # The generators agree to stop through counters in their process's memory, so each MPI rank would stop on its own
+    if cfg.converge and hasattr(sst, "getMPIRankCount") and sst.getMPIRankCount() > 1:
+        raise ValueError("Error: --converge needs a single SST rank (use threads)")
+    log = log or (lambda line: None)
+    cat = cfg.cat
+
+    # Configurable by user
+    # Total cost = MemCost + NetCost + Cores * (L1Cost + L2Cost + L3Cost)   => Cores is NOT configurable given a selection of each component cost (must be maximized)
+    coretype = cfg["coretype"]    # slow, medium, fast
+    smtarg = cfg["smt"]           # yes, no
+    l1size = cfg["l1size"]        # big, small
+    l2type = cfg["l2type"]        # private, shared
+    l2size = cfg["l2size"]        # big, small
+    l3size = cfg["l3size"]        # big, small
+    meshtype = cfg["noc"]         # fast, slow
+    memtype = cfg["memtype"]      # basic, bw, lat
+
+    debugL2 = 0
+    debugL3 = 0
+    debugLev = 10
+
+    memchan = int(cfg["memchannels"])  # 6, 8
+    corecount = int(cfg["corecount"])  # 22, 24, 30, 32, 36, 40
+
+    # Set variables for architecture
+    coreattr = catalog.attributes(cat, "coretype", coretype)
+    l1attr = catalog.scaled_cache(catalog.attributes(cat, "l1size", l1size), cfg.scale)
+    l2attr = catalog.scaled_cache(catalog.attributes(cat, "l2size", l2size), cfg.scale)
+    l3attr = catalog.scaled_cache(catalog.attributes(cat, "l3size", l3size), cfg.scale)
+    memattr = catalog.attributes(cat, "memtype", memtype)
+
+    mesh_clock = catalog.attributes(cat, "noc", meshtype)["clock_mhz"]
+
+    memSize = memchan * 2 * 1024 * 1024 * 1024
+    network_bw = str( (mesh_clock * 1000 * 1000 * 36) ) + "B/s"
+
+    mesh_stops_x, mesh_stops_y = meshpart.mesh_shape(corecount)
+
+
+    corefreq = coreattr["clock"]
+    maxmemreqpending = coreattr["maxmemreqpending"]
+
+    noc_params = {
+        "link_bw" : network_bw,
+        "flit_size" : "36B",
+        "input_buf_size" : "288KiB"
+    }
+
+    # Global problem size (catalog "workload" section)
+    globalmesh = cat["workload"]["globalmesh"] # 154, 240 was considered
+    if cfg.scale != 1:
+        # Scaled screening run: the mesh shrinks by the scale and the caches by its square (see calibrate.py)
+        globalmesh = catalog.scaled_globalmesh(globalmesh, cfg.scale)
+        log("Scaled problem: scale " + str(cfg.scale) + ", globalmesh " + str(globalmesh) + ", L1/L2/L3 " +
+            l1attr["cache_size"] + "/" + l2attr["cache_size"] + "/" + l3attr["cache_size"])
+        log("")
+    histo = cat["workload"]["histoslots"]
+    its = cfg.iterations or cat["workload"]["iterations"]
+
+    genparams = {
+        "verbose" : 0,
+        "histoslots" : histo,
+        "meshx" : globalmesh,
+        "meshy" : globalmesh,
+        "meshz" : globalmesh,
+        "iterations" : its,
+        "batch" : cfg.batch,
+        "clock" : corefreq,
+    }
+    if cfg.sample:
+        # Each generator times a few planes of every period and skips the rest (sampling.py extrapolates)
+        genparams.update(sampling.gen_params(cfg.sample))
+        log("Sampling: " + sampling.describe(cfg.sample) + (", traces not used" if cfg.trace_dir else ""))
+        log("")
+    channel_bytes, slice_bytes, _ = interleave.parse(cfg.interleave)
+    if cfg.interleave != interleave.DEFAULT:
+        # Hashed schemes move every address in the generators (interleave.py)
+        genparams.update(interleave.hash_params(cfg.interleave, memchan, corecount))
+        log("Interleave: " + interleave.describe(cfg.interleave))
+        log("")
+    if cfg.converge:
+        # Every generator times its iterations; they stop together once each one's phase cycles agree (iterations.py)
+        genparams["converge_tolerance"] = cfg.converge
+    if cfg.heartbeat:
+        # Progress of the generators of each process with an ETA, which sweep.py reads while the run goes on
+        genparams["heartbeat"] = cfg.heartbeat
+        log("Heartbeat: every %g s" % cfg.heartbeat)
+        log("")
+    if cfg.iterations or cfg.converge:
+        log("Iterations: up to " + str(its) + (", until cycles agree within " + str(cfg.converge) if cfg.converge else "")
+            + (", traces not used" if cfg.trace_dir and not cfg.sample else ""))
+        log("")
+
+    # Every core maps each of pagecount pages to a random frame through a table of its own, and each directory caches
+    # an entry per line of its channel: sized to the footprint of the workload unless --no-footprint-sizing asks for
+    # the whole memory and the original entry cache
+    if cfg.footprint_sizing:
+        pages = -(-footprint(genparams) // PAGE_SIZE)
+        dir_entries = -(-pages * PAGE_SIZE // channel_bytes // memchan) * (channel_bytes // 64)
+        log("Memory sizing: footprint %.1f MiB, %d pages per core, %d directory entries" % (
+            pages * PAGE_SIZE / 1024.0 ** 2, pages, dir_entries))
+        log("")
+    else:
+        pages = memSize // PAGE_SIZE
+        dir_entries = 256*1024*1024
+
+    # Core and SMT configuration
+    core_params = {
+        "clock" : corefreq,
+        "max_reqs_cycle" : coreattr["max_reqs_cycle"],
+        "max_reorder_lookups" : coreattr["max_reorder_lookups"],
+        "maxmemreqpending" : maxmemreqpending,
+        "pagecount" : pages,
+        "pagemap" : "RANDOMIZED"
+    }
+
+    core_smt_params = {
+        "clock" : corefreq,
+        "requests_per_cycle" : coreattr["smt_requests_per_cycle"],
+    }
+
+    # L1 configuration
+    l1_params = {
+        "cache_frequency" : corefreq,
+        "coherence_protocol" : "mesi",
+        "replacement_policy" : l1attr["replacement_policy"],
+        "cache_size" : l1attr["cache_size"],
+        "associativity" : l1attr["associativity"],
+        "access_latency_cycles" : l1attr["access_latency_cycles"],
+        "tag_access_latency_cycles" : 1,
+        "mshr_num_entries" : maxmemreqpending,
+        "mshr_latency_cycles" : 1,
+        "events_up_per_cycle" : 2,
+        "L1" : 1,
+        "verbose" : 0,
+    }
+
+    # L2 configuration
+    l2_params = {
+        "cache_frequency" : corefreq,
+        "coherence_protocol" : "mesi",
+        "replacement_policy" : l2attr["replacement_policy"],
+        "cache_size" : l2attr["cache_size"],
+        "associativity" : l2attr["associativity"],
+        "access_latency_cycles" : l2attr["access_latency_cycles"],
+        "tag_access_latency_cycles" : l2attr["tag_access_latency_cycles"],
+        "mshr_latency_cycles" : l2attr["mshr_latency_cycles"],
+        "mshr_num_entries" : maxmemreqpending + 4,
+        "debug" : debugL2,
+        "debug_level" : debugLev,
+    }
+
+    linkcontrol_params = {
+        "link_bw" : network_bw,
+        "in_buf_size" : "288B",
+        "out_buf_size" : "288B",
+    }
+
+    # L3 configuration
+    l3_params = {
+        "cache_frequency" : "1.8GHz",
+        "coherence_protocol" : "mesi",
+        "replacement_policy" : l3attr["replacement_policy"],
+        "cache_size" : l3attr["cache_size"],
+        "associativity" : l3attr["associativity"],
+        "access_latency_cycles" : l3attr["access_latency_cycles"],
+        "tag_access_latency_cycles" : l3attr["tag_access_latency_cycles"],
+        "mshr_latency_cycles" : l3attr["mshr_latency_cycles"],
+        "mshr_num_entries" : maxmemreqpending + 8,
+        "debug" : debugL3,
+        "debug_level" : debugLev,
+    }
+
+    # Directory configuration
+    dirctrl_params = {
+        "coherence_protocol" : "mesi",
+        "clock" : "1.8GHz",
+        "entry_cache_size" : dir_entries,
+        "mshr_num_entries" : (corecount * maxmemreqpending) // 4,
+        "access_latency_cycles" : 4,
+    }
+
+    # Memory configuration
+    memctrl_params = {
+        "clock" : "1200MHz",
+        "backing" : "none",
+        "max_requests_per_cycle" : memattr["max_requests_per_cycle"],
+    }
+
+    mem_params = {
+        "id" : 0,
+        "addrMapper" : "memHierarchy.simpleAddrMapper",
+        "channel.transaction_Q_size" : memattr["transaction_Q_size"],
+        "channel.numRanks" : memattr["numRanks"],
+        "channel.rank.numBanks" : memattr["numBanks"],
+        "channel.rank.bank.CL" : memattr["CL"],
+        "channel.rank.bank.CL_WR" : memattr["CL_WR"],
+        "channel.rank.bank.RCD" : memattr["RCD"],
+        "channel.rank.bank.TRP" : memattr["TRP"],
+        "channel.rank.bank.dataCycles" : memattr["dataCycles"],
+        "channel.rank.bank.pagePolicy" : "memHierarchy.simplePagePolicy",
+        "channel.rank.bank.transactionQ" : "memHierarchy.reorderTransactionQ",
+        "channel.rank.bank.pagePolicy.close" : 0
+    }
+
+    # Parameter dicts used by many components are registered once as named shared sets when this SST has them (SST 12
+    # calls them shared params, SST 10-11 global params); older versions get a copy of the dict on every component.
+    if hasattr(sst, "addSharedParams"):
+        register_set, use_set = sst.addSharedParams, "addSharedParamSet"
+    elif hasattr(sst, "addGlobalParams"):
+        register_set, use_set = sst.addGlobalParams, "addGlobalParamSet"
+    else:
+        register_set, use_set = None, None
+    if not cfg.shared_params:
+        register_set = None
+    registered_sets = set()
+
+    def add_params(comp, name, params):
+        if register_set is None:
+            comp.addParams(params)
+            return
+        if name not in registered_sets:
+            register_set(name, params)
+            registered_sets.add(name)
+        getattr(comp, use_set)(name)
+
+    # Statistics (statsload.py reads them back): every component records the statistics up to the level's load level
+    stat_params = None
+    if cfg.stats != "off":
+        stat_params = statsload.stat_params(cfg.stats, cfg.stats_window)
+        sst.setStatisticLoadLevel(statsload.LEVELS[cfg.stats])
+        sst.setStatisticOutput(*statsload.output(cfg.stats_format))
+        sst.enableAllStatisticsForAllComponents(stat_params)
+        log("Statistics: " + cfg.stats + ", " + cfg.stats_format + ", " +
+            ("dumped every " + stat_params["rate"] if "resetOnRead" in stat_params else "dumped at the end of the run"))
+
+    # Mesh stop of each core (and its caches), chosen to keep stencil neighbours and memory controllers close
+    mp, place = layout(cfg, globalmesh)
+    placer = placement.Placer(mp.boxes, mesh_stops_x, mesh_stops_y, mp.mc)
+    log("Placement: " + cfg.placement + ", mean halo hops %.3f, mean memory hops %.3f" % placer.mean_hops(place))
+    if smtarg == "yes":
+        skews = [smtsplit.skew(smtsplit.thread_boxes(box, cfg.smt_split)) for box in mp.boxes]
+        log("SMT split: %s, thread skew mean %.3f%%, worst %.3f%%" % (cfg.smt_split, 100.0 * sum(skews) / len(skews),
+                                                                      100.0 * max(skews)))
+
+    # Parallel runs: every component gets a weight for SST's partitioners, and with --partition=tiles each mesh stop and
+    # everything attached to it goes to one rank and thread so that only router-to-router links cross partitions
+    threads = sst.getThreadCount() if hasattr(sst, "getThreadCount") else 1
+    ranks = sst.getMPIRankCount() if hasattr(sst, "getMPIRankCount") else 1
+    tile_owner = None
+    if cfg.partition == "tiles" and ranks * threads > 1:
+        tile_weights = rankmap.tile_weights(mesh_stops_x, mesh_stops_y, place, mp.mc, smtarg == "yes")
+        tile_owner = rankmap.partition_tiles(mesh_stops_x, mesh_stops_y, tile_weights, ranks * threads)
+        sst.setProgramOption("partitioner", "sst.self")
+        cut, total = rankmap.cut_links(mesh_stops_x, mesh_stops_y, tile_owner)
+        log("Partition: tiles over %d ranks x %d threads, %d of %d router links cut, imbalance %.3f" % (
+            ranks, threads, cut, total, rankmap.imbalance(tile_weights, tile_owner, ranks * threads)))
+
+    def pin(comp, stop, kind):
+        comp.setWeight(rankmap.COMPONENT_WEIGHTS[kind])
+        if tile_owner is not None:
+            rank, thread = rankmap.rank_thread(tile_owner[stop], threads)
+            comp.setRank(rank, thread)
+    log("")
+
+    # Create NoC
+    kRtr=[] # Router links for nodes
+    node = 0
+    for x in range(0, mesh_stops_x):
+        for y in range(0, mesh_stops_y):
+            kRtr.append(sst.Component("rtr_" + str(node), "kingsley.noc_mesh"))
+            pin(kRtr[-1], node, "router")
+            if l2type == "private":
+                add_params(kRtr[-1], "noc", dict(noc_params, local_ports=2)) # L2 & L3
+            else:
+                add_params(kRtr[-1], "noc", dict(noc_params, local_ports=3)) # L1, L2, & L3
+            node = node + 1
+
+    # Connect routers in mesh
+    node = 0
+    for y in range(0, mesh_stops_y):
+        for x in range(0, mesh_stops_x):
+            if y != (mesh_stops_y - 1): # Not the bottom row
+                kRtrNS = sst.Link("link_rtr_ns_" + str(node))
+                kRtrNS.connect( (kRtr[node], "south", "300ps"), (kRtr[node + mesh_stops_x], "north", "300ps") )
+
+            if x != (mesh_stops_x - 1): # Not the right-most column
+                kRtrEW = sst.Link("link_rtr_ew_" + str(node))
+                kRtrEW.connect( (kRtr[node], "east", "300ps"), (kRtr[node+1], "west", "300ps") )
+
+            node = node + 1
+
+
+    # Create memories & directories and place on mesh
+    for x in range(0, memchan):
+        dirctrl = sst.Component("dirctrl" + str(x), "memHierarchy.DirectoryController")
+        add_params(dirctrl, "dirctrl", dirctrl_params)
+        dirNoc = dirctrl.setSubComponent("cpulink", "memHierarchy.MemNIC")
+        add_params(dirNoc, "nic_group3", { "group" : 3 })
+
+        dirNocCtrl = dirNoc.setSubComponent("linkcontrol", "kingsley.linkcontrol")
+        add_params(dirNocCtrl, "linkcontrol", linkcontrol_params)
+        dirMem = dirctrl.setSubComponent("memlink", "memHierarchy.MemLink")
+
+        memctrl = sst.Component("memctrl" + str(x), "memHierarchy.MemController")
+        add_params(memctrl, "memctrl", memctrl_params)
+        mem = memctrl.setSubComponent("backend", "memHierarchy.timingDRAM")
+        add_params(mem, "mem", dict(mem_params, mem_size="2GiB"))
+        if stat_params:
+            mem.enableAllStatistics(stat_params) # timingDRAM counters live on the backend subcomponent
+
+        dirToMem = sst.Link("dir_to_mem_" + str(x))
+        dirToMem.connect( (dirMem, "port", "500ps"), (memctrl, "direct_link", "500ps") )
+
+        # Interleave between memories, at line granularity unless --interleave says otherwise
+        dirctrl.addParams(interleave.region(x, memchan, channel_bytes, memSize))
+        memctrl.addParams(interleave.region(x, memchan, channel_bytes, memSize))
+
+        rtrlink = sst.Link("link_rtr_mem_" + str(x))
+        loc, port = mp.getPortForMC(x)
+        pin(dirctrl, loc, "dirctrl")
+        pin(memctrl, loc, "memctrl")
+        rtrlink.connect( (kRtr[loc], port, "300ps"), (dirNocCtrl, "rtr_port", "300ps") )
+
+    # Request traces: with a trace directory (SC19_TRACE_DIR), each generator replays its recorded request stream, or
+    # records it on the first run with the same partition (see tracefile.py). A trace holds the full request stream and
+    # no iteration times, so sampled and multi-iteration runs do without
+    tracedir = cfg.trace_dir if not (cfg.sample or cfg.iterations or cfg.converge) else None
+    if tracedir and not os.path.isdir(tracedir):
+        os.makedirs(tracedir)
+
+    def add_generator(cpu, params):
+        if tracedir:
+            trace = os.path.abspath(os.path.join(tracedir, tracefile.trace_name(params)))
+            if tracefile.is_complete(trace, params):
+                gen = cpu.setSubComponent("generator", "sc19.TraceGenerator")
+                gen.addParams({ "verbose" : params["verbose"], "trace" : trace, "batch" : params["batch"] })
+                return gen
+            params = dict(params, trace_record=trace)
+        gen = cpu.setSubComponent("generator", "sc19.WorkloadGenerator")
+        gen.addParams(params)
+        if stat_params:
+            gen.enableAllStatistics(stat_params) # points, requests, blocked and completion time of each generator
+        return gen
+
+    # Create cores & caches and place on mesh
+    for x in range(0, corecount):
+
+        # L1 caches
+        l1 = sst.Component("l1cache" + str(x), "memHierarchy.Cache")
+        pin(l1, place[x], "l1")
+        add_params(l1, "l1", l1_params)
+        l1uplink = l1.setSubComponent("cpulink", "memHierarchy.MemLink")
+
+        # Partition mesh
+        beginx, endx, beginy, endy, beginz, endz = mp.getPartitionForCore(x)
+
+        if smtarg == "no":
+            core = sst.Component("core" + str(x), "miranda.BaseCPU")
+            pin(core, place[x], "core")
+            add_params(core, "core", core_params)
+
+            gen = add_generator(core, dict(genparams,
+                    **{ "seed" : x + 8471,
+                        "beginx" : beginx,
+                        "beginy" : beginy,
+                        "beginz" : beginz,
+                        "endx" : endx,
+                        "endy" : endy,
+                        "endz" : endz
+                      }))
+
+            coreToL1 = sst.Link("link_core_to_l1_" + str(x))
+            coreToL1.connect( (core, "cache_link", "100ps"), (l1uplink, "port", "100ps") )
+        else: # using SMT
+            core0 = sst.Component("core" + str(x) + ".0", "miranda.BaseCPU")
+            core1 = sst.Component("core" + str(x) + ".1", "miranda.BaseCPU")
+            smt = sst.Component("smt" + str(x), "memHierarchy.multithreadL1")
+            pin(core0, place[x], "core")
+            pin(core1, place[x], "core")
+            pin(smt, place[x], "smt")
+
+            # Each thread sweeps its share of the core's subdomain (smtsplit.py)
+            tboxes = smtsplit.thread_boxes((beginx, endx, beginy, endy, beginz, endz), cfg.smt_split)
+            for thread, seed, tbox in zip([core0, core1], [x + 8471, x + 4575], tboxes):
+                tparams = dict(zip(["beginx", "endx", "beginy", "endy", "beginz", "endz"], tbox[:6]), seed=seed)
+                if tbox[6] != 1:
+                    tparams["ystep"] = tbox[6]
+                add_generator(thread, dict(genparams, **tparams))
+
+            add_params(core0, "core", core_params)
+            add_params(core1, "core", core_params)
+            add_params(smt, "core_smt", core_smt_params)
+
+            core0ToSMT = sst.Link("smt_core0_" + str(x))
+            core0ToSMT.connect((core0, "cache_link", "100ps"), (smt, "thread0", "100ps"))
+            core1ToSMT = sst.Link("smt_core1_" + str(x))
+            core1ToSMT.connect((core1, "cache_link", "100ps"), (smt, "thread1", "100ps"))
+            coreToL1 = sst.Link("link_core_to_l1_" + str(x))
+            coreToL1.connect( (smt, "cache", "100ps"), (l1uplink, "port", "100ps") )
+
+        # L2 caches
+        l2 = sst.Component("l2cache" + str(x), "memHierarchy.Cache")
+        pin(l2, place[x], "l2")
+        add_params(l2, "l2", l2_params)
+        if l2type == "private":
+            l1downlink = l1.setSubComponent("memlink", "memHierarchy.MemLink")
+            l2uplink = l2.setSubComponent("cpulink", "memHierarchy.MemLink")
+            L1ToL2 = sst.Link("link_l1_to_l2_" + str(x))
+            L1ToL2.connect( (l1downlink, "port", "100ps"), (l2uplink, "port", "100ps") )
+
+            l2nic = l2.setSubComponent("memlink", "memHierarchy.MemNIC")
+            add_params(l2nic, "nic_group1", { "group" : 1 })
+            l2nicCtrl = l2nic.setSubComponent("linkcontrol", "kingsley.linkcontrol")
+            add_params(l2nicCtrl, "linkcontrol", linkcontrol_params)
+            L2toNoc = sst.Link("link_l2_to_NoC_" + str(x))
+            L2toNoc.connect( (l2nicCtrl, "rtr_port", "300ps"), (kRtr[place[x]], "local1", "300ps") )
+        else: # shared
+            l2.addParams({
+                "num_cache_slices" : corecount,
+                "slice_id" : x
+            })
+            l1nic = l1.setSubComponent("memlink", "memHierarchy.MemNIC")
+            add_params(l1nic, "nic_group0", { "group" : 0 })
+            l1nicCtrl = l1nic.setSubComponent("linkcontrol", "kingsley.linkcontrol")
+            add_params(l1nicCtrl, "linkcontrol", linkcontrol_params)
+            L1toNoc = sst.Link("link_l1_to_NoC_" + str(x))
+            L1toNoc.connect( (l1nicCtrl, "rtr_port", "300ps"), (kRtr[place[x]], "local2", "300ps") )
+
+            l2nic = l2.setSubComponent("cpulink", "memHierarchy.MemNIC")
+            add_params(l2nic, "nic_group1", { "group" : 1 })
+            l2nicCtrl = l2nic.setSubComponent("linkcontrol", "kingsley.linkcontrol")
+            add_params(l2nicCtrl, "linkcontrol", linkcontrol_params)
+            L2toNoc = sst.Link("link_l2_to_Noc_" + str(x))
+            L2toNoc.connect( (l2nicCtrl, "rtr_port", "300ps"), (kRtr[place[x]], "local1", "300ps") )
+
+        # L3 banks
+        l3 = sst.Component("l3cache" + str(x), "memHierarchy.Cache")
+        pin(l3, place[x], "l3")
+        add_params(l3, "l3", l3_params)
+        l3.addParams(interleave.slice_params(x, corecount, slice_bytes, memSize))
+        l3nic = l3.setSubComponent("cpulink", "memHierarchy.MemNIC")
+        add_params(l3nic, "nic_group2", { "group" : 2 })
+        l3nicCtrl = l3nic.setSubComponent("linkcontrol", "kingsley.linkcontrol")
+        add_params(l3nicCtrl, "linkcontrol", linkcontrol_params)
+        L3toNoc = sst.Link("link_l3_to_NoC_" + str(x))
+        L3toNoc.connect( (l3nicCtrl, "rtr_port", "300ps"), (kRtr[place[x]], "local0", "300ps") )
+
+    return {"place" : place, "shared_sets" : len(registered_sets), "tile_owner" : tile_owner}
+
+
+def graph(cfg, threads=1, ranks=1):
+    """Build cfg into a new stand-in graph (standin/sst.py) and return it."""
+    from standin import sst as standin
+    g = standin.Graph(threads, ranks)
+    build(cfg, g)
+    return g
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Build model graphs with the stand-in sst module, without SST")
+    p.add_argument("--all", action="store_true", help="Estimated size of every in-budget configuration")
+    p.add_argument("--json", help="Write the graph as JSON")
+    p.add_argument("--dot", help="Write the graph as Graphviz DOT")
+    p.add_argument("--threads", type=int, default=1, help="Threads the stand-in reports, default: %(default)s")
+    p.add_argument("--ranks", type=int, default=1, help="MPI ranks the stand-in reports, default: %(default)s")
+    # Everything else is a scc-sst-node.py option
+    args, options = p.parse_known_args(argv)
+
+    if args.all:
+        print("%-84s %6s %11s %14s %6s" % ("configuration", "cost", "components", "subcomponents", "links"))
+        for options in catalog.enumerate_configs(CATALOG):
+            cfg = Config(options)
+            size = estimate(cfg)
+            print("%-84s %6g %11d %14d %6d" % (cfg.model_options(), cfg.cost(), size["components"],
+                                               size["subcomponents"], size["links"]))
+        return 0
+
+    cfg = parse_args(options, environ={})
+    error = cfg.error()
+    if error:
+        print(error)
+        return 1
+    g = graph(cfg, args.threads, args.ranks)
+    counts = g.counts()
+    print(cfg.model_options() + ": " + ", ".join("%s %d" % (k, counts[k]) for k in sorted(counts)))
+    if args.json:
+        with open(args.json, "w") as f:
+            g.to_json(f)
+    if args.dot:
+        with open(args.dot, "w") as f:
+            g.to_dot(f)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
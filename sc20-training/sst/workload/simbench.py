@@ -0,0 +1,425 @@
+#!/usr/bin/env python
+############################################################################################################################
+# Simulator benchmarks for scc-sst-node.py
+#
+# Measures what a configuration costs to simulate rather than what it simulates. "build" only constructs the graph
+# (sst --run-mode=init) and compares shared parameter sets against a copy of the parameters on every component
+# (--no-shared-params): the Python build time and RSS the script prints, SST's build time and peak RSS
+# (--print-timing-info) and the wall time of the whole run. By default it takes the heaviest in-budget configuration of
+# each catalog core count (SMT, shared L2 and the most memory channels give the most components).
+#
+# "footprint" builds the same way with the core page maps and directory entry caches sized for the whole memory (the
+# original pagecount of 3-4 million pages per core, --no-footprint-sizing) and for the workload footprint (the default),
+# which matters most with SMT, where every hardware thread is a Miranda core with its own page map.
+#
+# "threads" runs the same configurations to completion with "sst -n T" for each thread count and reports wall time,
+# run-loop time, speedup over one thread and whether the simulated time changed. The script keeps each mesh stop and
+# its caches on one thread (--partition=tiles, see rankmap.py); --partition sst compares against SST's own partitioner.
+#
+# "stats" measures what statistics collection costs (statsload.py): wall time and peak RSS of complete runs with
+# --stats off, summary and detailed, and the size of the statistics written.
+#
+# "suite" runs a fixed set of configurations to completion and records what each cost to simulate in the result store
+# (resultstore.py benchmarks): wall time, SST build and run-loop time, Python build time, peak RSS and simulated memory
+# requests per wall second, a throughput that compares across configurations (SST does not report its event count).
+# The set covers every core count with SMT off and on and private and shared L2, the cheapest in-budget configuration of
+# each, with the memory types taken in turn. Each measurement is compared with the previous one of the same
+# configuration; one slower by more than --tolerance is flagged as a regression, with the model files (sc19gen.cc, the
+# script, ...) and the SST install that changed since.
+#
+#   python simbench.py build
+#   python simbench.py build -n 32 --repeat 5
+#   python simbench.py footprint -n 32
+#   python simbench.py threads --threads 1,2,4,8
+#   python simbench.py stats -n 22
+#   python simbench.py suite --tolerance 0.2
+############################################################################################################################
+from __future__ import print_function, division
+
+import argparse
+import errno
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import catalog
+import resultstore
+import statsload
+import sweep
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+PYTHON_BUILD_RE = re.compile(r"Graph built in ([0-9.]+) s with (.*), peak RSS ([0-9.]+) MiB")
+SST_BUILD_RE = re.compile(r"Build time:\s+([0-9.eE+-]+)")
+SST_RUN_RE = re.compile(r"Run loop time:\s+([0-9.eE+-]+)")
+SST_RSS_RE = re.compile(r"Max Resident Set Size:\s+([0-9.eE+-]+)\s*([KMG]?B)")
+# "sst --version", e.g. "SST-Core Version (11.1.0)"
+SST_VERSION_RE = re.compile(r"version.*\d+\.\d+", re.I)
+SIZE_MIB = {"B" : 1.0 / 1024 ** 2, "KB" : 1.0 / 1024, "MB" : 1.0, "GB" : 1024.0}
+
+# Slowdown over the previous measurement that counts as a regression
+TOLERANCE = 0.2
+
+
+def weight(cfg):
+    """Relative number of components and links of a configuration."""
+    return (int(cfg["corecount"]) * (2 if cfg["smt"] == "yes" else 1) * (2 if cfg["l2type"] == "shared" else 1),
+            int(cfg["memchannels"]))
+
+
+def bench_configs(cat, corecounts=None, budget=None):
+    """The heaviest in-budget configuration of each core count, cheapest first among equals."""
+    best = {}
+    for cfg in catalog.enumerate_configs(cat, budget):
+        n = int(cfg["corecount"])
+        if corecounts and n not in corecounts:
+            continue
+        key = (weight(cfg), -catalog.config_cost(cat, cfg))
+        if n not in best or key > best[n][0]:
+            best[n] = (key, cfg)
+    return [best[n][1] for n in sorted(best)]
+
+
+def suite_configs(cat, corecounts=None, budget=None):
+    """The cheapest in-budget configuration of every core count, SMT setting and L2 type, with the memory types taken
+    in turn (another memory type when that one is over budget)."""
+    configs = list(catalog.enumerate_configs(cat, budget))
+    memtypes = catalog.option(cat, "memtype")["values"]
+    suite = []
+    for n in catalog.option(cat, "corecount")["values"]:
+        if corecounts and int(n) not in corecounts:
+            continue
+        for smt in catalog.option(cat, "smt")["values"]:
+            for l2type in catalog.option(cat, "l2type")["values"]:
+                wanted = memtypes[len(suite) % len(memtypes)]
+                matching = [cfg for cfg in configs
+                            if (cfg["corecount"], cfg["smt"], cfg["l2type"]) == (n, smt, l2type)]
+                if not matching:
+                    continue
+                matching.sort(key=lambda cfg: (cfg["memtype"] != wanted, catalog.config_cost(cat, cfg)))
+                suite.append(matching[0])
+    return suite
+
+
+def workload_requests(cat):
+    """Memory requests the generators issue for the catalog workload: 8 per point in a stencil iteration and 1.5 on
+    average in a histogram iteration (every third, sc19gen.cc)."""
+    points = (cat["workload"]["globalmesh"] - 2) ** 3
+    its = cat["workload"]["iterations"]
+    histo = sum(1 for i in range(its) if i % 3 == 2)
+    return points * (8 * (its - histo) + 1.5 * histo)
+
+
+def _which(program):
+    if os.sep in program:
+        return program
+    for directory in os.environ.get("PATH", "").split(os.pathsep):
+        path = os.path.join(directory, program)
+        if os.path.isfile(path) and os.access(path, os.X_OK):
+            return path
+    return None
+
+
+def sst_version(sst):
+    """The version line of "sst --version" ("unknown" if it prints none) and a hash of the executable, which change
+    with the SST install."""
+    try:
+        proc = subprocess.Popen([sst, "--version"], stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+        lines = proc.communicate()[0].decode("utf-8", "replace").strip().splitlines()
+    except OSError:
+        lines = []
+    versions = [line.strip() for line in lines if SST_VERSION_RE.search(line)]
+    path = _which(sst)
+    digest = resultstore.file_hash(path)[:12] if path and os.path.exists(path) else "?"
+    return "%s [%s]" % (versions[0] if versions else "unknown", digest)
+
+
+def run_sst(sst, sst_args, script, options, cwd=None):
+    """Run SST to completion. Returns (exit status, output, wall seconds, peak RSS in KiB)."""
+    cmd = [sst] + sst_args + [script, "--model-options=" + options]
+    start = time.time()
+    proc = subprocess.Popen(cmd, cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+    output = proc.stdout.read()
+    while True:
+        try:
+            _, status, usage = os.wait4(proc.pid, 0)
+            break
+        except OSError as e:
+            if e.errno != errno.EINTR:
+                raise
+    wall = time.time() - start
+    returncode = os.WEXITSTATUS(status) if os.WIFEXITED(status) else -os.WTERMSIG(status)
+    return returncode, output.decode("utf-8", "replace"), wall, usage.ru_maxrss
+
+
+def parse_build(text):
+    """Build measurements printed by the script and by sst --print-timing-info (None when absent)."""
+    result = {"python_s" : None, "python_rss_mib" : None, "params" : None, "sst_build_s" : None, "sst_rss_mib" : None}
+    match = PYTHON_BUILD_RE.search(text)
+    if match:
+        result["python_s"] = float(match.group(1))
+        result["params"] = match.group(2)
+        result["python_rss_mib"] = float(match.group(3))
+    match = SST_BUILD_RE.search(text)
+    if match:
+        result["sst_build_s"] = float(match.group(1))
+    match = SST_RSS_RE.search(text)
+    if match:
+        result["sst_rss_mib"] = float(match.group(1)) * SIZE_MIB[match.group(2)]
+    return result
+
+
+def parse_run(text):
+    """Simulated time (ps) and SST's run-loop time (s) of a finished run (None when absent)."""
+    match = SST_RUN_RE.search(text)
+    return sweep.parse_simtime(text)[1], float(match.group(1)) if match else None
+
+
+def _fmt(value, spec):
+    return spec % value if value is not None else "-"
+
+
+def _configs(args, cat):
+    configs = bench_configs(cat, args.corecount)
+    found = set(int(cfg["corecount"]) for cfg in configs)
+    for n in args.corecount or [int(v) for v in catalog.option(cat, "corecount")["values"]]:
+        if n not in found:
+            print("No in-budget configuration with %d cores, skipped" % n)
+    return configs
+
+
+def bench_init(args, cat, column, variants):
+    """Build each configuration with every (label, extra script options) variant in sst --run-mode=init."""
+    configs = _configs(args, cat)
+    if not configs:
+        return 1
+    sst_args = ["--run-mode=init", "--print-timing-info"] + args.sst_arg
+    print("%-84s %-8s %9s %9s %9s %9s %9s" % ("configuration", column, "python s", "sst s", "wall s",
+                                              "sst MiB", "peak MiB"))
+    failed = 0
+    for cfg in configs:
+        options = catalog.model_options(cat, cfg)
+        for label, extra in variants:
+            runs = []
+            for _ in range(args.repeat):
+                returncode, text, wall, rss_kb = run_sst(args.sst, sst_args, args.script, options + extra)
+                if returncode != 0:
+                    print("%-84s %-8s FAILED (exit %d)" % (options, label, returncode))
+                    failed += 1
+                    break
+                build = parse_build(text)
+                build["wall_s"] = wall
+                build["peak_mib"] = rss_kb / 1024.0
+                runs.append(build)
+            if not runs:
+                continue
+            # Fastest repeat: the least disturbed by the rest of the machine
+            best = min(runs, key=lambda r: r["wall_s"])
+            print("%-84s %-8s %9s %9s %9.3f %9s %9.1f" % (options, label, _fmt(best["python_s"], "%.3f"),
+                                                          _fmt(best["sst_build_s"], "%.3f"), best["wall_s"],
+                                                          _fmt(best["sst_rss_mib"], "%.1f"), best["peak_mib"]))
+    return 1 if failed else 0
+
+
+def bench_build(args, cat):
+    return bench_init(args, cat, "params", [("copied", " --no-shared-params"), ("shared", "")])
+
+
+def bench_footprint(args, cat):
+    return bench_init(args, cat, "sizing", [("memory", " --no-footprint-sizing"), ("workload", "")])
+
+
+def bench_threads(args, cat):
+    configs = _configs(args, cat)
+    if not configs:
+        return 1
+    counts = [int(t) for t in args.threads.split(",")]
+    print("%-84s %7s %9s %9s %8s %6s %14s" % ("configuration", "threads", "wall s", "run s", "speedup", "eff",
+                                              "simulated"))
+    failed = 0
+    for cfg in configs:
+        options = catalog.model_options(cat, cfg) + " --partition=" + args.partition
+        base_wall = base_ps = None
+        for threads in counts:
+            sst_args = ["-n", str(threads), "--print-timing-info"] + args.sst_arg
+            runs = []
+            for _ in range(args.repeat):
+                returncode, text, wall, _ = run_sst(args.sst, sst_args, args.script, options)
+                simtime_ps, run_s = parse_run(text)
+                if returncode != 0 or simtime_ps is None:
+                    print("%-84s %7d FAILED (exit %d)" % (options, threads, returncode))
+                    failed += 1
+                    break
+                runs.append((wall, run_s, simtime_ps))
+            if not runs:
+                continue
+            wall, run_s, simtime_ps = min(runs)
+            if base_wall is None:
+                base_wall, base_ps = wall, simtime_ps
+            speedup = base_wall / wall
+            # Conservative parallel simulation should not change the result; flag it if it does
+            same = "" if simtime_ps == base_ps else "  CHANGED"
+            print("%-84s %7d %9.2f %9s %8.2f %5.0f%% %11.4f us%s" % (options, threads, wall, _fmt(run_s, "%.2f"),
+                                                                     speedup, 100.0 * speedup / threads * counts[0],
+                                                                     simtime_ps / 1e6, same))
+    return 1 if failed else 0
+
+
+def bench_stats(args, cat):
+    configs = _configs(args, cat)
+    if not configs:
+        return 1
+    sst_args = args.sst_arg
+    print("%-84s %-9s %9s %9s %9s %10s" % ("configuration", "stats", "wall s", "overhead", "peak MiB", "stats MiB"))
+    failed = 0
+    for cfg in configs:
+        options = catalog.model_options(cat, cfg)
+        base = None
+        for level in ["off", "summary", "detailed"]:
+            runs = []
+            for _ in range(args.repeat):
+                rundir = tempfile.mkdtemp(prefix="simbench-")
+                try:
+                    returncode, text, wall, rss_kb = run_sst(args.sst, sst_args, args.script,
+                                                             options + " --stats=" + level +
+                                                             " --stats-format=" + args.format, cwd=rundir)
+                    path = statsload.find_stats(rundir)
+                    size = os.path.getsize(path) / 1024.0 ** 2 if path else 0.0
+                finally:
+                    shutil.rmtree(rundir)
+                if returncode != 0 or sweep.parse_simtime(text)[1] is None:
+                    print("%-84s %-9s FAILED (exit %d)" % (options, level, returncode))
+                    failed += 1
+                    break
+                runs.append((wall, rss_kb / 1024.0, size))
+            if not runs:
+                continue
+            wall, peak, size = min(runs)
+            if base is None:
+                base = wall
+            print("%-84s %-9s %9.2f %8.1f%% %9.1f %10.2f" % (options, level, wall, 100.0 * (wall / base - 1.0),
+                                                             peak, size))
+    return 1 if failed else 0
+
+
+def bench_suite(args, cat):
+    configs = suite_configs(cat, args.corecount)
+    if not configs:
+        print("No in-budget configurations")
+        return 1
+    store = resultstore.ResultStore(args.db, workdir=os.path.dirname(args.script))
+    version = sst_version(args.sst)
+    requests = workload_requests(cat)
+    sst_args = ["--print-timing-info"] + args.sst_arg
+    print("SST: " + version)
+    print("%-84s %9s %9s %9s %9s %9s %8s %9s %8s" % ("configuration", "wall s", "run s", "build s", "python s",
+                                                      "peak MiB", "Mreq/s", "previous", "change"))
+    failed = 0
+    regressions = []
+    for cfg in configs:
+        options = catalog.model_options(cat, cfg)
+        runs = []
+        for _ in range(args.repeat):
+            returncode, text, wall, rss_kb = run_sst(args.sst, sst_args, args.script, options)
+            simtime_ps, run_s = parse_run(text)
+            if returncode != 0 or simtime_ps is None:
+                print("%-84s FAILED (exit %d)" % (options, returncode))
+                failed += 1
+                break
+            build = parse_build(text)
+            runs.append({"wall_time" : wall, "run_time" : run_s, "sst_build_time" : build["sst_build_s"],
+                         "python_build_time" : build["python_s"], "peak_rss_kb" : rss_kb,
+                         "requests_per_s" : requests / wall, "simulated_time_ps" : simtime_ps})
+        if not runs:
+            continue
+        # Fastest repeat: the least disturbed by the rest of the machine
+        best = min(runs, key=lambda r: r["wall_time"])
+        previous = store.last_benchmark(options)
+        store.record_benchmark(options, sst_version=version, **best)
+        change = flag = ""
+        if previous is not None:
+            ratio = best["wall_time"] / previous["wall_time"]
+            change = "%+.1f%%" % (100.0 * (ratio - 1.0))
+            if ratio > 1.0 + args.tolerance:
+                flag = "  REGRESSION"
+                regressions.append((options, ratio, previous))
+        print("%-84s %9.2f %9s %9s %9s %9.1f %8.3f %9s %8s%s" % (
+            options, best["wall_time"], _fmt(best["run_time"], "%.2f"), _fmt(best["sst_build_time"], "%.3f"),
+            _fmt(best["python_build_time"], "%.3f"), best["peak_rss_kb"] / 1024.0, best["requests_per_s"] / 1e6,
+            _fmt(previous and previous["wall_time"], "%.2f"), change, flag))
+
+    for options, ratio, previous in regressions:
+        causes = []
+        changed = store.changed_files(previous["fingerprint"])
+        if changed is None:
+            causes.append("the model (its earlier fingerprint was pruned)")
+        elif changed:
+            causes.append("model files " + ", ".join(changed))
+        if previous["sst_version"] != version:
+            causes.append("SST (was " + previous["sst_version"] + ")")
+        print("Regression: %s is %.2fx slower than on %s; changed since: %s" % (
+            options, ratio, time.strftime("%Y-%m-%d %H:%M", time.localtime(previous["created"])),
+            "; ".join(causes) or "nothing recorded (machine load?)"))
+    store.close()
+    print("%d configurations, %d failed, %d regressions over %.0f%%" % (len(configs), failed, len(regressions),
+                                                                       100.0 * args.tolerance))
+    return 1 if failed or regressions else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the simulator on scc-sst-node.py configurations")
+    parser.add_argument("--sst", default="sst", help="SST executable, default: sst")
+    parser.add_argument("--script", default=os.path.join(SCRIPT_DIR, "scc-sst-node.py"), help="SST input script")
+    parser.add_argument("--sst-arg", action="append", default=[], help="Extra argument passed to sst (repeatable)")
+    sub = parser.add_subparsers(dest="command")
+    build = sub.add_parser("build", help="Graph construction time and memory, shared versus copied parameters")
+    build.add_argument("-n", "--corecount", type=int, action="append", help="Core count (repeatable, default: catalog)")
+    build.add_argument("--repeat", type=int, default=3, help="Runs per measurement, default: %(default)s")
+    footprint = sub.add_parser("footprint", help="Construction time and memory, page maps and directories sized for "
+                               "the whole memory versus the workload footprint")
+    footprint.add_argument("-n", "--corecount", type=int, action="append",
+                           help="Core count (repeatable, default: catalog)")
+    footprint.add_argument("--repeat", type=int, default=3, help="Runs per measurement, default: %(default)s")
+    threads = sub.add_parser("threads", help="Wall time against SST thread count")
+    threads.add_argument("-n", "--corecount", type=int, action="append",
+                         help="Core count (repeatable, default: catalog)")
+    threads.add_argument("--threads", default="1,2,4,8", help="Thread counts, default: %(default)s")
+    threads.add_argument("--partition", choices=["tiles", "sst"], default="tiles",
+                         help="Partitioning passed to the script, default: %(default)s")
+    threads.add_argument("--repeat", type=int, default=1, help="Runs per measurement, default: %(default)s")
+    stats = sub.add_parser("stats", help="Cost of statistics collection, off versus summary versus detailed")
+    stats.add_argument("-n", "--corecount", type=int, action="append", help="Core count (repeatable, default: catalog)")
+    stats.add_argument("--format", choices=sorted(statsload.FORMATS), default="csvgz",
+                       help="Statistics output, default: %(default)s")
+    stats.add_argument("--repeat", type=int, default=1, help="Runs per measurement, default: %(default)s")
+    suite = sub.add_parser("suite", help="Record the simulation cost of a representative set of configurations and "
+                           "flag regressions")
+    suite.add_argument("-n", "--corecount", type=int, action="append", help="Core count (repeatable, default: catalog)")
+    suite.add_argument("--tolerance", type=float, default=TOLERANCE,
+                       help="Slowdown flagged as a regression, default: %(default)s")
+    suite.add_argument("--db", default=resultstore.DEFAULT_DB, help="Result store, default: %(default)s")
+    suite.add_argument("--repeat", type=int, default=1, help="Runs per measurement, default: %(default)s")
+    args = parser.parse_args(argv)
+
+    cat = catalog.load()
+    args.script = os.path.abspath(args.script)
+    if args.command == "build":
+        return bench_build(args, cat)
+    if args.command == "footprint":
+        return bench_footprint(args, cat)
+    if args.command == "threads":
+        return bench_threads(args, cat)
+    if args.command == "stats":
+        return bench_stats(args, cat)
+    if args.command == "suite":
+        return bench_suite(args, cat)
+    parser.print_help()
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
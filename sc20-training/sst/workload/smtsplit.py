@@ -0,0 +1,118 @@
+############################################################################################################################
+# Work split between the two hardware threads of an SMT core
+#
+# With SMT each core runs two generators, core x.0 and core x.1, on the subdomain meshpart.py gives the core. The core
+# finishes its sweep when the slower thread does, so the split should give both threads the same number of points:
+#
+#   z         the original split: both threads get the whole x/y range and z is halved at splitz = (endz - beginz) / 2.
+#             An odd number of planes leaves thread 0 a plane more, and a one-plane slab leaves thread 1 no work.
+#   balanced  halves the subdomain along the axis whose cut leaves the smaller difference: none when an extent is even
+#             (z first, so this is the z split whenever the slab has an even number of planes), otherwise one row or
+#             plane of the smallest cross-section.
+#   rows      interleaves the y rows: thread 0 sweeps rows beginy, beginy + 2, ... and thread 1 the rows in between
+#             (generator parameter ystep), so both threads walk the same plane and share its neighbours in the L1.
+#             The threads differ by at most one row.
+#
+# The skew of a core is the difference between its threads' points over the larger, the share of the core's sweep its
+# faster thread sits idle. The critical path is the largest thread of any core over the ideal, half the largest
+# subdomain.
+#
+#   python smtsplit.py                      # every catalog core count and split
+#   python smtsplit.py -n 22 --split rows -v
+############################################################################################################################
+from __future__ import print_function, division
+
+import argparse
+import sys
+
+import meshpart
+
+SPLITS = ["z", "balanced", "rows"]
+
+
+def _halves(lo, hi):
+    """((lo, mid), (mid + 1, hi)) with the first half a point longer when the extent is odd."""
+    mid = lo + (hi - lo) // 2
+    return (lo, mid), (mid + 1, hi)
+
+
+def thread_boxes(box, split):
+    """Work of the two threads of a core as (xb, xe, yb, ye, zb, ze, ystep) with inclusive bounds; ye is the last row
+    a thread sweeps. ValueError for an unknown split."""
+    xb, xe, yb, ye, zb, ze = box
+    extents = [xe - xb + 1, ye - yb + 1, ze - zb + 1]
+    if split == "z":
+        splitz = (ze - zb) // 2
+        return [(xb, xe, yb, ye, zb, zb + splitz, 1), (xb, xe, yb, ye, zb + splitz + 1, ze, 1)]
+    if split == "rows" and extents[1] > 1:
+        last = [y + ((ye - y) // 2) * 2 for y in (yb, yb + 1)]
+        return [(xb, xe, yb, last[0], zb, ze, 2), (xb, xe, yb + 1, last[1], zb, ze, 2)]
+    if split not in SPLITS:
+        raise ValueError("unknown SMT split " + split)
+
+    # balanced (and rows on a single row): the cut leaving the fewest extra points, z first on ties
+    def extra(axis):
+        return (extents[axis] % 2) * extents[0] * extents[1] * extents[2] // extents[axis]
+    axes = [axis for axis in (2, 1, 0) if extents[axis] > 1] or [2]
+    axis = min(axes, key=lambda a: (extra(a), axes.index(a)))
+    bounds = [list(box), list(box)]
+    for t, (lo, hi) in enumerate(_halves(box[2 * axis], box[2 * axis + 1])):
+        bounds[t][2 * axis], bounds[t][2 * axis + 1] = lo, hi
+    return [tuple(b) + (1,) for b in bounds]
+
+
+def points(tbox):
+    """Points a thread sweeps (0 for an empty range)."""
+    xb, xe, yb, ye, zb, ze, ystep = tbox
+    if xe < xb or ye < yb or ze < zb:
+        return 0
+    return (xe - xb + 1) * ((ye - yb) // ystep + 1) * (ze - zb + 1)
+
+
+def skew(tboxes):
+    """Share of the core's sweep the faster thread is idle: (larger - smaller) / larger."""
+    counts = [points(t) for t in tboxes]
+    return (max(counts) - min(counts)) / max(counts)
+
+
+def split_boxes(corecount, globalmesh, split):
+    """[(subdomain, thread boxes)] of every core."""
+    return [(box, thread_boxes(box, split)) for box in meshpart.decompose(corecount, globalmesh)]
+
+
+def report(corecount, globalmesh, split, verbose=False):
+    cores = split_boxes(corecount, globalmesh, split)
+    largest = max(meshpart.box_points(box) for box, _ in cores)
+    longest = max(points(t) for _, tboxes in cores for t in tboxes)
+    skews = [skew(tboxes) for _, tboxes in cores]
+    worst = max(range(len(cores)), key=lambda i: skews[i])
+    print("%3d cores, %-8s: thread points %d - %d, critical path %+.3f%% over ideal, skew mean %.3f%% worst %.3f%% "
+          "(core %d: %s)" % (corecount, split, min(points(t) for _, tboxes in cores for t in tboxes), longest,
+                             100.0 * (longest / (largest / 2.0) - 1), 100.0 * sum(skews) / len(skews),
+                             100.0 * skews[worst], worst, " / ".join(str(points(t)) for t in cores[worst][1])))
+    if verbose:
+        for i, (box, tboxes) in enumerate(cores):
+            print("  core %3d: x %3d-%3d  y %3d-%3d  z %3d-%3d  threads %s  skew %.3f%%" % (
+                (i,) + box + (" / ".join("%d" % points(t) for t in tboxes), 100.0 * skews[i])))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Report the work split between the SMT threads of each core")
+    parser.add_argument("-n", "--corecount", type=int, action="append", help="Core count (repeatable, default: catalog)")
+    parser.add_argument("--globalmesh", type=int, help="Global mesh size (default: catalog workload)")
+    parser.add_argument("--split", choices=SPLITS, action="append", help="Split (repeatable, default: all)")
+    parser.add_argument("-v", "--verbose", action="store_true", help="List the threads of every core")
+    args = parser.parse_args(argv)
+
+    import catalog
+    cat = catalog.load()
+    counts = args.corecount or [int(v) for v in catalog.option(cat, "corecount")["values"]]
+    globalmesh = args.globalmesh or cat["workload"]["globalmesh"]
+    for corecount in counts:
+        for split in args.split or SPLITS:
+            report(corecount, globalmesh, split, args.verbose)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1 @@
+# Stand-ins for SST without an install: sst (executable) and sst.py (module)
@@ -0,0 +1,229 @@
+############################################################################################################################
+# Pure-Python stand-in for the sst module
+#
+# Records the graph an SST input script builds instead of simulating it, so model scripts can be checked and inspected
+# without an SST install. Graph implements the parts of the sst module API the model uses (Component, Link,
+# setSubComponent, shared parameter sets, ranks and weights, program options, statistics) and rejects what SST would
+# reject at build time: duplicate component or link names, a port connected twice, a link connected twice.
+#
+# sccmodel.graph(cfg) builds a configuration into a fresh Graph. With this directory on PYTHONPATH, "import sst" gives
+# a module-level default graph, and an SST input script runs as a dry run; SST_STANDIN_JSON / SST_STANDIN_DOT name
+# files to export the graph to at exit:
+#
+#   SST_STANDIN_DOT=graph.dot PYTHONPATH=standin python scc-sst-node.py -n=22
+############################################################################################################################
+from __future__ import print_function, division
+
+import atexit
+import collections
+import json
+import os
+
+
+class GraphComponent:
+    """A component or subcomponent: its type, parameters, shared sets, placement and statistics."""
+
+    def __init__(self, graph, name, type, parent=None):
+        self.graph = graph
+        self.name = name
+        self.type = type
+        self.parent = parent
+        self.params = collections.OrderedDict()
+        self.shared = []
+        self.subcomponents = collections.OrderedDict()
+        self.rank = None
+        self.weight = None
+        self.statistics = None
+
+    def top(self):
+        """The component this (sub)component belongs to."""
+        return self if self.parent is None else self.parent.top()
+
+    def addParam(self, key, value):
+        self.params[key] = value
+
+    def addParams(self, params):
+        for key in sorted(params):
+            self.params[key] = params[key]
+
+    def addSharedParamSet(self, name):
+        if name not in self.graph.shared:
+            raise ValueError("%s: unknown shared parameter set %s" % (self.name, name))
+        self.shared.append(name)
+
+    def setSubComponent(self, slot, type, slot_num=0):
+        key = "%s[%d]" % (slot, slot_num) if slot_num else slot
+        if key in self.subcomponents:
+            raise ValueError("%s: slot %s filled twice" % (self.name, key))
+        sub = GraphComponent(self.graph, self.name + ":" + key, type, self)
+        self.subcomponents[key] = sub
+        return sub
+
+    def setRank(self, rank, thread=0):
+        self.rank = (rank, thread)
+
+    def setWeight(self, weight):
+        self.weight = weight
+
+    def enableAllStatistics(self, params=None):
+        self.statistics = dict(params or {})
+
+    def enableStatistics(self, names, params=None):
+        self.statistics = dict(params or {}, names=list(names))
+
+    def all(self):
+        """This component and all its subcomponents, depth first."""
+        result = [self]
+        for sub in self.subcomponents.values():
+            result.extend(sub.all())
+        return result
+
+    def param_count(self):
+        return len(self.params) + sum(len(self.graph.shared[name]) for name in self.shared)
+
+    def to_dict(self):
+        result = collections.OrderedDict([("name", self.name), ("type", self.type)])
+        result["params"] = dict((k, str(v)) for k, v in self.params.items())
+        for key in ["shared", "rank", "weight", "statistics"]:
+            if getattr(self, key):
+                result[key] = getattr(self, key)
+        if self.subcomponents:
+            result["subcomponents"] = [sub.to_dict() for sub in self.subcomponents.values()]
+        return result
+
+
+class GraphLink:
+    """A link and the two (component, port, latency) ends it connects."""
+
+    def __init__(self, graph, name):
+        self.graph = graph
+        self.name = name
+        self.ends = None
+
+    def connect(self, end0, end1):
+        if self.ends is not None:
+            raise ValueError("link %s connected twice" % self.name)
+        for comp, port, _ in (end0, end1):
+            if (comp.name, port) in self.graph.ports:
+                raise ValueError("port %s of %s already connected by %s" %
+                                 (port, comp.name, self.graph.ports[(comp.name, port)]))
+            self.graph.ports[(comp.name, port)] = self.name
+        self.ends = (end0, end1)
+
+
+class Graph:
+    """A recorded SST graph; its methods stand in for the module-level functions of sst."""
+
+    def __init__(self, threads=1, ranks=1):
+        self.threads = threads
+        self.ranks = ranks
+        self.components = collections.OrderedDict()
+        self.links = collections.OrderedDict()
+        self.ports = {}
+        self.shared = collections.OrderedDict()
+        self.program_options = {}
+        self.statistics = {}
+
+    def Component(self, name, type):
+        if name in self.components:
+            raise ValueError("duplicate component name " + name)
+        comp = GraphComponent(self, name, type)
+        self.components[name] = comp
+        return comp
+
+    def Link(self, name):
+        if name in self.links:
+            raise ValueError("duplicate link name " + name)
+        link = GraphLink(self, name)
+        self.links[name] = link
+        return link
+
+    def addSharedParams(self, name, params):
+        if name in self.shared:
+            raise ValueError("shared parameter set %s registered twice" % name)
+        self.shared[name] = dict(params)
+
+    def setProgramOption(self, key, value):
+        self.program_options[key] = value
+
+    def getThreadCount(self):
+        return self.threads
+
+    def getMPIRankCount(self):
+        return self.ranks
+
+    def setStatisticLoadLevel(self, level):
+        self.statistics["load_level"] = level
+
+    def setStatisticOutput(self, module, params=None):
+        self.statistics["output"] = [module, dict(params or {})]
+
+    def enableAllStatisticsForAllComponents(self, params=None):
+        self.statistics["all_components"] = dict(params or {})
+
+    def all_components(self):
+        return [c for comp in self.components.values() for c in comp.all()]
+
+    def counts(self):
+        """Components, subcomponents, links, parameters (shared sets resolved), shared sets, unconnected links."""
+        every = self.all_components()
+        return {
+            "components" : len(self.components),
+            "subcomponents" : len(every) - len(self.components),
+            "links" : len(self.links),
+            "params" : sum(c.param_count() for c in every),
+            "shared_sets" : len(self.shared),
+            "unconnected_links" : sum(1 for link in self.links.values() if link.ends is None),
+        }
+
+    def to_dict(self):
+        links = []
+        for link in self.links.values():
+            ends = [[comp.name, port, latency] for comp, port, latency in link.ends or []]
+            links.append(collections.OrderedDict([("name", link.name), ("ends", ends)]))
+        return collections.OrderedDict([
+            ("counts", self.counts()),
+            ("program_options", self.program_options),
+            ("statistics", self.statistics),
+            ("shared", self.shared),
+            ("components", [comp.to_dict() for comp in self.components.values()]),
+            ("links", links),
+        ])
+
+    def to_json(self, f):
+        json.dump(self.to_dict(), f, indent=1, default=str)
+        f.write("\n")
+
+    def to_dot(self, f):
+        """One node per component, one edge per link between the components that own its ends."""
+        f.write("graph sst {\n")
+        for comp in self.components.values():
+            f.write('  "%s" [label="%s\\n%s"];\n' % (comp.name, comp.name, comp.type))
+        for link in self.links.values():
+            if link.ends is None:
+                continue
+            (c0, p0, lat), (c1, p1, _) = link.ends
+            f.write('  "%s" -- "%s" [label="%s", taillabel="%s", headlabel="%s"];\n' %
+                    (c0.top().name, c1.top().name, lat, p0, p1))
+        f.write("}\n")
+
+
+# Module-level API: a default graph, as "import sst" gives inside SST
+_default = Graph(int(os.environ.get("SST_STANDIN_THREADS", "1")), int(os.environ.get("SST_STANDIN_RANKS", "1")))
+for _name in ["Component", "Link", "addSharedParams", "setProgramOption", "getThreadCount", "getMPIRankCount",
+              "setStatisticLoadLevel", "setStatisticOutput", "enableAllStatisticsForAllComponents", "counts",
+              "to_json", "to_dot"]:
+    globals()[_name] = getattr(_default, _name)
+
+
+def graph():
+    """The default graph."""
+    return _default
+
+
+@atexit.register
+def _export():
+    for variable, method in [("SST_STANDIN_JSON", _default.to_json), ("SST_STANDIN_DOT", _default.to_dot)]:
+        if os.environ.get(variable) and _default.components:
+            with open(os.environ[variable], "w") as f:
+                method(f)
@@ -0,0 +1,220 @@
+############################################################################################################################
+# SST statistics of scc-sst-node.py runs
+#
+# --stats=summary (or SC19_STATS=summary, which sweep.py --stats sets) enables the load-level-1 statistics of every
+# component: cache hits and misses, router send counts, directory and memory controller requests, timingDRAM counters,
+# Miranda issue/stall cycles and the sc19 generators' points, requests, blocked and completion time (heartbeat.py),
+# dumped once at the end of the run. --stats=detailed raises the load level to every statistic the elements define
+# (MSHR occupancy, latencies, port stalls and idle time, queue depths, ...) and dumps them in time windows
+# (--stats-window, default 10us), each window holding only its own counts. The output is gzipped CSV (stats.csv.gz,
+# default), plain CSV or HDF5 (--stats-format) in the run directory.
+#
+# load_arrays() reads a stats file into NumPy columns, load_frame() into a pandas DataFrame (pandas and, for HDF5, h5py
+# are only needed for those formats). Statistic fields typed by SST (Sum.u64, Count.u64, ...) are folded into one
+# float column per field (Sum, SumSQ, Count, Min, Max).
+#
+#   python statsload.py sweep-out/runs/<run>                  # hit rates and per-component-kind totals
+#   python statsload.py stats.csv.gz --windows CacheMisses    # one statistic per time window
+############################################################################################################################
+from __future__ import print_function, division
+
+import argparse
+import csv
+import gzip
+import io
+import os
+import re
+import sys
+
+# SST statistic load level of each --stats level
+LEVELS = {"off" : 0, "summary" : 1, "detailed" : 7}
+# Dump interval; 0ns dumps once at the end of the run
+WINDOWS = {"summary" : "0ns", "detailed" : "10us"}
+# --stats-format: (SST statistic output, file name)
+FORMATS = {
+    "csvgz" : ("sst.statoutputcsvgz", "stats.csv.gz"),
+    "csv" : ("sst.statoutputcsv", "stats.csv"),
+    "hdf5" : ("sst.statoutputhdf5", "stats.h5"),
+}
+
+KEY_COLUMNS = ["ComponentName", "StatisticName", "StatisticSubId", "StatisticType"]
+FIELDS = ["Sum", "SumSQ", "Count", "Min", "Max"]
+KIND_RE = re.compile(r"^(l1cache|l2cache|l3cache|rtr|dirctrl|memctrl|core|smt)")
+CACHE_KINDS = ["l1cache", "l2cache", "l3cache"]
+
+
+def output(fmt, directory=""):
+    """(SST statistic output module, its parameters) for a --stats-format."""
+    module, name = FORMATS[fmt]
+    params = {"filepath" : os.path.join(directory, name)}
+    if fmt != "hdf5":
+        params["separator"] = ","
+    return module, params
+
+
+def stat_params(level, window=None):
+    """Parameters passed to enableAllStatistics() for a --stats level."""
+    window = window or WINDOWS[level]
+    params = {"type" : "sst.AccumulatorStatistic", "rate" : window}
+    if not re.match(r"^0+[a-z]*$", window):
+        # Windowed dumps hold the counts of their own window only
+        params["resetOnRead"] = 1
+    return params
+
+
+def find_stats(path):
+    """The stats file of a run directory (or the path itself if it is a file), None if the run wrote none."""
+    if os.path.isfile(path):
+        return path
+    for _, name in sorted(FORMATS.values()):
+        if os.path.exists(os.path.join(path, name)):
+            return os.path.join(path, name)
+    return None
+
+
+def component_kind(name):
+    """l1cache, l2cache, l3cache, rtr, dirctrl, memctrl, core or smt, from a component name of scc-sst-node.py."""
+    match = KIND_RE.match(name)
+    return match.group(1) if match else "other"
+
+
+def _read_csv_rows(path):
+    raw = gzip.open(path, "rb") if path.endswith(".gz") else open(path, "rb")
+    with raw:
+        text = io.TextIOWrapper(raw, encoding="utf-8") if sys.version_info[0] >= 3 else raw
+        reader = csv.reader(text, skipinitialspace=True)
+        header = [h.strip() for h in next(reader)]
+        rows = [row for row in reader if row]
+    return header, rows
+
+
+def _csv_columns(path):
+    header, rows = _read_csv_rows(path)
+    columns = dict((h, [row[i] if i < len(row) else "" for row in rows]) for i, h in enumerate(header))
+    return columns, len(rows)
+
+
+def _hdf5_columns(path):
+    # statoutputhdf5 keeps one group per component and statistic (and sub-id) with a dataset per field; walk the
+    # groups rather than relying on a fixed depth
+    import h5py
+    columns = dict((name, []) for name in KEY_COLUMNS + ["SimTime"])
+    count = [0]
+
+    def visit(name, group):
+        if not isinstance(group, h5py.Group):
+            return
+        datasets = dict((k, v[()]) for k, v in group.items() if isinstance(v, h5py.Dataset))
+        if not datasets or "SimTime" not in datasets:
+            return
+        parts = name.split("/")
+        n = len(datasets["SimTime"])
+        columns["ComponentName"].extend([parts[0]] * n)
+        columns["StatisticName"].extend([parts[1] if len(parts) > 1 else ""] * n)
+        columns["StatisticSubId"].extend(["/".join(parts[2:])] * n)
+        columns["StatisticType"].extend([""] * n)
+        for key, values in datasets.items():
+            columns.setdefault(key, [0] * count[0]).extend(list(values))
+        count[0] += n
+        for values in columns.values():
+            values.extend([0] * (count[0] - len(values)))
+
+    with h5py.File(path, "r") as f:
+        f.visititems(visit)
+    return columns, count[0]
+
+
+def load_arrays(path):
+    """Statistics of a run as a dict of NumPy columns: ComponentName, StatisticName, StatisticSubId, StatisticType,
+    kind (component_kind), SimTime (ps), Rank and the float fields Sum, SumSQ, Count, Min, Max."""
+    import numpy as np
+    path = find_stats(path)
+    if path is None:
+        raise IOError("no statistics output found")
+    columns, n = _hdf5_columns(path) if path.endswith(".h5") else _csv_columns(path)
+    result = {}
+    for key in KEY_COLUMNS:
+        result[key] = np.array(columns.get(key, [""] * n), dtype=str)
+    result["kind"] = np.array([component_kind(name) for name in result["ComponentName"]], dtype=str)
+    for key in ["SimTime", "Rank"]:
+        result[key] = np.array([float(v or 0) for v in columns.get(key, [0] * n)])
+    for field in FIELDS:
+        # Sum.u32, Sum.u64, Sum.f64 ...: each statistic fills the one of its own type
+        typed = [h for h in columns if h == field or h.startswith(field + ".")]
+        values = np.zeros(n)
+        for h in typed:
+            values += np.array([float(v or 0) for v in columns[h]])
+        result[field] = values
+    return result
+
+
+def load_frame(path):
+    """Statistics of a run as a pandas DataFrame with the columns of load_arrays()."""
+    import pandas as pd
+    cols = load_arrays(path)
+    return pd.DataFrame(cols, columns=KEY_COLUMNS + ["kind", "SimTime", "Rank"] + FIELDS)
+
+
+def totals(cols):
+    """{(kind, statistic) : (sum, count)} over all components, sub-ids and windows."""
+    result = {}
+    for kind, stat, value, count in zip(cols["kind"], cols["StatisticName"], cols["Sum"], cols["Count"]):
+        s, c = result.get((kind, stat), (0.0, 0.0))
+        result[(kind, stat)] = (s + value, c + count)
+    return result
+
+
+def hit_rates(tot):
+    """{cache kind : hit rate} from CacheHits and CacheMisses."""
+    result = {}
+    for kind in CACHE_KINDS:
+        hits = tot.get((kind, "CacheHits"), (0.0, 0.0))[0]
+        misses = tot.get((kind, "CacheMisses"), (0.0, 0.0))[0]
+        if hits + misses > 0:
+            result[kind] = hits / (hits + misses)
+    return result
+
+
+def windows(cols, statistic, kind=None):
+    """(window end times in ps, summed statistic per window), optionally for one component kind only."""
+    import numpy as np
+    mask = cols["StatisticName"] == statistic
+    if kind is not None:
+        mask &= cols["kind"] == kind
+    times = np.unique(cols["SimTime"][mask])
+    sums = np.array([cols["Sum"][mask & (cols["SimTime"] == t)].sum() for t in times])
+    return times, sums
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Summarize the SST statistics of a run")
+    parser.add_argument("path", help="Run directory or stats file")
+    parser.add_argument("--windows", metavar="STATISTIC", help="Print this statistic per time window")
+    parser.add_argument("--kind", help="Only components of this kind (l1cache, rtr, memctrl, ...)")
+    args = parser.parse_args(argv)
+
+    path = find_stats(args.path)
+    if path is None:
+        print("No statistics in %s (run with --stats=summary or detailed)" % args.path)
+        return 1
+    cols = load_arrays(path)
+    if args.windows:
+        times, sums = windows(cols, args.windows, args.kind)
+        print("%14s %16s" % ("time us", args.windows))
+        for t, s in zip(times, sums):
+            print("%14.3f %16.0f" % (t / 1e6, s))
+        return 0
+
+    tot = totals(cols)
+    print("%s: %d rows, %d components" % (path, len(cols["Sum"]), len(set(cols["ComponentName"]))))
+    for kind, rate in sorted(hit_rates(tot).items()):
+        print("  %-8s hit rate %.4f" % (kind, rate))
+    print("%-10s %-32s %18s %14s" % ("kind", "statistic", "sum", "count"))
+    for (kind, stat), (s, c) in sorted(tot.items()):
+        if args.kind is None or kind == args.kind:
+            print("%-10s %-32s %18.0f %14.0f" % (kind, stat, s, c))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
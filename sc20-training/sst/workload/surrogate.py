@@ -0,0 +1,306 @@
+############################################################################################################################
+# Surrogate model for ranking configurations before simulating them
+#
+# Trains a Gaussian-process regression on the runs in the result store to predict log(simulated time) with an
+# uncertainty. Features are the catalog options plus derived quantities: threads, the largest per-thread subdomain from
+# MeshPartitioner, mesh size, memory bandwidth and latency. Configurations to simulate next are chosen by expected
+# improvement in simulated time * cost (the competition's performance per cost), one batch at a time.
+#
+#   python surrogate.py suggest -k 8        # next configurations to simulate
+#   python surrogate.py rank --top 20       # predicted best configurations
+#   python surrogate.py predict -- "-n=40 -c=fast -m=bw"
+#   python surrogate.py validate            # leave-one-out error on the stored runs
+############################################################################################################################
+from __future__ import print_function, division
+
+import argparse
+import math
+import re
+import sys
+
+import numpy as np
+
+import catalog
+import meshpart
+import resultstore
+
+MEM_CLOCK_HZ = 1.2e9
+LINE_BYTES = 64
+
+def _kib(size):
+    value, unit = re.match(r"([0-9.]+)\s*([KMG]i?B)", size).groups()
+    return float(value) * {"KiB" : 1, "MiB" : 1024, "GiB" : 1024 * 1024, "KB" : 1, "MB" : 1024, "GB" : 1024 * 1024}[unit]
+
+
+def _ghz(clock):
+    value, unit = re.match(r"([0-9.]+)\s*([GM]Hz)", clock).groups()
+    return float(value) / (1000.0 if unit == "MHz" else 1.0)
+
+
+def memory_bandwidth(memattr, memchan):
+    """Peak DRAM bandwidth in B/s: the lower of the controller issue rate and the bank-level parallelism."""
+    issue = memattr["max_requests_per_cycle"] * LINE_BYTES * MEM_CLOCK_HZ
+    bank_cycles = memattr["RCD"] + memattr["CL"] + memattr["dataCycles"] + memattr["TRP"]
+    banks = memattr["numRanks"] * memattr["numBanks"] * LINE_BYTES * MEM_CLOCK_HZ / bank_cycles
+    return memchan * min(issue, banks)
+
+
+_partition_cache = {}
+
+
+def max_thread_points(corecount, smt, globalmesh):
+    """Points in the largest per-thread subdomain (the critical path of the stencil sweep)."""
+    key = (corecount, smt, globalmesh)
+    if key not in _partition_cache:
+        mp = meshpart.MeshPartitioner(corecount, 6, globalmesh)
+        largest = 0
+        for core in range(corecount):
+            xb, xe, yb, ye, zb, ze = mp.getPartitionForCore(core)
+            points = (xe - xb + 1) * (ye - yb + 1) * (ze - zb + 1)
+            largest = max(largest, (points + 1) // 2 if smt else points)
+        _partition_cache[key] = largest
+    return _partition_cache[key]
+
+
+def features(cat, cfg):
+    corecount = int(cfg["corecount"])
+    smt = cfg["smt"] == "yes"
+    memchan = int(cfg["memchannels"])
+    globalmesh = cat["workload"]["globalmesh"]
+    core = catalog.attributes(cat, "coretype", cfg["coretype"])
+    memattr = catalog.attributes(cat, "memtype", cfg["memtype"])
+    l3_kib = _kib(catalog.attributes(cat, "l3size", cfg["l3size"])["cache_size"])
+    return [
+        corecount,
+        corecount * (2 if smt else 1),
+        _ghz(core["clock"]),
+        core["max_reqs_cycle"],
+        core["maxmemreqpending"],
+        1.0 if smt else 0.0,
+        math.log(_kib(catalog.attributes(cat, "l1size", cfg["l1size"])["cache_size"])),
+        math.log(_kib(catalog.attributes(cat, "l2size", cfg["l2size"])["cache_size"])),
+        1.0 if cfg["l2type"] == "shared" else 0.0,
+        math.log(l3_kib * corecount),
+        catalog.attributes(cat, "noc", cfg["noc"])["clock_mhz"] / 1000.0,
+        memchan,
+        math.log(memory_bandwidth(memattr, memchan)),
+        (memattr["RCD"] + memattr["CL"]) / MEM_CLOCK_HZ * 1e9,
+        math.log(max_thread_points(corecount, smt, globalmesh)),
+        math.log((globalmesh - 2) ** 3),
+    ]
+
+
+def _norm_cdf(z):
+    return 0.5 * (1.0 + np.vectorize(math.erf)(z / math.sqrt(2.0)))
+
+
+def _norm_pdf(z):
+    return np.exp(-0.5 * z * z) / math.sqrt(2.0 * math.pi)
+
+
+class GaussianProcess:
+    """GP regression with a ridge-regression mean and an RBF kernel on standardized features.
+
+    The length scale and noise level are picked by maximizing the log marginal likelihood over a small grid.
+    """
+
+    LENGTH_SCALES = [0.5, 1.0, 2.0, 4.0, 8.0]
+    NOISE = [1e-4, 1e-3, 1e-2, 3e-2]
+    RIDGE = 1.0
+
+    def fit(self, X, y):
+        X = np.asarray(X, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        self.mu = X.mean(axis=0)
+        self.sd = X.std(axis=0)
+        self.sd[self.sd == 0] = 1.0
+        Z = (X - self.mu) / self.sd
+        # Linear trend first, the GP models what is left
+        A = np.hstack([np.ones((len(Z), 1)), Z])
+        reg = self.RIDGE * np.eye(A.shape[1])
+        reg[0, 0] = 0.0
+        self.beta = np.linalg.solve(A.T.dot(A) + reg, A.T.dot(y))
+        r = y - A.dot(self.beta)
+        self.signal = max(float(np.var(r)), 1e-6)
+
+        best = None
+        d2 = ((Z[:, None, :] - Z[None, :, :]) ** 2).sum(axis=2)
+        for ls in self.LENGTH_SCALES:
+            scale = ls * math.sqrt(Z.shape[1])
+            K0 = self.signal * np.exp(-0.5 * d2 / (scale * scale))
+            for noise in self.NOISE:
+                K = K0 + (noise + 1e-9) * np.eye(len(Z))
+                try:
+                    L = np.linalg.cholesky(K)
+                except np.linalg.LinAlgError:
+                    continue
+                alpha = np.linalg.solve(L.T, np.linalg.solve(L, r))
+                lml = -0.5 * r.dot(alpha) - np.log(np.diag(L)).sum()
+                if best is None or lml > best[0]:
+                    best = (lml, scale, noise, L, alpha)
+        _, self.scale, self.noise, self.L, self.alpha = best
+        self.Z = Z
+        return self
+
+    def _kernel(self, Za, Zb):
+        d2 = ((Za[:, None, :] - Zb[None, :, :]) ** 2).sum(axis=2)
+        return self.signal * np.exp(-0.5 * d2 / (self.scale * self.scale))
+
+    def predict(self, X):
+        """Predictive mean and standard deviation."""
+        Z = (np.asarray(X, dtype=np.float64) - self.mu) / self.sd
+        A = np.hstack([np.ones((len(Z), 1)), Z])
+        Ks = self._kernel(Z, self.Z)
+        mean = A.dot(self.beta) + Ks.dot(self.alpha)
+        v = np.linalg.solve(self.L, Ks.T)
+        var = self.signal + self.noise - (v * v).sum(axis=0)
+        return mean, np.sqrt(np.maximum(var, 1e-12))
+
+
+class Surrogate:
+    def __init__(self, cat, results):
+        self.cat = cat
+        self.space = catalog.enumerate_costs(cat)
+        self.candidates = self.space.configs()
+        self.candidate_cost = self.space.cost[self.space.within()]
+        self.X = np.array([features(cat, cfg) for cfg in self.candidates])
+        index = dict((catalog.model_options(cat, cfg), i) for i, cfg in enumerate(self.candidates))
+        # Only runs of plain catalog configurations; runs with extra model options simulate something else
+        self.observed = {}
+        for rec in results:
+            if rec["options"] in index and rec["simulated_time_ps"]:
+                self.observed[index[rec["options"]]] = math.log(rec["simulated_time_ps"])
+        self.gp = None
+        if len(self.observed) >= 3:
+            idx = sorted(self.observed)
+            self.gp = GaussianProcess().fit(self.X[idx], [self.observed[i] for i in idx])
+
+    def predict(self, indices=None):
+        """(mean, sd) of log(simulated time in ps) for candidate indices."""
+        X = self.X if indices is None else self.X[indices]
+        return self.gp.predict(X)
+
+    def objective(self, log_time):
+        # log(time * cost); lower is better
+        return log_time + np.log(self.candidate_cost)
+
+    def expected_improvement(self, mean, sd, best):
+        obj = mean + np.log(self.candidate_cost)
+        z = (best - obj) / sd
+        return (best - obj) * _norm_cdf(z) + sd * _norm_pdf(z)
+
+    def suggest(self, k):
+        """Next k candidate indices to simulate.
+
+        With fewer than three runs this is a space-filling design; otherwise expected improvement, taking one pick at
+        a time and adding its predicted time as a pseudo-observation before the next ("kriging believer").
+        """
+        if self.gp is None:
+            return self._space_filling(k)
+        picks = []
+        observed = dict(self.observed)
+        gp = self.gp
+        for _ in range(k):
+            mean, sd = gp.predict(self.X)
+            best = min(observed[i] + math.log(self.candidate_cost[i]) for i in observed)
+            ei = self.expected_improvement(mean, sd, best)
+            ei[list(observed)] = -1.0
+            pick = int(np.argmax(ei))
+            if ei[pick] <= 0:
+                break
+            picks.append(pick)
+            observed[pick] = float(mean[pick])
+            idx = sorted(observed)
+            gp = GaussianProcess().fit(self.X[idx], [observed[i] for i in idx])
+        return picks
+
+    def _space_filling(self, k):
+        Z = (self.X - self.X.mean(axis=0)) / np.where(self.X.std(axis=0) > 0, self.X.std(axis=0), 1.0)
+        chosen = list(self.observed)
+        if not chosen:
+            chosen = [int(np.argmin(self.candidate_cost))]
+        picks = [] if self.observed else list(chosen)
+        dist = np.min(((Z[:, None, :] - Z[None, chosen, :]) ** 2).sum(axis=2), axis=1)
+        while len(picks) < k:
+            pick = int(np.argmax(dist))
+            if dist[pick] <= 0:
+                break
+            picks.append(pick)
+            dist = np.minimum(dist, ((Z - Z[pick]) ** 2).sum(axis=1))
+        return picks
+
+    def leave_one_out(self):
+        """Per-run (options, measured ps, predicted ps, predicted sd of log time) with each run held out."""
+        rows = []
+        idx = sorted(self.observed)
+        for i in idx:
+            rest = [j for j in idx if j != i]
+            gp = GaussianProcess().fit(self.X[rest], [self.observed[j] for j in rest])
+            mean, sd = gp.predict(self.X[[i]])
+            rows.append((catalog.model_options(self.cat, self.candidates[i]), math.exp(self.observed[i]),
+                         math.exp(mean[0]), sd[0]))
+        return rows
+
+
+def _format_time(ps):
+    return "%.4f us" % (ps / 1e6)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rank configurations with a surrogate trained on the result store")
+    parser.add_argument("--db", default=resultstore.DEFAULT_DB, help="Result store, default: %(default)s")
+    sub = parser.add_subparsers(dest="command")
+    suggest = sub.add_parser("suggest", help="Next configurations to simulate")
+    suggest.add_argument("-k", type=int, default=8, help="Batch size, default: %(default)s")
+    rank = sub.add_parser("rank", help="Predicted best configurations by time * cost")
+    rank.add_argument("--top", type=int, default=20)
+    predict = sub.add_parser("predict", help="Predicted simulated time for one --model-options string")
+    predict.add_argument("options")
+    sub.add_parser("validate", help="Leave-one-out prediction error on the stored runs")
+    args = parser.parse_args(argv)
+
+    store = resultstore.ResultStore(args.db)
+    model = Surrogate(store.cat, store.results())
+    print("%d of %d in-budget configurations simulated" % (len(model.observed), len(model.candidates)))
+
+    if args.command == "suggest":
+        for i in model.suggest(args.k):
+            cfg = model.candidates[i]
+            if model.gp is None:
+                print("%-90s cost %g (initial design)" % (catalog.model_options(store.cat, cfg), model.candidate_cost[i]))
+            else:
+                mean, sd = model.predict([i])
+                print("%-90s cost %-7g predicted %s (x/ %.2f)" % (catalog.model_options(store.cat, cfg),
+                      model.candidate_cost[i], _format_time(math.exp(mean[0])), math.exp(sd[0])))
+        return 0
+
+    if model.gp is None:
+        print("Need at least 3 simulated configurations; run 'suggest' for an initial design")
+        return 1
+    if args.command == "rank":
+        mean, sd = model.predict()
+        order = np.argsort(model.objective(mean))[:args.top]
+        for i in order:
+            tag = "simulated" if i in model.observed else ""
+            print("%-90s cost %-7g predicted %s (x/ %.2f) %s" % (catalog.model_options(store.cat, model.candidates[i]),
+                  model.candidate_cost[i], _format_time(math.exp(mean[i])), math.exp(sd[i]), tag))
+    elif args.command == "predict":
+        cfg = catalog.parse_model_options(store.cat, args.options)
+        mean, sd = model.gp.predict([features(store.cat, cfg)])
+        lo, hi = math.exp(mean[0] - 2 * sd[0]), math.exp(mean[0] + 2 * sd[0])
+        print("%s: predicted %s (95%% interval %s - %s)" % (catalog.model_options(store.cat, cfg),
+              _format_time(math.exp(mean[0])), _format_time(lo), _format_time(hi)))
+    elif args.command == "validate":
+        errors = []
+        for options, measured, predicted, sd in model.leave_one_out():
+            errors.append(abs(predicted - measured) / measured)
+            print("%-90s measured %s predicted %s (x/ %.2f)" % (options, _format_time(measured),
+                  _format_time(predicted), math.exp(sd)))
+        print("Mean absolute error %.1f%%, max %.1f%%" % (100 * np.mean(errors), 100 * np.max(errors)))
+    else:
+        parser.print_help()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,492 @@
+#!/usr/bin/env python
+############################################################################################################################
+# Design-space sweep driver for scc-sst-node.py
+#
+# Enumerates every in-budget combination of the catalog options (catalog.py), runs the SST jobs concurrently and records
+# the simulated time reported by each run. Jobs are packed by their estimated peak RSS and wall time so that the machine
+# stays busy without running out of memory. Each result is written to the result store (resultstore.py) as the run
+# finishes and points already in the store are skipped, so an interrupted sweep resumes with the same command.
+#
+# Full-size runs are bounded by the best result so far: a run of cost c only wins if it finishes before
+# best_time * best_cost / c, so SST is told to stop there (--stop-at). A run that reaches that time is recorded as
+# "dominated" with the time it reached as a lower bound, and the best result stays exact (--no-bound runs everything
+# to completion).
+#
+# Every run prints progress heartbeats with an ETA (heartbeat.py). While a job runs, its projected wall time replaces
+# the estimate the scheduler reserves memory by, and with --max-wall a run projected to take longer is stopped and
+# recorded as "timeout" (re-run with --retry-failed).
+#
+#   python sweep.py --jobs 8 --mem-gb 60 --outdir sweep-out
+#   python sweep.py --sst ./standin/sst --outdir /tmp/sweep-test     # dry run with the stand-in executable
+#   python sweep.py --scale 0.5                                      # fast screening at half size (calibrate.py)
+#   python sweep.py --trace-dir traces                               # replay recorded generator traces
+#   python sweep.py --stats summary                                  # keep SST statistics per run (statsload.py)
+#   python sweep.py --sample 16:1:1                                  # sampled screening runs (sampling.py)
+#   python sweep.py --iterations 30 --converge 0.01                  # steady-state time per iteration (iterations.py)
+#   python sweep.py --max-wall 3600                                  # stop runs projected to take over an hour
+############################################################################################################################
+from __future__ import print_function, division
+
+import argparse
+import errno
+import math
+import multiprocessing
+import os
+import re
+import signal
+import subprocess
+import sys
+import time
+
+import catalog
+import heartbeat
+import iterations
+import resultstore
+import sampling
+import statsload
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+CATALOG = catalog.load()
+
+TIME_UNITS = {"fs" : 1e-3, "ps" : 1.0, "ns" : 1e3, "us" : 1e6, "ms" : 1e9, "s" : 1e12}
+# A bounded run that ends within the precision SST prints its time with of the stop time is counted as stopped
+STOP_TOLERANCE = 1e-6
+SIMTIME_RE = re.compile(r"Simulation is complete, simulated time: ([0-9.eE+-]+) ?([a-z]+)")
+# Wall-clock seconds between the heartbeats of a run
+HEARTBEAT = 30.0
+# Progress a run must have made before --max-wall trusts its ETA
+MIN_PROGRESS = 0.02
+
+
+def config_cost(cfg):
+    return catalog.config_cost(CATALOG, cfg)
+
+
+def enumerate_configs(budget=None):
+    """All option combinations whose cost does not exceed the budget."""
+    return catalog.enumerate_configs(CATALOG, budget)
+
+
+def model_options(cfg):
+    """The --model-options string for a configuration (canonical form, also used as the result key)."""
+    return catalog.model_options(CATALOG, cfg)
+
+
+def run_name(cfg):
+    return "-".join("%s%s" % (opt["flag"].lstrip("-"), cfg[opt["name"]]) for opt in CATALOG["options"])
+
+
+def parse_simtime(text):
+    """Return (string, picoseconds) for the simulated time printed by SST, or (None, None)."""
+    match = None
+    for match in SIMTIME_RE.finditer(text):
+        pass
+    if match is None or match.group(2) not in TIME_UNITS:
+        return None, None
+    return "%s %s" % (match.group(1), match.group(2)), float(match.group(1)) * TIME_UNITS[match.group(2)]
+
+
+# Resource model
+#
+# Miranda keeps an 8B page-map entry per page for every thread. The script sizes pagecount to the workload footprint
+# (sccmodel.footprint(), about 28 MiB at full size), so the page maps are small next to the per-stop cost; the estimate
+# prices them at full size, which also covers scaled runs. Wall time scales with the number of clocked components.
+# Both estimates are corrected online by the ratio observed on finished runs of the same core count and SMT setting.
+BASE_RSS_MB = 200.0
+PER_STOP_RSS_MB = 12.0
+
+
+def threads_for(cfg):
+    corecount = int(cfg["corecount"])
+    return corecount * 2 if cfg["smt"] == "yes" else corecount
+
+
+def footprint_pages():
+    """Pages each thread maps for the full-size catalog workload."""
+    import sccmodel
+    workload = CATALOG["workload"]
+    mesh = workload["globalmesh"]
+    size = sccmodel.footprint({"histoslots" : workload["histoslots"], "meshx" : mesh, "meshy" : mesh, "meshz" : mesh})
+    return -(-size // sccmodel.PAGE_SIZE)
+
+
+def estimate_rss_mb(cfg):
+    pages = footprint_pages()
+    return BASE_RSS_MB + PER_STOP_RSS_MB * int(cfg["corecount"]) + threads_for(cfg) * pages * 8 / (1024.0 * 1024.0)
+
+
+def estimate_wall_s(cfg):
+    components = threads_for(cfg) + 4 * int(cfg["corecount"]) + 2 * int(cfg["memchannels"])
+    speed = {"slow" : 1.0, "medium" : 1.2, "fast" : 1.5}[cfg["coretype"]]
+    return 10.0 * components * speed
+
+
+class ResourceModel:
+    def __init__(self):
+        self.rss_ratio = {}
+        self.wall_ratio = {}
+
+    def _key(self, cfg):
+        return (cfg["corecount"], cfg["smt"])
+
+    def rss_mb(self, cfg):
+        return estimate_rss_mb(cfg) * self.rss_ratio.get(self._key(cfg), 1.0)
+
+    def wall_s(self, cfg):
+        return estimate_wall_s(cfg) * self.wall_ratio.get(self._key(cfg), 1.0)
+
+    def observe(self, cfg, peak_rss_kb, wall_s):
+        key = self._key(cfg)
+        # Never shrink the memory estimate below what was seen, keep a running mean for wall time
+        if peak_rss_kb:
+            ratio = (peak_rss_kb / 1024.0) / estimate_rss_mb(cfg)
+            self.rss_ratio[key] = max(self.rss_ratio.get(key, 0.0), ratio * 1.1)
+        if wall_s:
+            ratio = wall_s / estimate_wall_s(cfg)
+            self.wall_ratio[key] = 0.5 * (self.wall_ratio.get(key, ratio) + ratio)
+
+
+def available_memory_mb():
+    try:
+        with open("/proc/meminfo") as meminfo:
+            for line in meminfo:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) / 1024.0
+    except IOError:
+        pass
+    return 4096.0
+
+
+def scale_options(scale):
+    """Extra model options for a scaled problem (none at full size)."""
+    return [] if scale == 1 else ["--scale=%g" % scale]
+
+
+def sample_options(sample):
+    """Extra model options for a sampled run (none without sampling)."""
+    return ["--sample=" + sample] if sample else []
+
+
+def iteration_options(its, converge):
+    """Extra model options for a multi-iteration run (none for the catalog workload)."""
+    return (["--iterations=%d" % its] if its else []) + (["--converge=%g" % converge] if converge else [])
+
+
+class Job:
+    def __init__(self, cfg, model, scale=1.0, sample=None, its=None, converge=None):
+        self.cfg = cfg
+        self.scale = scale
+        self.sample = sample
+        self.its = its
+        self.converge = converge
+        self.options = " ".join([model_options(cfg)] + scale_options(scale) + sample_options(sample) +
+                                iteration_options(its, converge))
+        self.name = (run_name(cfg) + ("" if scale == 1 else "-scale%g" % scale) +
+                     ("-sample" + sample.replace(":", "-") if sample else "") +
+                     ("-its%d" % its if its else "") + ("-converge%g" % converge if converge else ""))
+        self.rss_mb = model.rss_mb(cfg)
+        self.wall_s = model.wall_s(cfg) * self.wall_factor()
+        self.stop_ps = None
+        self.proc = None
+        self.start = None
+        self.rundir = None
+        self.log = None
+        self.polled = None
+        self.timed_out = False
+
+    def wall_factor(self):
+        """Wall time relative to the full-size, unsampled run of the catalog workload (at most, when converging)."""
+        its = self.its or CATALOG["workload"]["iterations"]
+        return self.scale ** 3 * sampling.fraction(self.sample) * its / CATALOG["workload"]["iterations"]
+
+    def bound(self, best):
+        """Stop the run where it can no longer beat the best result (a store record); scaled, sampled and
+        multi-iteration times are not comparable with it."""
+        if best is not None and self.options == model_options(self.cfg):
+            self.stop_ps = best["simulated_time_ps"] * best["cost"] / config_cost(self.cfg)
+
+
+def launch(job, sst, script, outdir, extra_args):
+    job.rundir = os.path.join(outdir, "runs", job.name)
+    if not os.path.isdir(job.rundir):
+        os.makedirs(job.rundir)
+    job.log = os.path.join(job.rundir, "sst.log")
+    for _, name in statsload.FORMATS.values():
+        # A retried point must not report the statistics of its previous run
+        if os.path.exists(os.path.join(job.rundir, name)):
+            os.remove(os.path.join(job.rundir, name))
+    stop = ["--stop-at=%dps" % math.ceil(job.stop_ps)] if job.stop_ps else []
+    cmd = [sst] + extra_args + stop + [script, "--model-options=" + job.options]
+    with open(job.log, "w") as log:
+        job.proc = subprocess.Popen(cmd, cwd=job.rundir, stdout=log, stderr=subprocess.STDOUT)
+    job.start = time.time()
+    job.polled = job.start
+
+
+def watch(job, interval, max_wall):
+    """Read a running job's last heartbeat every interval seconds: its projected wall time becomes the scheduler's
+    estimate, and the run is stopped if that exceeds max_wall."""
+    now = time.time()
+    if now - job.polled < interval:
+        return
+    job.polled = now
+    beat = heartbeat.latest(job.log)
+    if beat is None:
+        return
+    job.wall_s = now - job.start + beat["eta_s"]
+    if max_wall and job.wall_s > max_wall and beat["fraction"] >= MIN_PROGRESS and not job.timed_out:
+        print("Stopping %s: %.1f%% done, projected %.0f s of wall time" % (job.options, 100.0 * beat["fraction"],
+                                                                           job.wall_s))
+        sys.stdout.flush()
+        job.timed_out = True
+        job.proc.terminate()
+
+
+def reap(job):
+    """Non-blocking wait. Returns None while running, else (exit status, peak RSS in KiB)."""
+    try:
+        pid, status, usage = os.wait4(job.proc.pid, os.WNOHANG)
+    except OSError as e:
+        if e.errno != errno.ECHILD:
+            raise
+        return (job.proc.returncode if job.proc.returncode is not None else -1), 0
+    if pid == 0:
+        return None
+    if os.WIFEXITED(status):
+        job.proc.returncode = os.WEXITSTATUS(status)
+    else:
+        job.proc.returncode = -os.WTERMSIG(status)
+    return job.proc.returncode, usage.ru_maxrss
+
+
+def finish(job, returncode, peak_rss_kb):
+    wall = time.time() - job.start
+    with open(job.log) as log:
+        text = log.read()
+    simtime, simtime_ps = parse_simtime(text)
+    if job.sample and simtime is not None:
+        # The run skipped most planes; its result is the extrapolated time of the full slabs
+        sampled = sampling.estimate(sampling.parse_log(text))
+        simtime, simtime_ps = (sampling.format_time(sampled), sampled["time_ps"]) if sampled else (None, None)
+    if (job.its or job.converge) and simtime is not None:
+        # The result is the steady-state time per iteration, the cold one when no phase cycle finished
+        iters = iterations.summarize(iterations.parse_log(text))
+        simtime, simtime_ps = ((iterations.format_time(iters), iters["steady_ps"] or iters["cold_ps"]) if iters
+                               else (None, None))
+    lower_bound_ps = None
+    if "ABORT: Cost exceeds" in text:
+        status = "aborted"
+    elif job.timed_out:
+        status = "timeout"
+        simtime, simtime_ps = None, None
+    elif returncode == 0 and simtime is not None and job.stop_ps and simtime_ps >= job.stop_ps * (1 - STOP_TOLERANCE):
+        status = "dominated"
+        simtime, simtime_ps, lower_bound_ps = ">= " + simtime, None, simtime_ps
+    elif returncode == 0 and simtime is not None:
+        status = "ok"
+    else:
+        status = "failed"
+    return {
+        "options" : job.options,
+        "cost" : config_cost(job.cfg),
+        "status" : status,
+        "simulated_time" : simtime,
+        "simulated_time_ps" : simtime_ps,
+        "wall_time" : wall,
+        "peak_rss_kb" : peak_rss_kb,
+        "stats_path" : statsload.find_stats(job.rundir),
+        "log_path" : job.log,
+        "lower_bound_ps" : lower_bound_ps,
+    }
+
+
+class Scheduler:
+    """Packs jobs onto the machine by core slots and estimated peak RSS.
+
+    Pending jobs are kept longest-first. The head job gets a reservation at the earliest time enough memory is expected
+    to be free; shorter jobs are backfilled only if they fit now and are expected to finish before that reservation.
+    """
+
+    def __init__(self, slots, mem_mb):
+        self.slots = slots
+        self.mem_mb = mem_mb
+        self.pending = []
+        self.running = []
+
+    def add(self, jobs):
+        self.pending.extend(jobs)
+        self.pending.sort(key=lambda j: j.wall_s, reverse=True)
+
+    def used_mb(self):
+        return sum(j.rss_mb for j in self.running)
+
+    def _reservation(self, head, now):
+        free = self.mem_mb - self.used_mb()
+        if free >= head.rss_mb:
+            return now
+        # Jobs picked in this round have not been launched yet, so count them as starting now
+        end = lambda j: (j.start if j.start is not None else now) + j.wall_s
+        for job in sorted(self.running, key=end):
+            free += job.rss_mb
+            if free >= head.rss_mb:
+                return max(now, end(job))
+        return None
+
+    def next_jobs(self, now):
+        started = []
+        while self.pending and len(self.running) < self.slots:
+            head = self.pending[0]
+            if head.rss_mb > self.mem_mb and not self.running:
+                # Larger than the whole budget: run it alone rather than never
+                started.append(self.pending.pop(0))
+                self.running.append(started[-1])
+                continue
+            if head.rss_mb <= self.mem_mb - self.used_mb():
+                started.append(self.pending.pop(0))
+                self.running.append(started[-1])
+                continue
+            reserve = self._reservation(head, now)
+            backfill = None
+            for job in self.pending[1:]:
+                fits = job.rss_mb <= self.mem_mb - self.used_mb()
+                if fits and (reserve is None or now + job.wall_s <= reserve):
+                    backfill = job
+                    break
+            if backfill is None:
+                break
+            self.pending.remove(backfill)
+            self.running.append(backfill)
+            started.append(backfill)
+        return started
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run every in-budget configuration of scc-sst-node.py")
+    parser.add_argument("--sst", default="sst", help="SST executable (or a stand-in), default: sst")
+    parser.add_argument("--script", default=os.path.join(SCRIPT_DIR, "scc-sst-node.py"), help="SST input script")
+    parser.add_argument("--outdir", default="sweep-out", help="Directory for run logs")
+    parser.add_argument("--db", default=resultstore.DEFAULT_DB, help="Result store, default: %(default)s")
+    parser.add_argument("--budget", type=float, default=CATALOG["budget"], help="Cost limit, default: %(default)s")
+    parser.add_argument("--jobs", type=int, default=multiprocessing.cpu_count(), help="Concurrent SST runs")
+    parser.add_argument("--mem-gb", type=float, help="Memory to pack jobs into (default: 90%% of MemAvailable)")
+    parser.add_argument("--retry-failed", action="store_true", help="Re-run points that failed previously")
+    parser.add_argument("--limit", type=int, help="Only run the first N pending points")
+    parser.add_argument("--dry-run", action="store_true", help="Print the job plan and exit")
+    parser.add_argument("--sst-arg", action="append", default=[], help="Extra argument passed to sst (repeatable)")
+    parser.add_argument("--scale", type=float, default=1.0,
+                        help="Run scaled problems for fast screening (see calibrate.py), default: full size")
+    parser.add_argument("--configs", help="Only run the configurations listed in this file, one options string per line")
+    parser.add_argument("--trace-dir", help="Record and replay generator request traces here (see tracefile.py)")
+    parser.add_argument("--stats", choices=sorted(statsload.LEVELS),
+                        help="SST statistics level of every run (statsload.py), default: the script's (off)")
+    parser.add_argument("--iterations", type=int,
+                        help="Stencil iterations of every run; records the steady-state time per iteration "
+                             "(see iterations.py), default: the catalog workload")
+    parser.add_argument("--converge", type=float, metavar="TOL",
+                        help="With --iterations, stop once a phase cycle is within TOL of the previous one")
+    parser.add_argument("--no-bound", action="store_true",
+                        help="Run every point to completion instead of stopping runs that cannot beat the best")
+    parser.add_argument("--sample", metavar="PERIOD[:WINDOW[:WARMUP]]",
+                        help="Sampled screening runs with extrapolated times (see sampling.py), default: full runs")
+    parser.add_argument("--heartbeat", type=float, default=HEARTBEAT,
+                        help="Seconds between the progress heartbeats of every run (0: none), default: %(default)s")
+    parser.add_argument("--max-wall", type=float, metavar="SECONDS",
+                        help="Stop runs whose heartbeats project more wall time than this")
+    args = parser.parse_args(argv)
+    if args.sample:
+        try:
+            sampling.parse_spec(args.sample)
+        except ValueError as e:
+            parser.error(str(e))
+
+    outdir = os.path.abspath(args.outdir)
+    if not os.path.isdir(outdir):
+        os.makedirs(outdir)
+    mem_mb = args.mem_gb * 1024.0 if args.mem_gb else 0.9 * available_memory_mb()
+    script = os.path.abspath(args.script)
+    sst = os.path.abspath(args.sst) if os.sep in args.sst else args.sst
+    if args.trace_dir:
+        # Inherited by every SST run; the first run with a given partition records its traces, later ones replay them
+        os.environ["SC19_TRACE_DIR"] = os.path.abspath(args.trace_dir)
+    if args.stats:
+        # Statistics do not change the simulated time, so they are not part of the result key
+        os.environ["SC19_STATS"] = args.stats
+    if args.heartbeat:
+        # Neither do heartbeats
+        os.environ["SC19_HEARTBEAT"] = "%g" % args.heartbeat
+
+    store = resultstore.ResultStore(os.path.abspath(args.db), workdir=os.path.dirname(script))
+    model = ResourceModel()
+    for rec in store.results():
+        cfg, extra = resultstore.split_options(CATALOG, rec["options"])
+        if not extra:
+            model.observe(cfg, rec["peak_rss_kb"], rec["wall_time"])
+
+    if args.configs:
+        with open(args.configs) as f:
+            configs = [resultstore.split_options(CATALOG, line)[0] for line in f if line.strip()]
+    else:
+        configs = enumerate_configs(args.budget)
+    extra = scale_options(args.scale) + sample_options(args.sample) + iteration_options(args.iterations, args.converge)
+    skip = ("ok", "aborted", "dominated") + (() if args.retry_failed else ("failed", "timeout"))
+    todo = [cfg for cfg in configs
+            if (store.lookup(" ".join([model_options(cfg)] + extra)) or {}).get("status") not in skip]
+    print("%d configurations within budget %g, %d already finished, %d to run" %
+          (len(configs), args.budget, len(configs) - len(todo), len(todo)))
+    if args.limit is not None:
+        todo = todo[:args.limit]
+
+    sched = Scheduler(max(1, args.jobs), mem_mb)
+    sched.add([Job(cfg, model, args.scale, args.sample, args.iterations, args.converge) for cfg in todo])
+    if args.dry_run:
+        for job in sched.pending:
+            print("%-80s est %7.0f MB %8.0f s" % (job.options, job.rss_mb, job.wall_s))
+        return 0
+
+    interrupted = []
+    signal.signal(signal.SIGTERM, lambda signum, frame: interrupted.append(signum))
+    finished = 0
+    best = None if args.no_bound else store.best()
+    try:
+        while (sched.pending or sched.running) and not interrupted:
+            for job in sched.next_jobs(time.time()):
+                job.bound(best)
+                launch(job, sst, script, outdir, args.sst_arg)
+            for job in list(sched.running):
+                state = reap(job)
+                if state is None:
+                    watch(job, args.heartbeat or HEARTBEAT, args.max_wall)
+                    continue
+                sched.running.remove(job)
+                rec = finish(job, *state)
+                store.record(**rec)
+                plain = job.options == model_options(job.cfg)
+                if plain and rec["status"] not in ("dominated", "timeout"):
+                    model.observe(job.cfg, rec["peak_rss_kb"], rec["wall_time"])
+                if plain and rec["status"] == "ok" and not args.no_bound:
+                    best = store.best()
+                for pending in sched.pending:
+                    pending.rss_mb = model.rss_mb(pending.cfg)
+                    pending.wall_s = model.wall_s(pending.cfg) * pending.wall_factor()
+                finished += 1
+                print("[%d/%d] %-8s %-80s %s (%.1f s, %.0f MB)" %
+                      (finished, len(todo), rec["status"], rec["options"], rec["simulated_time"],
+                       rec["wall_time"], rec["peak_rss_kb"] / 1024.0))
+                sys.stdout.flush()
+            time.sleep(0.2)
+    except KeyboardInterrupt:
+        interrupted.append(signal.SIGINT)
+    if interrupted:
+        for job in sched.running:
+            job.proc.terminate()
+        for job in sched.running:
+            job.proc.wait()
+        print("Interrupted, %d runs not finished. Re-run the same command to resume." %
+              (len(sched.pending) + len(sched.running)))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,187 @@
+############################################################################################################################
+# Checks of the exploration tools that need neither SST nor a simulation run
+#
+#   python -m pytest -q test_tools.py
+############################################################################################################################
+from __future__ import print_function, division
+
+import collections
+import itertools
+import os
+import shutil
+import struct
+
+import pytest
+
+import catalog
+import meshpart
+import resultstore
+import smtsplit
+import sweep
+import tracefile
+
+CATALOG = catalog.load()
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+BASE_OPTIONS = "-n=40 -c=fast -t=no -l1=big -l2=small -s=private -l3=small -w=6 -b=slow -m=basic"
+
+
+def baseline_cost(cfg):
+    """The cost as the original scc-sst-node.py computed it, before the catalog."""
+    per_core_cost = {"slow" : 15, "medium" : 23, "fast" : 40}[cfg["coretype"]]
+    if cfg["smt"] == "yes":
+        per_core_cost = per_core_cost * 1.7
+    per_core_cost = per_core_cost + {"small" : 18, "big" : 28}[cfg["l1size"]]
+    per_core_cost = per_core_cost + {("private", "small") : 14, ("private", "big") : 20, ("shared", "small") : 16,
+                                     ("shared", "big") : 22}[(cfg["l2type"], cfg["l2size"])]
+    per_core_cost = per_core_cost + {"small" : 20, "big" : 24}[cfg["l3size"]]
+    per_core_cost = per_core_cost + {"slow" : 5, "fast" : 9}[cfg["noc"]]
+    memchan = int(cfg["memchannels"])
+    memory_cost = {"basic" : 110, "bw" : 200, "lat" : 260}[cfg["memtype"]] * memchan
+    return memory_cost + per_core_cost * int(cfg["corecount"])
+
+
+def all_configs():
+    names = catalog.option_names(CATALOG)
+    for values in itertools.product(*[catalog.option(CATALOG, name)["values"] for name in names]):
+        yield collections.OrderedDict(zip(names, values))
+
+
+def test_catalog_cost_matches_baseline():
+    for cfg in all_configs():
+        assert catalog.config_cost(CATALOG, cfg) == baseline_cost(cfg)
+
+
+def test_vectorized_cost_is_bit_identical():
+    pytest.importorskip("numpy")
+    space = catalog.enumerate_costs(CATALOG)
+    for flat, cfg in enumerate(all_configs()):
+        assert space.config(flat) == cfg
+        assert space.cost[flat] == catalog.config_cost(CATALOG, cfg)
+    within = [cfg for cfg in all_configs() if catalog.config_cost(CATALOG, cfg) <= CATALOG["budget"]]
+    assert catalog.enumerate_configs(CATALOG) == within
+
+
+@pytest.mark.parametrize("corecount", [int(n) for n in catalog.option(CATALOG, "corecount")["values"]])
+def test_meshpart_tiles_catalog_core_counts(corecount):
+    globalmesh = CATALOG["workload"]["globalmesh"]
+    boxes = meshpart.decompose(corecount, globalmesh)
+    assert len(boxes) == corecount
+    meshpart.verify_tiling(boxes, globalmesh)
+
+
+@pytest.mark.parametrize("corecount,globalmesh", [(26, 5), (27, 5), (128, 8), (216, 8)])
+def test_meshpart_tiles_near_one_point_per_core(corecount, globalmesh):
+    meshpart.verify_tiling(meshpart.decompose(corecount, globalmesh), globalmesh)
+
+
+def test_meshpart_rejects_more_cores_than_points():
+    with pytest.raises(ValueError):
+        meshpart.decompose(28, 5)
+
+
+def write_trace(path, params, count):
+    fields = [params.get(name, default) for name, default in
+              [(name, 0) for name in tracefile.TRACE_PARAMS] + tracefile.OPTIONAL_PARAMS]
+    with open(path, "wb") as f:
+        f.write(struct.pack(tracefile.HEADER_FORMAT, tracefile.MAGIC, tracefile.VERSION, tracefile.RECORD_SIZE, count,
+                            *fields))
+        for i in range(count):
+            f.write(struct.pack("<QIBBH", 8 * i, 8, i % 2, 0, tracefile.GROUP_END))
+
+
+def test_tracefile_header_round_trip(tmpdir):
+    params = dict((name, i + 1) for i, name in enumerate(tracefile.TRACE_PARAMS))
+    params.update({"ystep" : 2, "hash_shift" : 12, "hash_bits" : 3})
+    path = str(tmpdir.join(tracefile.trace_name(params)))
+    write_trace(path, params, 5)
+    header = tracefile.read_header(path)
+    assert header["count"] == 5
+    for name, value in params.items():
+        assert header[name] == value
+    assert tracefile.is_complete(path, params)
+    assert not tracefile.is_complete(path, dict(params, seed=99))
+
+    # A truncated trace is not complete, and a trace from before the optional parameters reads with their defaults
+    with open(path, "r+b") as f:
+        f.truncate(tracefile.HEADER_SIZE + 4 * tracefile.RECORD_SIZE)
+    assert not tracefile.is_complete(path, params)
+    old = dict((name, params[name]) for name in tracefile.TRACE_PARAMS)
+    write_trace(path, old, 0)
+    assert tracefile.is_complete(path, dict(old, ystep=1, hash_shift=6, hash_bits=0))
+    assert tracefile.trace_name(old) == tracefile.trace_name(dict(old, ystep=1))
+
+
+@pytest.mark.parametrize("split", smtsplit.SPLITS)
+def test_smtsplit_threads_cover_each_core(split):
+    globalmesh = CATALOG["workload"]["globalmesh"]
+    for corecount in [int(n) for n in catalog.option(CATALOG, "corecount")["values"]]:
+        for box, tboxes in smtsplit.split_boxes(corecount, globalmesh, split):
+            assert len(tboxes) == 2
+            assert sum(smtsplit.points(t) for t in tboxes) == meshpart.box_points(box)
+
+
+def model_dir(tmpdir):
+    """A copy of the model files the result store fingerprints, and of statsload.py, which it does not."""
+    workdir = str(tmpdir.mkdir("model"))
+    for name in resultstore.MODEL_FILES + ["statsload.py"]:
+        if os.path.exists(os.path.join(SCRIPT_DIR, name)):
+            shutil.copy(os.path.join(SCRIPT_DIR, name), workdir)
+    return workdir
+
+
+def test_resultstore_fingerprint_invalidates_results(tmpdir):
+    workdir = model_dir(tmpdir)
+    db = str(tmpdir.join("results.db"))
+    store = resultstore.ResultStore(db, workdir=workdir)
+    store.record(BASE_OPTIONS, cost=3000, status="ok", simulated_time_ps=1e8)
+    store.close()
+
+    # Option order does not matter
+    store = resultstore.ResultStore(db, workdir=workdir)
+    assert store.lookup(" ".join(reversed(BASE_OPTIONS.split())))["simulated_time_ps"] == 1e8
+    store.close()
+
+    with open(os.path.join(workdir, "statsload.py"), "a") as f:
+        f.write("\n")
+    store = resultstore.ResultStore(db, workdir=workdir)
+    assert store.lookup(BASE_OPTIONS) is not None
+    store.close()
+
+    with open(os.path.join(workdir, "sc19gen.cc"), "a") as f:
+        f.write("\n")
+    store = resultstore.ResultStore(db, workdir=workdir)
+    assert store.lookup(BASE_OPTIONS) is None
+    assert store.best() is None
+    store.close()
+
+    store = resultstore.ResultStore(db, workdir=workdir, genparams=dict(CATALOG["workload"], iterations=2))
+    assert store.lookup(BASE_OPTIONS) is None
+    store.close()
+
+
+def test_resultstore_best_counts_catalog_options_alone(tmpdir):
+    store = resultstore.ResultStore(str(tmpdir.join("results.db")), workdir=model_dir(tmpdir))
+    store.record(BASE_OPTIONS, cost=3000, status="ok", simulated_time_ps=1e8)
+    store.record(BASE_OPTIONS.replace("-w=6", "-w=8"), cost=3200, status="ok", simulated_time_ps=0.9e8)
+    for extra in ["--scale=0.5", "--sample=16:1:1", "--iterations=30", "--interleave=xor", "--placement=identity",
+                  "--batch=4"]:
+        store.record(BASE_OPTIONS + " " + extra, cost=3000, status="ok", simulated_time_ps=1e6)
+    store.record(BASE_OPTIONS.replace("-c=fast", "-c=slow"), cost=2000, status="dominated", lower_bound_ps=1e6)
+    assert store.best()["options"] == store.canonical(BASE_OPTIONS.replace("-w=6", "-w=8"))
+    store.close()
+
+
+def test_sweep_stop_at_bound():
+    cfg = catalog.parse_model_options(CATALOG, BASE_OPTIONS.replace("-c=fast", "-c=slow"))
+    best = {"simulated_time_ps" : 1e8, "cost" : 3000.0}
+    model = sweep.ResourceModel()
+
+    job = sweep.Job(cfg, model)
+    job.bound(best)
+    assert job.stop_ps == pytest.approx(1e8 * 3000.0 / sweep.config_cost(cfg))
+
+    assert sweep.Job(cfg, model).stop_ps is None
+    for job in [sweep.Job(cfg, model, scale=0.5), sweep.Job(cfg, model, sample="16:1:1"),
+                sweep.Job(cfg, model, its=30, converge=0.01)]:
+        job.bound(best)
+        assert job.stop_ps is None
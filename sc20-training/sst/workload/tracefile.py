@@ -0,0 +1,162 @@
+############################################################################################################################
+# sc19 request traces
+#
+# sc19.WorkloadGenerator writes its request stream to a trace when given the trace_record parameter, and
+# sc19.TraceGenerator replays it from a memory map (sc19trace.h). The stream depends only on the generator parameters
+# listed in TRACE_PARAMS and OPTIONAL_PARAMS, so a trace recorded once serves every later run with the same
+# partition and address hash, whatever the hardware configuration. When SC19_TRACE_DIR is set, scc-sst-node.py replays the trace for
+# each generator if it exists and records it otherwise.
+#
+# File layout (little endian): a 128-byte header
+#
+#   magic "SC19TRC\0", version u32, record size u32, record count u64,
+#   meshx meshy meshz beginx beginy beginz endx endy endz iterations histoslots seed ystep hash_shift hash_bits
+#   (u32 each), 44 bytes reserved
+#
+# followed by 16-byte records: addr u64, size u32, op u8 (0 read, 1 write), depmask u8 (bit i: depends on the request
+# i + 1 records earlier), flags u16 (bit 0: last request of a generate() call).
+#
+#   python tracefile.py info traces/*.trc
+#   python tracefile.py dump traces/sc19-0123456789abcdef.trc --head 16
+############################################################################################################################
+from __future__ import print_function, division
+
+import argparse
+import hashlib
+import json
+import os
+import struct
+import sys
+
+MAGIC = b"SC19TRC\0"
+VERSION = 1
+HEADER_FORMAT = "<8sIIQ15I44x"
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+RECORD_SIZE = 16
+TRACE_PARAMS = ["meshx", "meshy", "meshz", "beginx", "beginy", "beginz", "endx", "endy", "endz", "iterations",
+                "histoslots", "seed"]
+# Parameters added since, with the value that leaves the stream as before: traces recorded before them have 0 in what
+# was reserved space
+OPTIONAL_PARAMS = [("ystep", 1), ("hash_shift", 6), ("hash_bits", 0)]
+
+OP_READ = 0
+OP_WRITE = 1
+GROUP_END = 0x1
+
+
+def record_dtype():
+    import numpy as np
+    return np.dtype([("addr", "<u8"), ("size", "<u4"), ("op", "u1"), ("depmask", "u1"), ("flags", "<u2")])
+
+
+def trace_params(params):
+    """The generator parameters that determine the request stream, as ints. OPTIONAL_PARAMS only count when they differ
+    from their default, so traces recorded before they existed keep their names."""
+    result = dict((name, int(params[name])) for name in TRACE_PARAMS)
+    for name, default in OPTIONAL_PARAMS:
+        if int(params.get(name, default)) != default:
+            result[name] = int(params[name])
+    return result
+
+
+def trace_name(params):
+    """File name of the trace for a set of generator parameters."""
+    key = json.dumps(trace_params(params), sort_keys=True)
+    return "sc19-%s.trc" % hashlib.sha1(key.encode("ascii")).hexdigest()[:16]
+
+
+def read_header(path):
+    """Header fields as a dict, or None if the file is missing or not a trace."""
+    try:
+        with open(path, "rb") as f:
+            data = f.read(HEADER_SIZE)
+    except IOError:
+        return None
+    if len(data) != HEADER_SIZE:
+        return None
+    fields = struct.unpack(HEADER_FORMAT, data)
+    if fields[0] != MAGIC or fields[1] != VERSION or fields[2] != RECORD_SIZE:
+        return None
+    header = dict(zip(TRACE_PARAMS + [name for name, _ in OPTIONAL_PARAMS], fields[4:]))
+    for name, default in OPTIONAL_PARAMS:
+        header[name] = header[name] or default
+    header["count"] = fields[3]
+    return header
+
+
+def is_complete(path, params=None):
+    """True if path holds a whole trace, recorded with these generator parameters if given."""
+    header = read_header(path)
+    if header is None or os.path.getsize(path) != HEADER_SIZE + header["count"] * RECORD_SIZE:
+        return False
+    return params is None or all(header[k] == v for k, v in trace_params(params).items())
+
+
+def records(path):
+    """The records of a trace as a read-only NumPy memmap."""
+    import numpy as np
+    header = read_header(path)
+    if header is None:
+        raise ValueError(path + " is not an sc19 trace")
+    return np.memmap(path, dtype=record_dtype(), mode="r", offset=HEADER_SIZE, shape=(header["count"],))
+
+
+def summary(path):
+    import numpy as np
+    recs = records(path)
+    lines = np.unique(recs["addr"] >> 6)
+    writes = int(np.count_nonzero(recs["op"] == OP_WRITE))
+    return {
+        "requests" : len(recs),
+        "reads" : len(recs) - writes,
+        "writes" : writes,
+        "groups" : int(np.count_nonzero(recs["flags"] & GROUP_END)),
+        "dependencies" : int(np.unpackbits(recs["depmask"]).sum()),
+        "lines" : len(lines),
+        "footprint_kib" : len(lines) * 64 / 1024.0,
+        "addr_min" : int(recs["addr"].min()) if len(recs) else 0,
+        "addr_max" : int(recs["addr"].max()) if len(recs) else 0,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect sc19 request traces")
+    sub = parser.add_subparsers(dest="command")
+    info = sub.add_parser("info", help="Header and request mix of each trace")
+    info.add_argument("traces", nargs="+")
+    dump = sub.add_parser("dump", help="Print the records of a trace")
+    dump.add_argument("trace")
+    dump.add_argument("--head", type=int, default=32, help="Number of records, default: %(default)s")
+    args = parser.parse_args(argv)
+
+    if args.command == "info":
+        for path in args.traces:
+            header = read_header(path)
+            if header is None:
+                print("%s: not an sc19 trace" % path)
+                continue
+            print("%s: %s" % (path, "complete" if is_complete(path) else "INCOMPLETE"))
+            print("  mesh %(meshx)dx%(meshy)dx%(meshz)d, x %(beginx)d-%(endx)d, y %(beginy)d-%(endy)d, "
+                  "z %(beginz)d-%(endz)d, %(iterations)d iterations, %(histoslots)d histogram slots, seed %(seed)d"
+                  % header + (", y step %d" % header["ystep"] if header["ystep"] != 1 else "")
+                  + (", address hash %(hash_bits)d bits of %(hash_shift)d-bit units" % header
+                     if header["hash_bits"] else ""))
+            if is_complete(path):
+                print("  %(requests)d requests (%(reads)d reads, %(writes)d writes) in %(groups)d groups, "
+                      "%(dependencies)d dependencies, %(lines)d distinct lines (%(footprint_kib).0f KiB), "
+                      "addresses 0x%(addr_min)x-0x%(addr_max)x" % summary(path))
+    elif args.command == "dump":
+        recs = records(args.trace)
+        for i in range(min(args.head, len(recs))):
+            rec = recs[i]
+            print("%10d 0x%012x %2d %-5s deps 0x%02x%s" % (i, rec["addr"], rec["size"],
+                                                         "WRITE" if rec["op"] == OP_WRITE else "READ",
+                                                         rec["depmask"], " end" if rec["flags"] & GROUP_END else ""))
+    else:
+        parser.print_help()
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())